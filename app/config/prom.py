@@ -12,6 +12,36 @@ PROM_CONFIG = {
             'rating': 'svg[data-qaid="count_stars"]',
             'date': 'time[data-qaid="date_created"]',
             'verified_purchase': 'span[data-qaid="prom_label_text"]'
+        },
+        'pagination': {
+            'next_page': '[data-qaid="pagination_next"]',
+            'page_param': 'page'
         }
+    },
+    # Серверні сторінки відгуків легкі, тож дозволяємо частіші запити
+    'rate_limit': {'rate': 2, 'burst': 4},
+    # Класифікація помилок завантаження: повторювати чи ні і чи рахувати збій для circuit breaker
+    'error_patterns': [
+        {
+            'pattern': r'waiting for (locator|selector).*opinion_item',
+            'retryable': False,
+            'breaker': True,
+            'solution': 'Список відгуків не з\'явився - перевірте селектор review_item'
+        },
+        {
+            'pattern': r'net::ERR_(HTTP_RESPONSE_CODE_FAILURE|ABORTED)',
+            'retryable': True,
+            'solution': 'Prom тимчасово не віддав сторінку'
+        }
+    ],
+    'base_url': 'https://prom.ua',
+    'url_patterns': {
+        'reviews': '/ua/product-opinions/list/{product_id}',
+        'product': '/ua/p{product_id}'
+    },
+    'headers': {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'uk-UA,uk;q=0.9,en-US;q=0.8,en;q=0.7'
     }
 }
\ No newline at end of file
@@ -1,6 +1,22 @@
 ROZETKA_CONFIG = {
     'name': 'rozetka',
     'base_url': 'https://rozetka.com.ua',
+    # Rozetka швидко показує капчу, тому повні сторінки в браузері завантажуються рідше
+    'rate_limit': {'rate': 0.5, 'burst': 2},
+    # Класифікація помилок завантаження: повторювати чи ні і чи рахувати збій для circuit breaker
+    'error_patterns': [
+        {
+            'pattern': r'waiting for (locator|selector).*product-comments__list-item',
+            'retryable': False,
+            'breaker': True,
+            'solution': 'Відгуки не з\'явились - змінилась розмітка або показано капчу'
+        },
+        {
+            'pattern': r'net::ERR_(HTTP2_PROTOCOL_ERROR|CONNECTION_CLOSED)',
+            'retryable': True,
+            'solution': 'Rozetka обірвала з\'єднання'
+        }
+    ],
     'selectors': {
         'product_title': 'h1.product__title',
         'review_item': '.product-comments__list-item',
@@ -3,12 +3,11 @@ from bs4 import BeautifulSoup
 import re
 import logging
 from flask import current_app
-from playwright.sync_api import sync_playwright
-import time
-import os
 
 from app.extractors.base import BaseExtractor
 from app.config.rozetka import ROZETKA_CONFIG
+from app.services.browser_pool import browser_pool
+from app.services.scroll_loader import scroll_until_loaded
 
 logger = logging.getLogger(__name__)
 
@@ -95,18 +94,14 @@ class RozetkaExtractor(BaseExtractor):
             return match.group(1)
         return None
         
-    def extract_reviews(self, url: str) -> List[Dict[str, Any]]:
+    def extract_reviews(self, url: str, max_reviews: int = None) -> List[Dict[str, Any]]:
         """Extract reviews from product page using Playwright."""
         reviews = []
         
         logger.info("Починаємо витяг відгуків")
         
-        with sync_playwright() as p:
-            # Запускаємо браузер
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context()
-            page = context.new_page()
-            
+        # Беремо браузер з пулу замість запуску нового
+        with browser_pool.new_page() as page:
             try:
                 # Відкриваємо сторінку
                 page.goto(url)
@@ -114,38 +109,17 @@ class RozetkaExtractor(BaseExtractor):
                 # Чекаємо поки завантажаться відгуки
                 page.wait_for_selector('.product-comments__list-item')
                 
-                # Скролимо сторінку, щоб завантажити всі відгуки
-                previous_height = 0
-                max_scrolls = 10  # Максимальна кількість скролів
-                scroll_count = 0
-                
-                while scroll_count < max_scrolls:
-                    # Скролимо до кінця сторінки
-                    page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                    time.sleep(2)  # Чекаємо поки підвантажаться нові відгуки
-                    
-                    # Перевіряємо нову висоту
-                    current_height = page.evaluate('document.body.scrollHeight')
-                    if current_height == previous_height:
-                        break  # Якщо висота не змінилась, значить нові відгуки не завантажились
-                        
-                    previous_height = current_height
-                    scroll_count += 1
+                # Скролимо сторінку, поки підвантажуються нові відгуки
+                scroll_until_loaded(page, '.product-comments__list-item', max_items=max_reviews)
                 
                 # Отримуємо HTML
                 html = page.content()
-
-                # Зберігаємо HTML для діагностики
-                debug_path = os.path.abspath('debug_rozetka_product.html')
-                with open(debug_path, 'w', encoding='utf-8') as f:
-                    f.write(html)
-                print(f"HTML сторінки збережено у: {debug_path}")
-                print(f"Розмір debug_rozetka_product.html: {os.path.getsize(debug_path)} байт")
-                print("Починаю парсинг відгуків з debug_rozetka_product.html...")
                 
                 # Аналізуємо відгуки
                 soup = BeautifulSoup(html, 'html.parser')
                 review_items = soup.select('.product-comments__list-item')
+                if max_reviews:
+                    review_items = review_items[:max_reviews]
                 logger.debug(f"Знайдено відгуків: {len(review_items)}")
                 
                 for item in review_items:
@@ -159,8 +133,6 @@ class RozetkaExtractor(BaseExtractor):
                 
             except Exception as e:
                 logger.error(f"Помилка при роботі з Playwright: {str(e)}")
-            finally:
-                browser.close()
                 
         logger.info(f"Загалом оброблено відгуків: {len(reviews)}")
         return reviews
@@ -169,11 +141,7 @@ class RozetkaExtractor(BaseExtractor):
         """Extract product information using Playwright."""
         product_info = {}
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context()
-            page = context.new_page()
-            
+        with browser_pool.new_page() as page:
             try:
                 # Відкриваємо сторінку
                 page.goto(url)
@@ -197,7 +165,5 @@ class RozetkaExtractor(BaseExtractor):
                     
             except Exception as e:
                 logger.error(f"Помилка при роботі з Playwright: {str(e)}")
-            finally:
-                browser.close()
             
         return product_info 
\ No newline at end of file
@@ -1,23 +1,86 @@
 from datetime import datetime
 from app import db
+import json
 
 class Extraction(db.Model):
+    __table_args__ = (
+        # Ліміт URL на місяць, список витягів і дашборд фільтрують за user_id та created_at
+        db.Index('ix_extraction_user_id_created_at', 'user_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     url = db.Column(db.String(500), nullable=False)
     platform = db.Column(db.String(50), nullable=False)
-    status = db.Column(db.String(20), default='pending')  # pending, completed, failed
+    status = db.Column(db.String(20), default='pending')  # pending, processing, completed, error, cancelled
+    # full - усі відгуки заново, incremental - лише нові відгуки дописуються до цього ж витягу
+    mode = db.Column(db.String(20), nullable=False, default='full', server_default='full')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)  # Коли воркер взяв задачу
+    heartbeat_at = db.Column(db.DateTime)  # Остання позначка воркера, що задача ще обробляється
     completed_at = db.Column(db.DateTime)
     title = db.Column(db.String(500))  # Назва товару
     error_message = db.Column(db.Text)
+    # Лічильник змін відгуків (вставка, повторний парсинг) для відбитка підсумку
+    review_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Foreign keys
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    batch_id = db.Column(db.Integer, db.ForeignKey('extraction_batch.id'), index=True)  # Пакет, з яким подано URL
     
     # Relationships
     reviews = db.relationship('Review', backref='extraction', lazy='dynamic')
 
+class ExtractionBatch(db.Model):
+    """Пакет URL, поданих одним запитом; кожен URL стає окремим витягом"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_count = db.Column(db.Integer, nullable=False, default=0)  # Скільки URL надіслано, разом з дублікатами
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    extractions = db.relationship('Extraction', backref='batch', lazy='dynamic')
+
+class TrackedProduct(db.Model):
+    """Товар, відгуки якого планувальник регулярно оновлює інкрементальним витягом"""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'url', name='uq_tracked_product_user_id_url'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    url = db.Column(db.String(500), nullable=False)
+    platform = db.Column(db.String(50), nullable=False)
+    refresh_interval = db.Column(db.Integer, nullable=False)  # Секунди між оновленнями
+    next_due_at = db.Column(db.DateTime, nullable=False, index=True)
+    last_enqueued_at = db.Column(db.DateTime)
+    last_extraction_id = db.Column(db.Integer, db.ForeignKey('extraction.id', name='fk_tracked_product_last_extraction_id'))
+    active = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    user = db.relationship('User')
+    last_extraction = db.relationship('Extraction')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'platform': self.platform,
+            'refresh_interval': self.refresh_interval,
+            'next_due_at': self.next_due_at.isoformat(),
+            'last_enqueued_at': self.last_enqueued_at.isoformat() if self.last_enqueued_at else None,
+            'last_extraction_id': self.last_extraction_id,
+            'active': self.active
+        }
+
 class Review(db.Model):
+    __table_args__ = (
+        db.Index('ix_review_extraction_id_id', 'extraction_id', 'id'),
+        # Один відгук платформи зберігається в межах витягу лише раз
+        db.Index('uq_review_extraction_id_platform_review_id', 'extraction_id', 'platform_review_id', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     author = db.Column(db.String(100))
     text = db.Column(db.Text)
@@ -43,4 +106,33 @@ class Review(db.Model):
             'platform_review_id': self.platform_review_id,
             'created_at': self.created_at.isoformat(),
             'product_title': self.extraction.title
-        } 
\ No newline at end of file
+        } 
+class PageSnapshot(db.Model):
+    """Збережений HTML сторінки витягу; вміст лежить у сховищі знімків за sha256"""
+    id = db.Column(db.Integer, primary_key=True)
+    extraction_id = db.Column(db.Integer, db.ForeignKey('extraction.id'), nullable=False, index=True)
+    page_number = db.Column(db.Integer, nullable=False, default=1)  # Порядок сторінки в межах витягу
+    url = db.Column(db.String(500), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)  # Розмір HTML до стиснення, байти
+    stored_size = db.Column(db.Integer, nullable=False)  # Розмір файлу у сховищі, байти
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class ExtractionSummary(db.Model):
+    """Згенерований ШІ підсумок відгуків витягу разом з агрегатами рейтингу"""
+    id = db.Column(db.Integer, primary_key=True)
+    extraction_id = db.Column(db.Integer, db.ForeignKey('extraction.id'), nullable=False, unique=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # Відбиток набору відгуків, для якого згенеровано підсумок
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    average_rating = db.Column(db.Float)
+    rating_histogram = db.Column(db.Text)  # JSON: {"1": 3, "5": 10}
+    result = db.Column(db.Text, nullable=False)  # JSON відповідь ШІ: summary, pros, cons
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        data = json.loads(self.result)
+        data['average_rating'] = self.average_rating or 0
+        data['rating_histogram'] = json.loads(self.rating_histogram or '{}')
+        data['review_count'] = self.review_count
+        return data
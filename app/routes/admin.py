@@ -5,6 +5,15 @@ from app.models.platform import Platform
 from app.models.user import User
 from app.services.extractor import ReviewExtractor, extract_page_content
 from app.services.ai_helper import AIHelper
+from app.services.ai_cache import ai_response_cache
+from app.services.browser_pool import browser_pool
+from app.services.browser_fetcher import shared_fetcher
+from app.services.resource_blocking import resource_stats
+from app.services.rate_limit import rate_limiter
+from app.services.circuit_breaker import circuit_breaker
+from app.services.snapshots import prune_snapshots
+from app.services.reparse import reparse_extractions
+from app.services.extraction_plan import invalidate_plans
 from app.utils.auth import admin_required
 import json
 
@@ -58,6 +67,7 @@ def add_platform_new():
         
         db.session.add(platform)
         db.session.commit()
+        invalidate_plans(domain)
         
         return jsonify({
             'status': 'success',
@@ -78,6 +88,7 @@ def update_platform(id):
         if not data:
             return jsonify({'error': 'Не вдалося отримати дані'}), 400
             
+        old_domain = platform.domain
         platform.name = data.get('name', platform.name)
         platform.domain = data.get('domain', platform.domain)
         
@@ -89,6 +100,9 @@ def update_platform(id):
             platform.config = config
         
         db.session.commit()
+        # Скидаємо скомпільовані плани для старого й нового домену
+        invalidate_plans(old_domain)
+        invalidate_plans(platform.domain)
         return jsonify({'status': 'success', 'message': 'Платформу оновлено'})
     except Exception as e:
         db.session.rollback()
@@ -101,6 +115,7 @@ def delete_platform(id):
         platform = Platform.query.get_or_404(id)
         db.session.delete(platform)
         db.session.commit()
+        invalidate_plans(platform.domain)
         
         return jsonify({
             'status': 'success',
@@ -169,6 +184,75 @@ def test_platform(id):
             'error': str(e)
         })
 
+@bp.route('/browser-pool')
+def browser_pool_stats():
+    """Метрики пулу браузерів, паралельного завантаження і блокування ресурсів поточного процесу"""
+    return jsonify({
+        **browser_pool.stats(),
+        'batch_fetcher': shared_fetcher.stats(),
+        'resource_blocking': resource_stats.snapshot()
+    })
+
+@bp.route('/rate-limits')
+def rate_limit_stats():
+    """Час очікування запитів у черзі ліміту по доменах для всіх воркерів"""
+    return jsonify(rate_limiter.stats())
+
+@bp.route('/rate-limits/reset', methods=['POST'])
+def reset_rate_limit_stats():
+    rate_limiter.reset_stats()
+    return jsonify({'status': 'success'})
+
+@bp.route('/circuit-breakers')
+def circuit_breaker_stats():
+    """Стан circuit breaker платформ: збої поспіль, призупинені домени і час пробної задачі"""
+    return jsonify(circuit_breaker.stats())
+
+@bp.route('/circuit-breakers/reset', methods=['POST'])
+def reset_circuit_breakers():
+    """Відновлює витяги домену (або всіх доменів) після виправлення конфігурації платформи"""
+    data = request.get_json(silent=True) or {}
+    circuit_breaker.reset(data.get('domain'))
+    return jsonify({'status': 'success'})
+
+@bp.route('/snapshots/prune', methods=['POST'])
+def prune_page_snapshots():
+    """Застосовує обмеження зберігання знімків сторінок"""
+    return jsonify(prune_snapshots())
+
+@bp.route('/reparse', methods=['POST'])
+def reparse():
+    """Повторно парсить збережені сторінки витягів поточною конфігурацією платформи"""
+    data = request.get_json() or {}
+    platform_id = data.get('platform_id')
+    extraction_ids = data.get('extraction_ids')
+    if not platform_id and not extraction_ids:
+        return jsonify({'error': 'Вкажіть platform_id або extraction_ids'}), 400
+
+    platform = Platform.query.get_or_404(platform_id).domain if platform_id else None
+    try:
+        report = reparse_extractions(
+            platform=platform,
+            extraction_ids=extraction_ids,
+            dry_run=bool(data.get('dry_run'))
+        )
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Помилка повторного парсингу: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify(report)
+
+@bp.route('/ai-stats')
+def ai_request_stats():
+    """Лічильники запитів до ШІ сервісу та кешу відповідей поточного процесу"""
+    return jsonify(ai_helper.get_stats())
+
+@bp.route('/ai-cache/clear', methods=['POST'])
+def clear_ai_cache():
+    """Очищує кеш відповідей ШІ"""
+    ai_response_cache.clear()
+    return jsonify({'success': True})
+
 @bp.route('/platforms/generate-config', methods=['POST'])
 @login_required
 def generate_platform_config():
@@ -188,7 +272,8 @@ def generate_platform_config():
         config = ai_helper.generate_platform_config_from_examples(
             url=url,
             title_example=title_block,
-            review_example=review_block
+            review_example=review_block,
+            bypass_cache=bool(data.get('bypass_cache'))
         )
 
         if not config:
@@ -1,13 +1,16 @@
-from flask import Blueprint, render_template, request, jsonify, current_app, abort
+from flask import Blueprint, render_template, request, jsonify, current_app, abort, Response, stream_with_context
 from flask_login import login_required, current_user
-from app.models.extraction import Extraction, Review
-from app.services.extractor import ReviewExtractor, extract_page_content
-from app.services.ai_helper import AIHelper
+from app.models.extraction import Extraction, ExtractionBatch, Review, TrackedProduct
+from app.services.jobs import EXTRACTION_MODES, enqueue_extraction, enqueue_batch, cancel_extraction
+from app.services.batches import parse_url_list, prepare_batch_urls, batch_progress
+from app.services import summaries
+from app.services.snapshots import delete_snapshots, delete_unreferenced_files
+from app.services.scheduler import track_product
+from app.services.export import (EXPORT_FORMATS, BULK_EXPORT_FORMATS, BULK_EXPORT_COLUMNS, iter_extraction_reviews,
+                                 iter_user_reviews, decode_cursor, export_stream, export_headers)
 from app import db
-from datetime import datetime
+from datetime import datetime, timedelta
 import re
-import json
-import requests
 
 bp = Blueprint('review', __name__)
 
@@ -45,80 +48,144 @@ def extract():
         
         if not url:
             return jsonify({'error': 'URL не вказано'}), 400
+        # incremental - дописати лише нові відгуки до останнього витягу цього URL
+        mode = data.get('mode', 'full')
+        if mode not in EXTRACTION_MODES:
+            return jsonify({'error': f'Невідомий режим витягу: {mode}'}), 400
             
-        # Створюємо новий запис про витяг
-        extraction = Extraction(
-            url=url,
-            status='processing',
-            created_at=datetime.utcnow(),
-            user_id=current_user.id,
-            platform='unknown'
-        )
-        db.session.add(extraction)
-        db.session.commit()
+        # Ставимо витяг у чергу, його виконає один з воркерів
+        extraction = enqueue_extraction(current_user, url, mode)
         
-        try:
-            # Отримуємо HTML сторінки використовуючи той самий метод, що і в тестуванні
-            html_content = extract_page_content(url)
-            if not html_content:
-                extraction.status = 'error'
-                extraction.error_message = 'Не вдалося отримати вміст сторінки'
-                db.session.commit()
-                return jsonify({'error': 'Не вдалося отримати вміст сторінки'}), 400
-            
-            # Використовуємо екстрактор
-            extractor = ReviewExtractor()
-            result = extractor.extract_reviews(html_content, url)
-            
-            if not result:
-                extraction.status = 'error'
-                extraction.error_message = 'Не вдалося витягти відгуки'
-                db.session.commit()
-                return jsonify({'error': 'Не вдалося витягти відгуки'}), 400
-                
-            if not isinstance(result, dict) or 'reviews' not in result:
-                extraction.status = 'error'
-                extraction.error_message = 'Неправильний формат результату витягу'
-                db.session.commit()
-                return jsonify({'error': 'Неправильний формат результату витягу'}), 400
-            
-            # Зберігаємо результати
-            for review_data in result['reviews']:
-                review = Review(
-                    extraction_id=extraction.id,
-                    author=review_data.get('author'),
-                    text=review_data.get('text') or review_data.get('title'),  # Використовуємо title якщо text відсутній
-                    rating=review_data.get('rating'),
-                    date=review_data.get('date'),
-                    advantages=review_data.get('advantages'),
-                    disadvantages=review_data.get('disadvantages'),
-                    platform_review_id=review_data.get('platform_review_id')
-                )
-                db.session.add(review)
-            
-            extraction.status = 'completed'
-            extraction.title = result.get('product_title', '')
-            extraction.platform = result.get('platform', 'unknown')
-            extraction.completed_at = datetime.utcnow()
-            db.session.commit()
-            
-            return jsonify({
-                'status': 'success',
-                'extraction_id': extraction.id,
-                'reviews_count': len(result['reviews'])
-            })
-            
-        except Exception as e:
-            extraction.status = 'error'
-            extraction.error_message = f'Помилка обробки: {str(e)}'
-            db.session.commit()
-            current_app.logger.error(f"Error processing extraction: {str(e)}")
-            return jsonify({'error': str(e)}), 500
+        return jsonify({
+            'status': extraction.status,
+            'extraction_id': extraction.id,
+            'mode': extraction.mode
+        }), 202
             
     except Exception as e:
         current_app.logger.error(f"Error in extract_reviews: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/extract/batch', methods=['POST'])
+@login_required
+def extract_batch():
+    """Ставить у чергу пакет URL: JSON {"urls": [...]}, поле форми urls або файл file"""
+    upload = request.files.get('file')
+    if upload:
+        urls = parse_url_list(upload.read().decode('utf-8', errors='replace'))
+    else:
+        data = request.get_json(silent=True) or request.form
+        urls = data.get('urls') or []
+        if isinstance(urls, str):
+            urls = parse_url_list(urls)
+        elif not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+            return jsonify({'error': 'urls має бути списком рядків'}), 400
+
+    if not urls:
+        return jsonify({'error': 'URL не вказано'}), 400
+    max_urls = current_app.config['BATCH_MAX_URLS']
+    if len(urls) > max_urls:
+        return jsonify({'error': f'Забагато URL у пакеті, максимум {max_urls}'}), 400
+
+    accepted, rejected, duplicates = prepare_batch_urls(urls)
+    if not accepted:
+        return jsonify({'error': 'Жоден URL не пройшов перевірку', 'rejected': rejected}), 400
+
+    remaining = current_user.get_remaining_urls()
+    if len(accepted) > remaining:
+        return jsonify({
+            'error': f'Перевищено місячний ліміт URL: залишилось {remaining}, у пакеті {len(accepted)}',
+            'remaining': remaining
+        }), 403
+
+    batch = enqueue_batch(current_user, accepted, len(urls), duplicates)
+    return jsonify({
+        'batch_id': batch.id,
+        'accepted': len(accepted),
+        'duplicates': duplicates,
+        'rejected': rejected
+    }), 202
+
+@bp.route('/extract/batch/<int:id>')
+@login_required
+def extract_batch_status(id):
+    batch = ExtractionBatch.query.get_or_404(id)
+    if batch.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(batch_progress(batch))
+
+@bp.route('/tracked-products', methods=['POST'])
+@login_required
+def add_tracked_product():
+    """Додає товар до регулярного оновлення: JSON {"url": ..., "refresh_interval": секунди}"""
+    data = request.get_json(silent=True) or {}
+    url = data.get('url')
+    if not url:
+        return jsonify({'error': 'URL не вказано'}), 400
+    accepted, rejected, _ = prepare_batch_urls([url])
+    if not accepted:
+        return jsonify({'error': rejected[0]['error']}), 400
+
+    try:
+        refresh_interval = int(data.get('refresh_interval') or current_app.config['TRACKING_DEFAULT_INTERVAL'])
+    except (TypeError, ValueError):
+        return jsonify({'error': 'refresh_interval має бути цілим числом секунд'}), 400
+    min_interval = current_app.config['TRACKING_MIN_INTERVAL']
+    if refresh_interval < min_interval:
+        return jsonify({'error': f'Мінімальний інтервал оновлення {min_interval} с'}), 400
+
+    url, platform = accepted[0]
+    product = track_product(current_user, url, platform, refresh_interval)
+    db.session.commit()
+    return jsonify(product.to_dict()), 201
+
+@bp.route('/tracked-products')
+@login_required
+def list_tracked_products():
+    products = TrackedProduct.query.filter_by(user_id=current_user.id, active=True) \
+        .order_by(TrackedProduct.next_due_at).all()
+    return jsonify([product.to_dict() for product in products])
+
+@bp.route('/tracked-products/<int:id>', methods=['DELETE'])
+@login_required
+def delete_tracked_product(id):
+    product = TrackedProduct.query.get_or_404(id)
+    if product.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    db.session.delete(product)
+    db.session.commit()
+    return jsonify({'status': 'success'})
+
+@bp.route('/extraction/<int:id>/status')
+@login_required
+def extraction_status(id):
+    extraction = Extraction.query.get_or_404(id)
+    if extraction.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    return jsonify({
+        'extraction_id': extraction.id,
+        'status': extraction.status,
+        'mode': extraction.mode,
+        'reviews_count': extraction.reviews.count() if extraction.status == 'completed' else 0,
+        'error_message': extraction.error_message,
+        'created_at': extraction.created_at.isoformat() if extraction.created_at else None,
+        'started_at': extraction.started_at.isoformat() if extraction.started_at else None,
+        'completed_at': extraction.completed_at.isoformat() if extraction.completed_at else None
+    })
+
+@bp.route('/extraction/<int:id>/cancel', methods=['POST'])
+@login_required
+def cancel_extraction_job(id):
+    extraction = Extraction.query.get_or_404(id)
+    if extraction.user_id != current_user.id:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    if not cancel_extraction(extraction):
+        return jsonify({'error': f'Витяг вже має статус {extraction.status}'}), 409
+    
+    return jsonify({'status': extraction.status, 'extraction_id': extraction.id})
+
 @bp.route('/extractions')
 @login_required
 def list_extractions():
@@ -143,25 +210,51 @@ def export_extraction(id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     format = request.args.get('format', 'json')
-    reviews = [review.to_dict() for review in extraction.reviews]
+    if format not in EXPORT_FORMATS:
+        return jsonify({'error': 'Unsupported format'}), 400
+    compress = request.args.get('compress') == 'gzip'
     
-    if format == 'json':
-        return jsonify(reviews)
-    elif format == 'csv':
-        import csv
-        from io import StringIO
-        
-        output = StringIO()
-        writer = csv.DictWriter(output, fieldnames=reviews[0].keys())
-        writer.writeheader()
-        writer.writerows(reviews)
-        
-        return output.getvalue(), 200, {
-            'Content-Type': 'text/csv',
-            'Content-Disposition': f'attachment; filename=reviews_{extraction.id}.csv'
-        }
-    else:
+    # Відгуки читаються порціями під час віддачі відповіді
+    rows = iter_extraction_reviews(extraction.id)
+    mimetype, headers = export_headers(format, f'reviews_{extraction.id}', compress)
+    return Response(stream_with_context(export_stream(rows, format, compress)),
+                    mimetype=mimetype, headers=headers)
+
+@bp.route('/api/extractions/export')
+@login_required
+def export_extractions():
+    """Експорт відгуків з усіх витягів користувача з фільтрами та курсором для продовження"""
+    format = request.args.get('format', 'ndjson')
+    if format not in BULK_EXPORT_FORMATS:
         return jsonify({'error': 'Unsupported format'}), 400
+    compress = request.args.get('compress') == 'gzip'
+    
+    filters = []
+    try:
+        if request.args.get('date_from'):
+            filters.append(Extraction.created_at >= datetime.strptime(request.args['date_from'], '%Y-%m-%d'))
+        if request.args.get('date_to'):
+            # Кінцева дата включно
+            date_to = datetime.strptime(request.args['date_to'], '%Y-%m-%d') + timedelta(days=1)
+            filters.append(Extraction.created_at < date_to)
+    except ValueError:
+        return jsonify({'error': 'Дати мають бути у форматі YYYY-MM-DD'}), 400
+    if request.args.get('platform'):
+        filters.append(Extraction.platform == request.args['platform'])
+    if request.args.get('status'):
+        filters.append(Extraction.status.in_(request.args['status'].split(',')))
+    
+    cursor = None
+    if request.args.get('cursor'):
+        try:
+            cursor = decode_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    rows = iter_user_reviews(current_user.id, filters, cursor)
+    mimetype, headers = export_headers(format, 'reviews_export', compress)
+    return Response(stream_with_context(export_stream(rows, format, compress, BULK_EXPORT_COLUMNS)),
+                    mimetype=mimetype, headers=headers)
 
 @bp.route('/extraction/<int:extraction_id>/summary')
 @login_required
@@ -173,59 +266,12 @@ def get_summary(extraction_id):
         if extraction.user_id != current_user.id:
             abort(403)
         
-        # Отримуємо всі відгуки
-        reviews = Review.query.filter_by(extraction_id=extraction_id).all()
-        
-        if not reviews:
+        # Збережений підсумок віддається одразу, поки набір відгуків не змінився;
+        # ?refresh=1 змушує згенерувати його заново
+        result = summaries.get_summary(extraction, refresh=request.args.get('refresh') == '1')
+        if result is None:
             return jsonify({'error': 'Відгуки не знайдено'}), 404
         
-        # Підготовка даних для ШІ
-        reviews_text = "\n\n".join([
-            f"Відгук від {review.author}:\n"
-            f"Рейтинг: {review.rating}\n"
-            f"Текст: {review.text}"
-            for review in reviews
-        ])
-        
-        # Створюємо промт для ШІ
-        prompt = f"""Проаналізуй наступні відгуки про товар "{extraction.title}" та надай:
-1. Загальний підсумок у 2-3 реченнях
-2. Список основних переваг (максимум 5)
-3. Список основних недоліків (максимум 5)
-
-Відгуки:
-{reviews_text}
-
-Поверни результат у форматі JSON:
-{{
-    "summary": "загальний підсумок",
-    "pros": ["перевага 1", "перевага 2", ...],
-    "cons": ["недолік 1", "недолік 2", ...]
-}}"""
-
-        # Використовуємо той самий ШІ сервіс для аналізу
-        ai_helper = AIHelper()
-        response = ai_helper._make_request_with_retry(prompt)
-        
-        try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
-            # Якщо відповідь не в JSON форматі, шукаємо JSON в тексті
-            json_start = response.find('{')
-            json_end = response.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                result = json.loads(response[json_start:json_end])
-            else:
-                return jsonify({'error': 'Неправильний формат відповіді від ШІ'}), 500
-        
-        # Додаємо середній рейтинг
-        ratings = [review.rating for review in reviews if review.rating is not None]
-        if ratings:
-            average_rating = sum(ratings) / len(ratings)
-        else:
-            average_rating = 0
-        result['average_rating'] = average_rating
-        
         return jsonify(result)
         
     except Exception as e:
@@ -242,12 +288,17 @@ def delete_extraction(id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        # Видаляємо всі пов'язані відгуки
+        # Видаляємо всі пов'язані відгуки та підсумок
         Review.query.filter_by(extraction_id=id).delete()
+        summaries.delete_summary(id)
+        snapshot_files = delete_snapshots(id)
+        TrackedProduct.query.filter_by(last_extraction_id=id).update({'last_extraction_id': None})
         
         # Видаляємо сам витяг
         db.session.delete(extraction)
         db.session.commit()
+        # Файли знімків - лише після коміту і лише ті, на які більше ніхто не посилається
+        delete_unreferenced_files(snapshot_files)
         
         return jsonify({'status': 'success'})
     except Exception as e:
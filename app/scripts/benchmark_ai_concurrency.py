@@ -0,0 +1,49 @@
+import argparse
+import threading
+import time
+
+from config import Config
+from app import create_app
+from app.services.ai_cache import AIResponseCache
+from app.services.ai_helper import AIHelper
+from app.scripts.stub_ai_server import serve
+
+def benchmark(prompts_count, latency, concurrency, port):
+    """Порівнює послідовні запити до заглушки ШІ з паралельними через асинхронний клієнт"""
+    server, state = serve('127.0.0.1', port, latency, 0.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+    app = create_app(BenchmarkConfig)
+    app.logger.setLevel('WARNING')
+    with app.app_context():
+        # Кеш вимкнено, щоб кожен промпт справді йшов до сервісу
+        ai_helper = AIHelper(base_url=f'http://127.0.0.1:{port}/', cache=AIResponseCache(enabled=False))
+        prompts = [f'Промпт номер {i}' for i in range(prompts_count)]
+
+        started = time.perf_counter()
+        for prompt in prompts:
+            ai_helper._make_request_with_retry(prompt)
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        responses = ai_helper.request_many(prompts, max_concurrency=concurrency)
+        concurrent = time.perf_counter() - started
+
+    server.shutdown()
+    failed = sum(isinstance(response, Exception) for response in responses)
+    print(f"Промптів: {prompts_count}, затримка сервісу: {latency} с, паралельність: {concurrency}")
+    print(f"Послідовно:  {sequential:6.2f} с")
+    print(f"Паралельно:  {concurrent:6.2f} с (помилок: {failed})")
+    print(f"Прискорення: {sequential / concurrent:.1f}x, з'єднань до заглушки: {state.snapshot()['connections']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Бенчмарк паралельних запитів до ШІ сервісу')
+    parser.add_argument('--prompts', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.5, help='Затримка відповіді заглушки, секунди')
+    parser.add_argument('--concurrency', type=int, default=Config.AI_MAX_CONCURRENCY)
+    parser.add_argument('--port', type=int, default=5501)
+    args = parser.parse_args()
+    benchmark(args.prompts, args.latency, args.concurrency, args.port)
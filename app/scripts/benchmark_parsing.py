@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from config import Config
+from app import create_app
+from app.services.extraction_plan import ExtractionPlan
+from app.services.parse_engines import SoupEngine, LxmlEngine, parser_name
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'configs', 'platforms')
+# Збережені сторінки для перевірки збігу рушіїв: <домен>--<назва>.html
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'parsing')
+
+# Домен сторінки -> файл конфігурації платформи
+PLATFORM_CONFIGS = {
+    'prom.ua': 'prom.json',
+    'rozetka.com.ua': 'rozetka.json'
+}
+
+def load_config(domain):
+    """Завантажує конфігурацію платформи з app/configs/platforms"""
+    with open(os.path.join(CONFIGS_DIR, PLATFORM_CONFIGS[domain]), encoding='utf-8') as f:
+        return json.load(f)
+
+def make_prom_page(count, seed=1):
+    """Генерує сторінку відгуків у розмітці Prom"""
+    rnd = random.Random(seed)
+    items = []
+    for i in range(count):
+        pros = f"<div data-qaid='pros'>Зручний &amp; легкий {i}</div>" if i % 3 == 0 else ""
+        cons = f"<div data-qaid='cons'>Ціна&nbsp;{i}</div>" if i % 4 == 0 else ""
+        items.append(f"""<div data-qaid="opinion_item" data-qaopinionid="{1000 + i}">
+  <span data-qaid="author_name"> Покупець {i} </span>
+  <time data-qaid="date_created">{i % 28 + 1} січня 2025</time>
+  <svg data-qaid="count_stars" data-qaid-raiting="{rnd.choice([20, 40, 60, 80, 100])}"></svg>
+  <span data-qaid="title">Відгук <b>номер</b> {i}<!-- коментар --></span>
+  <div data-qaid="opinion_text"><p>Текст {i}</p><script>var x = {i};</script> хвіст</div>
+  {pros}{cons}
+  <span data-qaid="prom_label_text">Придбано на Prom.ua</span>
+</div>""")
+    return f"""<!DOCTYPE html><html><head><title>Prom</title><script>window.__data = {{}};</script></head>
+<body><h1 data-qaid="page_title"> Товар <span>Prom</span> </h1>
+<div data-qaid="opinion_list">{''.join(items)}</div></body></html>"""
+
+def make_rozetka_page(count, seed=2):
+    """Генерує сторінку відгуків у розмітці Rozetka"""
+    rnd = random.Random(seed)
+    items = []
+    for i in range(count):
+        width = rnd.choice([20, 40, 60, 80, 100])
+        items.append(f"""<li class="product-comments__list-item"><div class="comment__inner">
+<div data-testid="replay-header-author">Автор {i}</div>
+<time data-testid="replay-header-date">{i % 28 + 1} травня 2025</time>
+<div data-testid="stars-rating" class="stars__rating" style="width: calc({width}% - 2px);"></div>
+<div class="comment__body-wrapper"><p>Текст відгуку {i}</p><p>Другий абзац</p></div>
+<dl class="comment__essentials"><dt>Переваги</dt><dd>Плюс {i}</dd><dt>Недоліки</dt><dd>Мінус {i}</dd></dl>
+<div class="comment__vars">Колір: <span>синій</span></div>
+</div></li>""")
+    # Великий блок скриптів і стилів, як на реальних сторінках Rozetka
+    noise = '<script>' + 'var state = {"k": 1};' * 2000 + '</script><style>.a{color:red}</style>'
+    return f"""<!DOCTYPE html><html><head>{noise}</head><body>
+<h1 class="product__title">Товар Rozetka</h1>
+<ul class="product-comments__list">{''.join(items)}</ul></body></html>"""
+
+def fixture_pages(directory=FIXTURES_DIR):
+    """Повертає (домен, назва, html) для всіх збережених сторінок каталогу fixtures"""
+    pages = []
+    if not os.path.isdir(directory):
+        return pages
+    for name in sorted(os.listdir(directory)):
+        domain, sep, _ = name.partition('--')
+        if not sep or not name.endswith('.html') or domain not in PLATFORM_CONFIGS:
+            continue
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            pages.append((domain, name, f.read()))
+    return pages
+
+def load_pages(page_args, reviews):
+    """Повертає список (домен, назва, html): збережені сторінки fixtures, --page та згенеровані"""
+    pages = fixture_pages()
+    for arg in page_args or []:
+        domain, path = arg.split('=', 1)
+        with open(path, encoding='utf-8') as f:
+            pages.append((domain, os.path.basename(path), f.read()))
+    pages += [
+        ('prom.ua', f'prom-synthetic-{reviews}', make_prom_page(reviews)),
+        ('rozetka.com.ua', f'rozetka-synthetic-{reviews}', make_rozetka_page(reviews))
+    ]
+    return pages
+
+def save_page(arg):
+    """Зберігає сторінку товару в fixtures: DOMAIN=URL, назва файлу - з останнього сегмента шляху"""
+    from urllib.parse import urlparse
+    from app.services.browser_fetcher import fetch_html_with_js
+    from app.services.extractor import review_item_selector
+
+    domain, url = arg.split('=', 1)
+    if domain not in PLATFORM_CONFIGS:
+        raise SystemExit(f'Невідома платформа {domain}, доступні: {", ".join(PLATFORM_CONFIGS)}')
+    html = fetch_html_with_js(url, wait_selector=review_item_selector(url))
+    slug = [part for part in urlparse(url).path.split('/') if part][-1:] or ['index']
+    path = os.path.join(FIXTURES_DIR, f'{domain}--{slug[0]}.html')
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Збережено {url} -> {path}")
+
+def best_time(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def benchmark(pages, rounds):
+    """Порівнює результати та швидкість рушіїв BeautifulSoup і lxml на одних сторінках"""
+    mismatches = 0
+    for domain, name, html in pages:
+        config = load_config(domain)
+        soup_plan = ExtractionPlan(domain, config, engine=SoupEngine(parser_name(config)))
+        lxml_plan = ExtractionPlan(domain, config, engine=LxmlEngine())
+
+        soup_result = soup_plan.extract(html)
+        lxml_result = lxml_plan.extract(html)
+        same = soup_result == lxml_result
+        if not same:
+            mismatches += 1
+            for soup_review, lxml_review in zip(soup_result['reviews'], lxml_result['reviews']):
+                if soup_review != lxml_review:
+                    print(f"  beautifulsoup: {soup_review}\n  lxml:          {lxml_review}")
+                    break
+
+        soup_time = best_time(lambda: soup_plan.extract(html), rounds)
+        lxml_time = best_time(lambda: lxml_plan.extract(html), rounds)
+        print(f"{name:36s} {len(html) / 1024:8.0f} КБ, відгуків {len(soup_result['reviews']):5d}, "
+              f"збіг: {'так' if same else 'НІ'}, beautifulsoup {soup_time * 1000:8.1f} мс, "
+              f"lxml {lxml_time * 1000:8.1f} мс, прискорення {soup_time / lxml_time:.1f}x")
+    return mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Бенчмарк рушіїв парсингу сторінок відгуків')
+    parser.add_argument('--page', action='append', metavar='DOMAIN=PATH',
+                        help='Збережена сторінка, наприклад prom.ua=fixtures/prom.html (можна кілька)')
+    parser.add_argument('--save', action='append', metavar='DOMAIN=URL',
+                        help='Завантажити сторінку товару в браузері і зберегти її в fixtures/parsing')
+    parser.add_argument('--reviews', type=int, default=Config.MAX_PREMIUM_REVIEWS_PER_URL,
+                        help='Кількість відгуків на згенерованих сторінках')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+    app = create_app(BenchmarkConfig)
+    app.logger.setLevel('WARNING')
+    with app.app_context():
+        for arg in args.save or []:
+            save_page(arg)
+        mismatches = benchmark(load_pages(args.page, args.reviews), args.rounds)
+    sys.exit(1 if mismatches else 0)
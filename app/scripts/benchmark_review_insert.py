@@ -0,0 +1,79 @@
+import argparse
+import os
+import tempfile
+import time
+
+from config import Config
+from app import create_app, db
+from app.models.user import User
+from app.models.extraction import Extraction, Review
+from app.services.review_store import bulk_insert_reviews
+
+def make_reviews(count):
+    """Генерує тестові відгуки у форматі екстрактора"""
+    return [
+        {
+            'author': f'Автор {i}',
+            'text': f'Текст відгуку номер {i}. ' * 5,
+            'rating': i % 5 + 1,
+            'date': '12 січня 2025',
+            'advantages': 'Якість',
+            'disadvantages': 'Ціна',
+            'platform_review_id': str(100000 + i)
+        }
+        for i in range(count)
+    ]
+
+def insert_orm_loop(extraction_id, reviews):
+    """Попередній спосіб: ORM-об'єкт і db.session.add на кожен відгук"""
+    for review_data in reviews:
+        db.session.add(Review(
+            extraction_id=extraction_id,
+            author=review_data.get('author'),
+            text=review_data.get('text') or review_data.get('title'),
+            rating=review_data.get('rating'),
+            date=review_data.get('date'),
+            advantages=review_data.get('advantages'),
+            disadvantages=review_data.get('disadvantages'),
+            platform_review_id=review_data.get('platform_review_id')
+        ))
+
+def benchmark(reviews_per_extraction, rounds):
+    """Порівнює збереження відгуків циклом ORM та пакетною вставкою"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'benchmark.db')
+    
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+    
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        user = User(username='benchmark', email='benchmark@example.com')
+        db.session.add(user)
+        db.session.commit()
+        
+        reviews = make_reviews(reviews_per_extraction)
+        results = {}
+        for name, insert in (('orm_loop', insert_orm_loop), ('bulk_insert', bulk_insert_reviews)):
+            timings = []
+            for _ in range(rounds):
+                extraction = Extraction(url='https://prom.ua/ua/p1', platform='prom.ua', user_id=user.id)
+                db.session.add(extraction)
+                db.session.commit()
+                
+                started = time.perf_counter()
+                insert(extraction.id, reviews)
+                db.session.commit()
+                timings.append(time.perf_counter() - started)
+            results[name] = min(timings)
+            print(f"{name:12s}: {min(timings) * 1000:8.1f} мс (найкращий з {rounds}), "
+                  f"{reviews_per_extraction / min(timings):10.0f} відгуків/с")
+        
+        print(f"Прискорення: {results['orm_loop'] / results['bulk_insert']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Бенчмарк збереження відгуків')
+    parser.add_argument('--reviews', type=int, default=Config.MAX_PREMIUM_REVIEWS_PER_URL)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+    benchmark(args.reviews, args.rounds)
@@ -0,0 +1,68 @@
+import sys
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+
+from config import Config
+from app import create_app, db
+from app.models.user import User
+from app.models.extraction import Extraction, Review
+
+class QueryPlanConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+def explain(statement):
+    """Повертає рядки EXPLAIN QUERY PLAN для SQLAlchemy запиту"""
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return [row[-1] for row in rows]
+
+def hot_queries(user_id, extraction_id):
+    """Запити з маршрутів і моделей, які мають іти через індекси"""
+    start_of_month = datetime.utcnow().replace(day=1)
+    return {
+        'User.get_remaining_urls / dashboard': db.session.query(func.count(Extraction.id)).filter(
+            Extraction.user_id == user_id,
+            Extraction.created_at >= start_of_month
+        ).statement,
+        'list_extractions': Extraction.query.filter(
+            Extraction.user_id == user_id
+        ).order_by(Extraction.created_at.desc()).statement,
+        'get_summary / view_extraction': Review.query.filter_by(
+            extraction_id=extraction_id
+        ).order_by(Review.id).statement,
+        'delete_extraction': delete(Review).where(Review.extraction_id == extraction_id),
+        'export keyset (reviews)': select(Review.id).where(
+            Review.extraction_id == extraction_id,
+            Review.id > 0
+        ).order_by(Review.id).limit(1000),
+    }
+
+def check_query_plans():
+    """Перевіряє, що гарячі запити не сканують таблиці extraction і review повністю"""
+    app = create_app(QueryPlanConfig)
+    failures = []
+    with app.app_context():
+        db.create_all()
+        user = User(username='plan', email='plan@example.com')
+        db.session.add(user)
+        db.session.commit()
+        
+        for name, statement in hot_queries(user.id, 1).items():
+            plan = explain(statement)
+            full_scan = [step for step in plan if step.startswith('SCAN') and 'INDEX' not in step]
+            temp_sort = [step for step in plan if 'TEMP B-TREE' in step]
+            status = 'OK' if not full_scan and not temp_sort else 'FAIL'
+            print(f"[{status}] {name}: {' | '.join(plan)}")
+            if status == 'FAIL':
+                failures.append(name)
+    
+    return failures
+
+if __name__ == "__main__":
+    failures = check_query_plans()
+    if failures:
+        print(f"Запити без індексу: {', '.join(failures)}")
+        sys.exit(1)
+    print("Усі гарячі запити використовують індекси")
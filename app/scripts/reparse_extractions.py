@@ -0,0 +1,33 @@
+import argparse
+import logging
+
+from app import create_app
+from app.services.reparse import reparse_extractions
+
+def main():
+    """Повторно парсить збережені знімки витягів після зміни селекторів платформи"""
+    parser = argparse.ArgumentParser(description='Повторний парсинг збережених сторінок витягів')
+    parser.add_argument('--platform', help='Домен платформи, наприклад prom.ua')
+    parser.add_argument('--ids', type=int, nargs='+', help='Id витягів')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Кількість процесів (за замовчуванням REPARSE_WORKERS)')
+    parser.add_argument('--dry-run', action='store_true', help='Лише порахувати зміни, не зберігаючи їх')
+    args = parser.parse_args()
+    if not args.platform and not args.ids:
+        parser.error('вкажіть --platform або --ids')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    app = create_app()
+    with app.app_context():
+        report = reparse_extractions(args.platform, args.ids, workers=args.workers, dry_run=args.dry_run)
+
+    print(f"Витягів: {report['extractions']}, сторінок: {report['pages']} за {report['elapsed']} с "
+          f"({report['pages_per_second']} стор/с)")
+    print(f"Додано: {report['inserted']}, оновлено: {report['updated']}, видалено: {report['deleted']}, "
+          f"без змін: {report['unchanged']}, пропущено: {report['skipped']}, помилок: {report['failed']}"
+          + (' (без збереження)' if report['dry_run'] else ''))
+    for domain, error in report['parity_errors'].items():
+        print(f"Заблоковано {domain}: {error}")
+
+if __name__ == "__main__":
+    main()
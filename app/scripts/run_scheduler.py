@@ -0,0 +1,12 @@
+import logging
+
+from app import create_app
+from app.services.scheduler import scheduler_loop
+
+def main():
+    """Запускає планувальник, який ставить у чергу оновлення відстежуваних товарів"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(message)s')
+    scheduler_loop(create_app())
+
+if __name__ == "__main__":
+    main()
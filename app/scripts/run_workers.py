@@ -0,0 +1,17 @@
+import argparse
+import logging
+
+from app.services.jobs import run_workers
+
+def main():
+    """Запускає пул воркерів, які виконують витяги з черги"""
+    parser = argparse.ArgumentParser(description='Воркери черги витягів')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Кількість процесів (за замовчуванням EXTRACTION_WORKERS)')
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(message)s')
+    run_workers(args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubState:
+    """Лічильники заглушки: скільки прийнято з'єднань і запитів"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {'connections': self.connections, 'requests': self.requests}
+
+def make_handler(state, latency, fail_rate, response_body):
+    class StubAIHandler(BaseHTTPRequestHandler):
+        # HTTP/1.1, щоб клієнт міг тримати keep-alive з'єднання
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def _send(self, status, body):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            # GET /stats - лічильники для перевірки повторного використання з'єднань
+            self._send(200, json.dumps(state.snapshot()))
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            prompt = self.rfile.read(length)
+            with state.lock:
+                state.requests += 1
+            if latency:
+                time.sleep(latency)
+            if fail_rate and random.random() < fail_rate:
+                self._send(503, 'Service temporarily unavailable')
+                return
+            self._send(200, response_body or json.dumps({'stub': True, 'prompt_bytes': len(prompt)}))
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubAIHandler
+
+def serve(host, port, latency, fail_rate, response_body=None):
+    """Запускає заглушку ШІ сервісу з тим самим інтерфейсом, що й локальний сервіс"""
+    state = StubState()
+    server = ThreadingHTTPServer((host, port), make_handler(state, latency, fail_rate, response_body))
+    server.daemon_threads = True
+    return server, state
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Локальна заглушка ШІ сервісу для тестів і бенчмарків')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5500)
+    parser.add_argument('--latency', type=float, default=0.0, help='Затримка відповіді, секунди')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Частка відповідей 503 (0..1)')
+    parser.add_argument('--response-file', help='Файл з тілом відповіді замість стандартного JSON')
+    args = parser.parse_args()
+
+    body = None
+    if args.response_file:
+        with open(args.response_file, encoding='utf-8') as f:
+            body = f.read()
+
+    server, _ = serve(args.host, args.port, args.latency, args.fail_rate, body)
+    print(f"Заглушка ШІ сервісу слухає http://{args.host}:{args.port}/ (затримка {args.latency} с)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
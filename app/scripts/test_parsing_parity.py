@@ -0,0 +1,42 @@
+from config import Config
+from app import create_app
+from app.config.rozetka import ROZETKA_CONFIG
+from app.models.platform import Platform
+from app.scripts.benchmark_parsing import fixture_pages, load_config
+from app.services.extraction_plan import ExtractionPlan
+from app.services.extractor import parse_rozetka_reviews
+from app.services.reparse import parity_error
+from app.services.review_store import review_mapping
+
+
+class ParityConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+def stored_rows(reviews):
+    """Поля відгуків, які потрапляють у таблицю review"""
+    return [review_mapping(None, review) for review in reviews]
+
+
+def test_rozetka_plan_matches_live_parser():
+    """План витягу з будь-якою конфігурацією Rozetka повертає ті самі відгуки, що й живий парсер"""
+    app = create_app(ParityConfig)
+    configs = {
+        'extractor': ROZETKA_CONFIG,
+        'platform': Platform.get_default_config()['rozetka'],
+        'json': load_config('rozetka.com.ua')
+    }
+    pages = [(name, html) for domain, name, html in fixture_pages() if domain == 'rozetka.com.ua']
+    assert pages
+
+    with app.app_context():
+        for name, html in pages:
+            live = parse_rozetka_reviews(html)
+            assert any(row['rating'] for row in stored_rows(live)), name
+            assert any(row['advantages'] for row in stored_rows(live)), name
+            for config_name, config in configs.items():
+                plan = ExtractionPlan('rozetka.com.ua', config)
+                assert plan.extract_reviews(plan.engine.parse(html)) == live, (name, config_name)
+
+        for config_name, config in configs.items():
+            assert parity_error('rozetka.com.ua', ExtractionPlan('rozetka.com.ua', config)) is None, config_name
@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from config import Config
+from app.services.ai_cache import ai_response_cache, cache_key
+from app.services.ai_helper import ai_request_stats, validated_json_text
+from app.services.http_client import backoff_delay
+from app.services.retry_policy import classify_error
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAIClient:
+    """Асинхронний клієнт ШІ сервісу на httpx з обмеженням одночасних запитів.
+
+    Поводиться так само, як AIHelper._make_request_with_retry: кеш відповідей,
+    повтори з експоненційною затримкою, перевірка JSON і спільні лічильники,
+    але відправляє багато промптів паралельно, не більше max_concurrency одночасно.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:5500/", max_concurrency: int = None, max_retries: int = 5,
+                 retry_delay: float = None, max_retry_delay: float = None, timeout: float = 30, cache=None):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency or Config.AI_MAX_CONCURRENCY
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay if retry_delay is not None else Config.AI_RETRY_BASE_DELAY
+        self.max_retry_delay = max_retry_delay if max_retry_delay is not None else Config.AI_RETRY_MAX_DELAY
+        self.timeout = timeout
+        self.cache = cache or ai_response_cache
+        self.stats = ai_request_stats
+
+    async def _post_with_retry(self, client, prompt):
+        for attempt in range(1, self.max_retries + 1):
+            self.stats.record_attempt(retry=attempt > 1)
+            try:
+                response = await client.post(
+                    self.base_url,
+                    files={'file': ('prompt.txt', prompt.encode('utf-8'), 'text/plain')}
+                )
+                response.raise_for_status()
+                return validated_json_text(response.text.strip())
+            except (httpx.HTTPError, ValueError) as e:
+                logger.warning(f"Async request failed (attempt {attempt}/{self.max_retries}): {str(e)}")
+                if attempt == self.max_retries or not classify_error(e).retryable:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, self.retry_delay, self.max_retry_delay))
+
+    async def request(self, client, semaphore, prompt, bypass_cache=False):
+        """Відправляє один промпт, чекаючи на вільне місце в межах ліміту"""
+        key = cache_key(prompt, self.base_url)
+        if not bypass_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                response_text = await self._post_with_retry(client, prompt)
+            except Exception:
+                self.stats.record_call(time.monotonic() - started, failed=True)
+                raise
+            self.stats.record_call(time.monotonic() - started)
+        self.cache.set(key, response_text)
+        return response_text
+
+    async def request_many(self, prompts, bypass_cache=False, progress_callback=None):
+        """Відправляє всі промпти паралельно.
+
+        Повертає список у порядку промптів: текст відповіді або виняток для
+        промпту, який не вдалося обробити. progress_callback(done, total)
+        викликається після кожного завершеного промпту.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        total = len(prompts)
+        done = 0
+
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            async def run(prompt):
+                nonlocal done
+                try:
+                    return await self.request(client, semaphore, prompt, bypass_cache)
+                except Exception as e:
+                    return e
+                finally:
+                    done += 1
+                    if progress_callback:
+                        progress_callback(done, total)
+
+            return await asyncio.gather(*(run(prompt) for prompt in prompts))
+
+
+def run_sync(coroutine):
+    """Виконує корутину з синхронного коду (маршрути Flask, воркери)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Цикл подій уже працює в цьому потоці - запускаємо окремий у новому потоці
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
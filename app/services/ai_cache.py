@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ai_response (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ai_response_last_access ON ai_response (last_access);
+"""
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Нормалізує промпт, щоб однакові за змістом запити мали однаковий ключ"""
+    prompt = unicodedata.normalize('NFC', prompt)
+    lines = prompt.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(line.strip() for line in lines).strip()
+
+
+def cache_key(prompt: str, base_url: str) -> str:
+    """sha256 нормалізованого промпту разом з адресою (моделлю) ШІ сервісу"""
+    payload = f"{base_url}\n{normalize_prompt(prompt)}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+class AIResponseCache:
+    """Постійний кеш відповідей ШІ в окремому файлі SQLite.
+
+    Записи живуть ttl секунд; коли їх більше за max_entries, видаляються
+    ті, до яких найдовше не зверталися (LRU). Файл спільний для всіх
+    процесів, з'єднання відкривається окремо в кожному потоці.
+    """
+
+    def __init__(self, path: str = None, ttl: int = None, max_entries: int = None, enabled: bool = None):
+        self.path = path or Config.AI_CACHE_PATH
+        self.ttl = ttl if ttl is not None else Config.AI_CACHE_TTL
+        self.max_entries = max_entries if max_entries is not None else Config.AI_CACHE_MAX_ENTRIES
+        self.enabled = enabled if enabled is not None else Config.AI_CACHE_ENABLED
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, counter, value=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
+
+    def get(self, key: str):
+        """Повертає збережену відповідь або None, якщо її немає чи вона застаріла"""
+        if not self.enabled:
+            return None
+        conn = self._connection()
+        row = conn.execute('SELECT response, created_at FROM ai_response WHERE key = ?', (key,)).fetchone()
+        now = time.time()
+        if row is None:
+            self._count('_misses')
+            return None
+        if now - row[1] > self.ttl:
+            conn.execute('DELETE FROM ai_response WHERE key = ?', (key,))
+            self._count('_misses')
+            self._count('_expired')
+            return None
+        conn.execute('UPDATE ai_response SET last_access = ? WHERE key = ?', (now, key))
+        self._count('_hits')
+        return row[0]
+
+    def set(self, key: str, response: str):
+        """Зберігає відповідь і витісняє найстаріші записи понад ліміт"""
+        if not self.enabled:
+            return
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO ai_response (key, response, created_at, last_access) VALUES (?, ?, ?, ?)',
+            (key, response, now, now)
+        )
+        overflow = conn.execute('SELECT COUNT(*) FROM ai_response').fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                'DELETE FROM ai_response WHERE key IN '
+                '(SELECT key FROM ai_response ORDER BY last_access LIMIT ?)',
+                (overflow,)
+            )
+            self._count('_evictions', overflow)
+
+    def clear(self):
+        """Видаляє всі записи кешу"""
+        self._connection().execute('DELETE FROM ai_response')
+
+    def stats(self) -> dict:
+        """Повертає лічильники влучань і промахів поточного процесу та розмір кешу"""
+        entries = self._connection().execute('SELECT COUNT(*) FROM ai_response').fetchone()[0] if self.enabled else 0
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'expired': self._expired,
+                'evictions': self._evictions,
+                'hit_rate': round(self._hits / lookups, 3) if lookups else None
+            }
+
+
+ai_response_cache = AIResponseCache()
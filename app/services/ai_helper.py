@@ -4,30 +4,123 @@ from typing import Dict, Any, Optional, List
 import json
 import time
 import random
+import re
 from flask import current_app
 from io import StringIO
 import logging
 from bs4.element import Tag
+from config import Config
+from app.services.http_client import RequestStats, backoff_delay, get_shared_session
+from app.services.ai_cache import ai_response_cache, cache_key
+from app.services.retry_policy import classify_error
 
 logger = logging.getLogger(__name__)
 
+# Метрики запитів до ШІ сервісу, спільні для всіх екземплярів AIHelper процесу
+ai_request_stats = RequestStats()
+
+# Груба оцінка для кирилиці: у середньому близько 3 символів на токен
+CHARS_PER_TOKEN = 3
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?…])\s+')
+
+def validated_json_text(response_text: str) -> str:
+    """Повертає JSON з відповіді ШІ; ValueError, якщо відповідь порожня або без JSON"""
+    if not response_text:
+        raise ValueError("Empty response from AI service")
+        
+    # Перевіряємо чи це валідний JSON
+    try:
+        json.loads(response_text)
+        return response_text
+    except json.JSONDecodeError:
+        # Якщо не JSON, шукаємо JSON в тексті
+        start = response_text.find('{')
+        end = response_text.rfind('}') + 1
+        if start >= 0 and end > start:
+            json_str = response_text[start:end]
+            # Перевіряємо що це валідний JSON
+            json.loads(json_str)
+            return json_str
+        raise ValueError(f"Invalid JSON in response: {response_text[:200]}...")
+
+def estimate_tokens(text: str) -> int:
+    """Оцінює кількість токенів тексту без токенізатора моделі"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
 class AIHelper:
-    def __init__(self, base_url: str = "http://127.0.0.1:5500/", max_retries: int = 5, retry_delay: int = 5):
+    def __init__(self, base_url: str = "http://127.0.0.1:5500/", max_retries: int = 5, retry_delay: float = None,
+                 max_retry_delay: float = None, session: requests.Session = None, cache=None):
         self.base_url = base_url
         self.max_retries = max_retries
-        self.retry_delay = retry_delay
+        self.retry_delay = retry_delay if retry_delay is not None else Config.AI_RETRY_BASE_DELAY
+        self.max_retry_delay = max_retry_delay if max_retry_delay is not None else Config.AI_RETRY_MAX_DELAY
+        # Спільна сесія тримає keep-alive з'єднання між екземплярами та запитами
+        self.session = session or get_shared_session()
+        self.stats = ai_request_stats
+        self.cache = cache or ai_response_cache
         self.max_chunk_size = 2000
         self.logger = logging.getLogger(__name__)
 
-    def _make_request_with_retry(self, prompt):
-        """Відправляє запит до локального ШІ сервісу з повторними спробами"""
+    def get_stats(self) -> dict:
+        """Повертає лічильники викликів, повторів і затримок запитів до ШІ та кешу відповідей"""
+        stats = self.stats.snapshot()
+        stats['cache'] = self.cache.stats()
+        return stats
+
+    def request_many(self, prompts, bypass_cache: bool = False, progress_callback=None, max_concurrency: int = None):
+        """Синхронний фасад асинхронного клієнта: відправляє промпти паралельно.
+
+        Повертає список відповідей у порядку промптів; на місці промпту,
+        який не вдалося обробити, буде виняток.
+        """
+        from app.services.ai_async import AsyncAIClient, run_sync
+        client = AsyncAIClient(
+            base_url=self.base_url,
+            max_concurrency=max_concurrency,
+            max_retries=self.max_retries,
+            retry_delay=self.retry_delay,
+            max_retry_delay=self.max_retry_delay,
+            cache=self.cache
+        )
+        return run_sync(client.request_many(prompts, bypass_cache=bypass_cache, progress_callback=progress_callback))
+
+    def _sleep_before_retry(self, attempt):
+        delay = backoff_delay(attempt, self.retry_delay, self.max_retry_delay)
+        current_app.logger.debug(f"Повторна спроба через {delay:.2f} с")
+        time.sleep(delay)
+
+    def _make_request_with_retry(self, prompt, bypass_cache: bool = False):
+        """Відправляє запит до локального ШІ сервісу з повторними спробами.
+
+        Відповідь на ідентичний промпт береться з кешу, якщо не вказано bypass_cache.
+        """
+        key = cache_key(prompt, self.base_url)
+        if not bypass_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                current_app.logger.debug("AI response served from cache")
+                return cached
+
+        started = time.monotonic()
+        try:
+            response_text = self._request_with_retry(prompt)
+        except Exception:
+            self.stats.record_call(time.monotonic() - started, failed=True)
+            raise
+        self.stats.record_call(time.monotonic() - started)
+        self.cache.set(key, response_text)
+        return response_text
+
+    def _request_with_retry(self, prompt):
         for attempt in range(1, self.max_retries + 1):
+            self.stats.record_attempt(retry=attempt > 1)
             try:
                 # Створюємо файл з текстом промпту
                 files = {
                     'file': ('prompt.txt', prompt, 'text/plain')
                 }
-                response = requests.post(
+                response = self.session.post(
                     self.base_url,
                     files=files,
                     timeout=30
@@ -40,38 +133,23 @@ class AIHelper:
                 # Логуємо відповідь для дебагу
                 current_app.logger.debug(f"AI response: {response_text[:200]}...")
                 
-                if not response_text:
-                    raise ValueError("Empty response from AI service")
-                    
-                # Перевіряємо чи це валідний JSON
-                try:
-                    json.loads(response_text)
-                    return response_text
-                except json.JSONDecodeError:
-                    # Якщо не JSON, шукаємо JSON в тексті
-                    start = response_text.find('{')
-                    end = response_text.rfind('}') + 1
-                    if start >= 0 and end > start:
-                        json_str = response_text[start:end]
-                        # Перевіряємо що це валідний JSON
-                        json.loads(json_str)
-                        return json_str
-                    raise ValueError(f"Invalid JSON in response: {response_text[:200]}...")
+                return validated_json_text(response_text)
                     
             except requests.RequestException as e:
                 current_app.logger.warning(
                     f"Request failed (attempt {attempt}/{self.max_retries}): {str(e)}"
                 )
-                if attempt == self.max_retries:
+                # Відповідь 4xx (крім 408/429) повтором не виправити
+                if attempt == self.max_retries or not classify_error(e).retryable:
                     raise
-                time.sleep(self.retry_delay)
+                self._sleep_before_retry(attempt)
             except (ValueError, json.JSONDecodeError) as e:
                 current_app.logger.error(f"Error processing response: {str(e)}")
                 if attempt == self.max_retries:
                     raise
-                time.sleep(self.retry_delay)
+                self._sleep_before_retry(attempt)
 
-    def analyze_title_block(self, html_content: str) -> str:
+    def analyze_title_block(self, html_content: str, bypass_cache: bool = False) -> str:
         """Аналізує HTML блок з назвою товару та повертає селектор"""
         try:
             prompt = f"""Проаналізуй HTML код блоку з назвою товару та поверни CSS селектор.
@@ -81,7 +159,7 @@ class AIHelper:
             
             Поверни тільки селектор без пояснень."""
             
-            response = self._make_request_with_retry(prompt)
+            response = self._make_request_with_retry(prompt, bypass_cache=bypass_cache)
             
             # Видаляємо можливі markdown-теги для коду та зайві пробіли
             response = response.replace('```css', '').replace('```', '').strip()
@@ -93,7 +171,7 @@ class AIHelper:
             self.logger.error(f"Помилка при аналізі заголовку: {str(e)}")
             raise
 
-    def analyze_review_block(self, html_content):
+    def analyze_review_block(self, html_content, bypass_cache: bool = False):
         """Аналізує HTML блок відгуку та повертає структуру селекторів"""
         try:
             prompt = f"""Проаналізуй HTML блок відгуку та поверни конфігурацію для парсингу в форматі JSON.
@@ -161,7 +239,7 @@ class AIHelper:
             
             Поверни тільки JSON без пояснень."""
 
-            response = self._make_request_with_retry(prompt)
+            response = self._make_request_with_retry(prompt, bypass_cache=bypass_cache)
             if not response:
                 raise Exception("Не вдалося отримати відповідь від AI")
             
@@ -261,27 +339,63 @@ class AIHelper:
         from urllib.parse import urlparse
         return urlparse(url).netloc.split('.')[-2]
 
-    def _split_text(self, text: str) -> list:
-        """Розбиває текст на менші частини, зберігаючи цілісність речень"""
-        if len(text) <= self.max_chunk_size:
+    def _split_text(self, text: str, max_tokens: int = None, separator: str = '\n') -> list:
+        """Розбиває текст на частини в межах бюджету токенів, зберігаючи цілісність блоків.
+
+        Текст ділиться за separator (рядки, або відгуки при separator='\n\n'),
+        і блоки набираються в частину, поки не вичерпано бюджет. Блок, який
+        сам більший за бюджет, ріжеться по реченнях, а в крайньому разі - по словах.
+        """
+        max_tokens = max_tokens or self.max_chunk_size // CHARS_PER_TOKEN
+        if estimate_tokens(text) <= max_tokens:
             return [text]
 
+        separator_tokens = estimate_tokens(separator)
         chunks = []
-        current_chunk = ""
-        sentences = text.split('\n')
+        current = []
+        current_tokens = 0
 
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) + 1 <= self.max_chunk_size:
-                current_chunk += sentence + '\n'
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + '\n'
+        for block in text.split(separator):
+            for piece in self._split_oversized(block, max_tokens):
+                piece_tokens = estimate_tokens(piece)
+                if current and current_tokens + separator_tokens + piece_tokens > max_tokens:
+                    chunks.append(separator.join(current).strip())
+                    current = []
+                    current_tokens = 0
+                current.append(piece)
+                current_tokens += piece_tokens + separator_tokens
 
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current:
+            chunks.append(separator.join(current).strip())
 
-        return chunks
+        return [chunk for chunk in chunks if chunk]
+
+    def _split_oversized(self, block: str, max_tokens: int) -> list:
+        """Ділить завеликий блок по реченнях, а речення, що не влазять, - по словах"""
+        if estimate_tokens(block) <= max_tokens:
+            return [block]
+
+        max_chars = max_tokens * CHARS_PER_TOKEN
+        pieces = []
+        for sentence in SENTENCE_BOUNDARY.split(block):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+                continue
+            words = []
+            length = 0
+            for word in sentence.split():
+                # Слово довше за бюджет ріжемо на шматки фіксованої довжини
+                for start in range(0, len(word), max_chars - 1):
+                    part = word[start:start + max_chars - 1]
+                    if words and length + len(part) + 1 > max_chars - CHARS_PER_TOKEN:
+                        pieces.append(' '.join(words))
+                        words = []
+                        length = 0
+                    words.append(part)
+                    length += len(part) + 1
+            if words:
+                pieces.append(' '.join(words))
+        return pieces
 
     def _combine_responses(self, responses: List[str]) -> str:
         """Комбінує відповіді від різних чанків"""
@@ -775,7 +889,7 @@ HTML код:
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
             }
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             return response.text
         except Exception as e:
@@ -936,7 +1050,8 @@ HTML код:
             
         return ' > '.join(reversed(parents))
 
-    def generate_platform_config_from_examples(self, url: str, title_example: str = None, review_example: str = None) -> dict:
+    def generate_platform_config_from_examples(self, url: str, title_example: str = None, review_example: str = None,
+                                               bypass_cache: bool = False) -> dict:
         """Генерує конфігурацію на основі прикладів HTML блоків"""
         try:
             prompt = f"""Проаналізуй HTML блоки та поверни конфігурацію для парсингу в форматі JSON.
@@ -1010,7 +1125,7 @@ HTML код:
             
             Поверни тільки JSON без пояснень."""
 
-            response = self._make_request_with_retry(prompt)
+            response = self._make_request_with_retry(prompt, bypass_cache=bypass_cache)
             if not response:
                 raise Exception("Не вдалося отримати відповідь від AI")
             
@@ -0,0 +1,121 @@
+import re
+from datetime import datetime
+from urllib.parse import urlparse, urlunparse
+
+from sqlalchemy import func, select
+
+from app import db
+from app.models.extraction import Extraction, Review
+from app.services.extraction_plan import normalize_domain
+from app.services.extractor import ReviewExtractor
+
+URL_PATTERN = re.compile(r'https?://[^\s,;"\'<>]+', re.IGNORECASE)
+
+# Статуси, після яких URL пакета вважається обробленим
+FINISHED_STATUSES = ('completed', 'error', 'cancelled')
+
+
+def parse_url_list(text):
+    """Витягує URL зі списку, CSV чи довільного тексту, по одному на збіг"""
+    return URL_PATTERN.findall(text or '')
+
+
+def dedupe_key(url):
+    """Ключ для пошуку дублікатів: без www., фрагмента і завершального слеша"""
+    parsed = urlparse(url)
+    netloc = parsed.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    return (netloc, parsed.path.rstrip('/'), parsed.query)
+
+
+def prepare_batch_urls(urls):
+    """Перевіряє та дедуплікує URL пакета.
+
+    Повертає (прийняті URL з платформою, відхилені URL з причиною, кількість дублікатів).
+    Платформа - домен без www. (prom.ua), як у збережених витягах і товарах.
+    Порядок прийнятих URL відповідає порядку подання.
+    """
+    detector = ReviewExtractor()
+    accepted = []
+    rejected = []
+    seen = set()
+    duplicates = 0
+    for url in urls:
+        url = url.strip()
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+            rejected.append({'url': url, 'error': 'Неправильний URL'})
+            continue
+        if detector.detect_platform(parsed.netloc.lower()) == 'unknown':
+            rejected.append({'url': url, 'error': 'Платформа не підтримується'})
+            continue
+        key = dedupe_key(url)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        url = urlunparse(parsed._replace(netloc=parsed.netloc.lower(), fragment=''))
+        accepted.append((url, normalize_domain(url)))
+    return accepted, rejected, duplicates
+
+
+def batch_progress(batch):
+    """Стан кожного URL пакета та загальна пропускна здатність"""
+    rows = db.session.execute(
+        select(
+            Extraction.id, Extraction.url, Extraction.status, Extraction.error_message,
+            Extraction.started_at, Extraction.completed_at, func.count(Review.id)
+        )
+        .outerjoin(Review, Review.extraction_id == Extraction.id)
+        .where(Extraction.batch_id == batch.id)
+        .group_by(Extraction.id)
+        .order_by(Extraction.id)
+    ).all()
+
+    items = []
+    counts = {}
+    reviews_total = 0
+    durations = []
+    for extraction_id, url, status, error_message, started_at, completed_at, reviews_count in rows:
+        counts[status] = counts.get(status, 0) + 1
+        reviews_total += reviews_count
+        if status == 'completed' and started_at and completed_at:
+            durations.append((completed_at - started_at).total_seconds())
+        items.append({
+            'extraction_id': extraction_id,
+            'url': url,
+            'status': status,
+            'reviews_count': reviews_count,
+            'error_message': error_message
+        })
+
+    finished = sum(counts.get(status, 0) for status in FINISHED_STATUSES)
+    started = [row.started_at for row in rows if row.started_at]
+    completed = [row.completed_at for row in rows if row.completed_at]
+    is_finished = bool(rows) and finished == len(rows)
+    first_started = min(started) if started else None
+    last_completed = max(completed) if completed else None
+    elapsed = None
+    if first_started:
+        elapsed = ((last_completed if is_finished else datetime.utcnow()) - first_started).total_seconds()
+
+    done = counts.get('completed', 0)
+    return {
+        'batch_id': batch.id,
+        'created_at': batch.created_at.isoformat() if batch.created_at else None,
+        'submitted': batch.submitted_count,
+        'duplicates': batch.duplicate_count,
+        'total': len(rows),
+        'finished': finished,
+        'is_finished': is_finished,
+        'status_counts': counts,
+        'throughput': {
+            'elapsed_seconds': round(elapsed, 1) if elapsed is not None else None,
+            'urls_per_minute': round(done / elapsed * 60, 2) if elapsed else None,
+            'reviews_total': reviews_total,
+            'reviews_per_second': round(reviews_total / elapsed, 2) if elapsed else None,
+            'avg_url_seconds': round(sum(durations) / len(durations), 2) if durations else None
+        },
+        'items': items
+    }
@@ -0,0 +1,366 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+
+from playwright.async_api import async_playwright
+
+from config import Config
+from app.services.browser_pool import browser_pool
+from app.services.extraction_plan import get_extraction_plan, normalize_domain
+from app.services.rate_limit import limit_for, wait_for_slot, wait_for_slot_async
+from app.services.resource_blocking import PageResourceBlocker, blocker_for, policy_for
+from app.services.retry_policy import classify_error, retry_delay
+from app.services.scroll_loader import scroll_until_loaded_async
+
+logger = logging.getLogger(__name__)
+
+# Таймаут завантаження сторінки та очікування селектора (мс)
+NAVIGATION_TIMEOUT = 30000
+
+
+def fetch_html_with_js(url, wait_selector=None, timeout=NAVIGATION_TIMEOUT):
+    """Отримує HTML сторінки після виконання JavaScript через браузер з пулу"""
+    wait_for_slot(url)
+    with browser_pool.new_page() as page:
+        blocker = blocker_for(url)
+        blocker.attach(page)
+        page.goto(url, timeout=timeout)
+        if wait_selector:
+            page.wait_for_selector(wait_selector, timeout=timeout)
+        html = page.content()
+        blocker.finish(url)
+        return html
+
+
+class _FetcherBrowser:
+    """Браузер fetcher разом з лічильниками сторінок"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.active = 0
+
+
+class _FetchSession:
+    """Спільний контекст браузера для серії сторінок"""
+
+    def __init__(self, current, context):
+        self.current = current
+        self.context = context
+
+
+class AsyncBrowserFetcher:
+    """Завантажує багато сторінок паралельно через async API Playwright.
+
+    Усі сторінки відкриваються в одному браузері, кожна в окремому контексті.
+    Одночасно відкрито не більше max_concurrency сторінок і не більше
+    per_domain сторінок одного домену, щоб не перевантажувати магазин.
+    Браузер замінюється новим після max_pages_per_browser сторінок, старий
+    закривається, щойно на ньому завершаться відкриті сторінки. Сторінки
+    сесії (open_session) відкриваються в одному контексті, як у звичайного
+    відвідувача, що гортає сторінки відгуків.
+    Використовується як асинхронний менеджер контексту:
+
+        async with AsyncBrowserFetcher() as fetcher:
+            pages = await fetcher.fetch_many(urls)
+    """
+
+    def __init__(self, max_concurrency: int = None, per_domain: int = None, headless: bool = True,
+                 timeout: int = NAVIGATION_TIMEOUT, max_attempts: int = 2, max_pages_per_browser: int = None):
+        self.max_concurrency = max_concurrency or Config.BROWSER_FETCH_CONCURRENCY
+        self.per_domain = per_domain or Config.BROWSER_DOMAIN_CONCURRENCY
+        self.headless = headless
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.max_pages_per_browser = max_pages_per_browser or Config.BROWSER_MAX_PAGES_PER_BROWSER
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = None
+        self._slots = None
+        self._domain_slots = {}
+        self._policies = {}
+        self._limits = {}
+        self._configs = {}
+        self._stats = {'pages': 0, 'failures': 0, 'retries': 0, 'launches': 0, 'recycles': 0}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        # Примітиви asyncio створюються тут, щоб належати циклу подій, у якому працює fetcher
+        self._launch_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._domain_slots = {}
+        self._playwright = await async_playwright().start()
+
+    async def close(self):
+        if self._browser is not None:
+            await self._close_browser(self._browser)
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Помилка при зупинці Playwright: {str(e)}")
+            self._playwright = None
+
+    async def _close_browser(self, current):
+        try:
+            await current.browser.close()
+        except Exception as e:
+            logger.debug(f"Помилка при закритті браузера: {str(e)}")
+
+    def prepare(self, urls):
+        """Готує політики, ліміти й конфігурації платформ доменів URL.
+
+        Викликається в потоці з контекстом застосунку: конфігурації читаються
+        з бази, а цикл подій fetcher може працювати в іншому потоці.
+        """
+        for url in urls:
+            domain = normalize_domain(url)
+            if domain in self._configs:
+                continue
+            try:
+                config = get_extraction_plan(url).config
+            except Exception as e:
+                logger.debug(f"Немає конфігурації платформи для {url}: {str(e)}")
+                config = None
+            self._policies[domain] = policy_for(url)
+            self._limits[domain] = limit_for(url)
+            self._configs[domain] = config or {}
+
+    async def _checkout(self):
+        """Повертає поточний браузер, запускаючи новий після падіння або max_pages_per_browser сторінок"""
+        async with self._launch_lock:
+            current = self._browser
+            if current is None or not current.browser.is_connected() \
+                    or current.pages_served >= self.max_pages_per_browser:
+                if current is not None:
+                    self._stats['recycles'] += 1
+                    if current.active == 0:
+                        await self._close_browser(current)
+                current = self._browser = _FetcherBrowser(
+                    await self._playwright.chromium.launch(headless=self.headless)
+                )
+                self._stats['launches'] += 1
+                logger.info(f"Запущено браузер для паралельного завантаження (запусків: {self._stats['launches']})")
+            current.pages_served += 1
+            current.active += 1
+            return current
+
+    async def _checkin(self, current):
+        current.active -= 1
+        if current is not self._browser and current.active == 0:
+            # Замінений браузер закривається після останньої своєї сторінки
+            await self._close_browser(current)
+
+    def _domain_semaphore(self, domain):
+        if domain not in self._domain_slots:
+            self._domain_slots[domain] = asyncio.Semaphore(self.per_domain)
+        return self._domain_slots[domain]
+
+    async def open_session(self):
+        """Відкриває контекст, у якому fetch(session=...) завантажує сторінки"""
+        current = await self._checkout()
+        try:
+            return _FetchSession(current, await current.browser.new_context())
+        except Exception:
+            await self._checkin(current)
+            raise
+
+    async def close_session(self, session):
+        try:
+            await session.context.close()
+        except Exception as e:
+            logger.warning(f"Не вдалося закрити контекст браузера: {str(e)}")
+        await self._checkin(session.current)
+
+    async def _load(self, url, domain, wait_selector, scroll_selector, max_items, session=None):
+        if session is not None:
+            page = await session.context.new_page()
+            try:
+                return await self._render(page, url, domain, wait_selector, scroll_selector, max_items)
+            finally:
+                try:
+                    await page.close()
+                except Exception as e:
+                    logger.debug(f"Не вдалося закрити сторінку: {str(e)}")
+
+        current = await self._checkout()
+        context = None
+        try:
+            context = await current.browser.new_context()
+            return await self._render(await context.new_page(), url, domain, wait_selector, scroll_selector, max_items)
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning(f"Не вдалося закрити контекст браузера: {str(e)}")
+            await self._checkin(current)
+
+    async def _render(self, page, url, domain, wait_selector, scroll_selector, max_items):
+        blocker = PageResourceBlocker(self._policies[domain])
+        await blocker.attach_async(page)
+        await page.goto(url, timeout=self.timeout)
+        if wait_selector:
+            await page.wait_for_selector(wait_selector, timeout=self.timeout)
+        if scroll_selector:
+            await scroll_until_loaded_async(page, scroll_selector, max_items=max_items)
+        html = await page.content()
+        blocker.finish(url)
+        return html
+
+    async def fetch(self, url, wait_selector=None, scroll_selector=None, max_items=None, session=None):
+        """Завантажує одну сторінку в межах лімітів і повертає її HTML.
+
+        Загальний слот береться лише після слоту домену й черги ліміту
+        запитів: сторінка, що чекає на свій домен, не займає місця
+        сторінок інших доменів.
+        """
+        self.prepare([url])
+        domain = normalize_domain(url)
+        async with self._domain_semaphore(domain):
+            started = time.monotonic()
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    await wait_for_slot_async(url, self._limits[domain])
+                    async with self._slots:
+                        html = await self._load(url, domain, wait_selector, scroll_selector, max_items, session)
+                    self._stats['pages'] += 1
+                    logger.info(f"Сторінку {url} завантажено за {time.monotonic() - started:.2f} с")
+                    return html
+                except Exception as e:
+                    logger.warning(f"Помилка завантаження {url} (спроба {attempt}/{self.max_attempts}): {str(e)}")
+                    delay = retry_delay(classify_error(e, self._configs[domain]), attempt, self.max_attempts)
+                    if delay is None:
+                        self._stats['failures'] += 1
+                        raise
+                    self._stats['retries'] += 1
+                    await asyncio.sleep(delay)
+
+    async def fetch_many(self, urls, wait_selector=None, scroll_selector=None, max_items=None, session=None):
+        """Завантажує всі сторінки паралельно.
+
+        Повертає список у порядку urls: HTML сторінки або виняток для
+        сторінки, яку не вдалося завантажити.
+        """
+        async def run(url):
+            try:
+                return await self.fetch(url, wait_selector, scroll_selector, max_items, session)
+            except Exception as e:
+                return e
+
+        return await asyncio.gather(*(run(url) for url in urls))
+
+    def stats(self) -> dict:
+        """Повертає лічильники завантажених сторінок"""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'per_domain': self.per_domain,
+            **self._stats
+        }
+
+
+class SharedBrowserFetcher:
+    """Довгоживучий AsyncBrowserFetcher процесу-воркера.
+
+    Цикл подій fetcher працює у фоновому потоці, тож браузер переживає
+    окремі виклики і не запускається заново для кожного пакета чи раунду
+    пагінації. Синхронний код передає туди корутини й чекає на результат.
+    Після fork дочірній процес запускає власний fetcher.
+    """
+
+    def __init__(self, **fetcher_options):
+        self.fetcher_options = fetcher_options
+        self._lock = threading.Lock()
+        self._loop = None
+        self._fetcher = None
+        self._pid = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._fetcher
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='browser-fetcher', daemon=True).start()
+            fetcher = AsyncBrowserFetcher(**self.fetcher_options)
+            asyncio.run_coroutine_threadsafe(fetcher.start(), loop).result()
+            self._loop, self._fetcher, self._pid = loop, fetcher, os.getpid()
+            return fetcher
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def fetch_many(self, urls, wait_selector=None, scroll_selector=None, max_items=None, session=None):
+        fetcher = self._ensure_started()
+        fetcher.prepare(urls)
+        return self._run(fetcher.fetch_many(urls, wait_selector, scroll_selector, max_items, session))
+
+    def session(self):
+        """BrowserSession: один контекст браузера на серію викликів fetch_many"""
+        return BrowserSession(self)
+
+    def stats(self) -> dict:
+        return self._fetcher.stats() if self._fetcher is not None and self._pid == os.getpid() else {}
+
+    def close(self):
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._fetcher.close(), self._loop).result(timeout=30)
+            except Exception as e:
+                logger.debug(f"Помилка при закритті fetcher: {str(e)}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = self._fetcher = self._pid = None
+
+
+class BrowserSession:
+    """Серія завантажень в одному контексті спільного fetcher.
+
+    Контекст відкривається під час першого завантаження і закривається
+    на виході з блоку with.
+    """
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def fetch_many(self, urls, wait_selector=None, scroll_selector=None, max_items=None):
+        if self._session is None:
+            self._session = self._shared._run(self._shared._ensure_started().open_session())
+        return self._shared.fetch_many(urls, wait_selector, scroll_selector, max_items, self._session)
+
+    def close(self):
+        if self._session is not None:
+            self._shared._run(self._shared._fetcher.close_session(self._session))
+            self._session = None
+
+
+shared_fetcher = SharedBrowserFetcher()
+atexit.register(shared_fetcher.close)
+
+
+async def fetch_many(urls, wait_selector=None, scroll_selector=None, max_items=None, **fetcher_options):
+    """Запускає окремий браузер, паралельно завантажує сторінки і закриває його (для async коду)"""
+    async with AsyncBrowserFetcher(**fetcher_options) as fetcher:
+        return await fetcher.fetch_many(urls, wait_selector, scroll_selector, max_items)
+
+
+def fetch_html_batch(urls, wait_selector=None, scroll_selector=None, max_items=None):
+    """Синхронне паралельне завантаження сторінок через довгоживучий браузер процесу"""
+    return shared_fetcher.fetch_many(urls, wait_selector, scroll_selector, max_items)
@@ -0,0 +1,193 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+from playwright.sync_api import sync_playwright
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledBrowser:
+    """Браузер з пулу разом з лічильником обслужених сторінок"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.crashed = False
+
+    def is_alive(self):
+        return not self.crashed and self.browser.is_connected()
+
+
+class _ThreadState:
+    """Драйвер Playwright і браузери одного потоку"""
+
+    def __init__(self, playwright, size):
+        self.playwright = playwright
+        self.idle = []
+        self.live = 0
+        self.slots = threading.BoundedSemaphore(size)
+
+
+class BrowserPool:
+    """Пул довгоживучих браузерів Chromium для витягів процесу.
+
+    Кожна задача отримує новий ізольований контекст (cookies, storage),
+    а сам браузер перезапускається після max_pages_per_browser сторінок
+    або після падіння. Об'єкти sync API Playwright прив'язані до потоку,
+    який їх створив, тому фактично це окремий пул на кожен потік: свій
+    драйвер, свої браузери і свій ліміт size - не більше size живих
+    браузерів (зайнятих і вільних разом) на потік. Усього в процесі
+    браузерів може бути до size на кожен потік, що користувався пулом,
+    тому stats() показує і кількість потоків, і живих браузерів.
+    """
+
+    def __init__(self, size: int = None, max_pages_per_browser: int = None, headless: bool = True):
+        self.size = size or Config.BROWSER_POOL_SIZE
+        self.max_pages_per_browser = max_pages_per_browser or Config.BROWSER_MAX_PAGES_PER_BROWSER
+        self.headless = headless
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = 0
+        self._live = 0
+        self._in_use = 0
+        self._idle = 0
+        self._launches = 0
+        self._recycles = 0
+        self._pages = 0
+
+    def _thread_state(self):
+        """Повертає пул поточного потоку, запускаючи драйвер Playwright за першого звернення"""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = _ThreadState(sync_playwright().start(), self.size)
+            self._local.state = state
+            with self._lock:
+                self._threads += 1
+        return state
+
+    def _launch(self, state):
+        browser = state.playwright.chromium.launch(headless=self.headless)
+        state.live += 1
+        with self._lock:
+            self._launches += 1
+            self._live += 1
+        logger.info(f"Запущено новий браузер у пулі (всього запусків: {self._launches})")
+        return _PooledBrowser(browser)
+
+    def _discard(self, state, pooled, reason):
+        """Закриває браузер і рахує його як перезапущений"""
+        try:
+            pooled.browser.close()
+        except Exception as e:
+            logger.debug(f"Помилка при закритті браузера: {str(e)}")
+        state.live -= 1
+        with self._lock:
+            self._recycles += 1
+            self._live -= 1
+        logger.info(f"Браузер вилучено з пулу: {reason}")
+
+    def _checkout(self, state):
+        while state.idle:
+            pooled = state.idle.pop()
+            with self._lock:
+                self._idle -= 1
+            if pooled.is_alive():
+                return pooled
+            self._discard(state, pooled, 'браузер не відповідає')
+        # Слот потоку вже зайнято, тож вільних браузерів немає і живих менше size
+        return self._launch(state)
+
+    def _checkin(self, state, pooled):
+        pooled.pages_served += 1
+        with self._lock:
+            self._pages += 1
+
+        if not pooled.is_alive():
+            self._discard(state, pooled, 'падіння браузера')
+            return
+        if pooled.pages_served >= self.max_pages_per_browser:
+            self._discard(state, pooled, f'обслужено {pooled.pages_served} сторінок')
+            return
+        state.idle.append(pooled)
+        with self._lock:
+            self._idle += 1
+
+    @contextmanager
+    def new_page(self, **context_options):
+        """Видає нову сторінку в окремому контексті браузера з пулу потоку"""
+        state = self._thread_state()
+        state.slots.acquire()
+        with self._lock:
+            self._in_use += 1
+        pooled = None
+        context = None
+        try:
+            pooled = self._checkout(state)
+            try:
+                context = pooled.browser.new_context(**context_options)
+                page = context.new_page()
+            except Exception:
+                pooled.crashed = True
+                raise
+            yield page
+        except Exception:
+            if pooled and not pooled.browser.is_connected():
+                pooled.crashed = True
+            raise
+        finally:
+            if context is not None:
+                try:
+                    context.close()
+                except Exception as e:
+                    logger.warning(f"Не вдалося закрити контекст браузера: {str(e)}")
+                    pooled.crashed = True
+            if pooled is not None:
+                self._checkin(state, pooled)
+            with self._lock:
+                self._in_use -= 1
+            state.slots.release()
+
+    def stats(self) -> dict:
+        """Повертає метрики пулу"""
+        with self._lock:
+            return {
+                'size_per_thread': self.size,
+                'max_pages_per_browser': self.max_pages_per_browser,
+                'threads': self._threads,
+                'browsers': self._live,
+                'in_use': self._in_use,
+                'idle': self._idle,
+                'launches': self._launches,
+                'recycles': self._recycles,
+                'pages_served': self._pages
+            }
+
+    def close(self):
+        """Закриває браузери та драйвер Playwright поточного потоку"""
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            return
+        while state.idle:
+            pooled = state.idle.pop()
+            try:
+                pooled.browser.close()
+            except Exception:
+                pass
+            state.live -= 1
+            with self._lock:
+                self._idle -= 1
+                self._live -= 1
+        try:
+            state.playwright.stop()
+        except Exception as e:
+            logger.debug(f"Помилка при зупинці Playwright: {str(e)}")
+        self._local.state = None
+        with self._lock:
+            self._threads -= 1
+
+browser_pool = BrowserPool()
+atexit.register(browser_pool.close)
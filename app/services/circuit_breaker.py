@@ -0,0 +1,189 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS circuit (
+    domain TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'closed',
+    failures INTEGER NOT NULL DEFAULT 0,
+    opened_at REAL,
+    probe_started_at REAL,
+    trips INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Витяги платформи призупинено після серії збоїв"""
+
+    def __init__(self, message, retry_at=None):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class CircuitBreaker:
+    """Circuit breaker для кожної платформи (домену) в спільному файлі SQLite.
+
+    Після threshold збоїв поспіль - таймаутів селектора відгуків або
+    порожнього парсингу, тобто ознак зміненої розмітки - платформа
+    відкривається, і задачі до неї одразу завершуються помилкою замість
+    хвилин очікування на браузер. Через cooldown секунд стан стає
+    half_open: одна пробна задача проходить, її успіх закриває платформу,
+    збій відкриває знову. Стан спільний для всіх процесів-воркерів.
+    """
+
+    def __init__(self, path: str = None, enabled: bool = None, threshold: int = None, cooldown: float = None):
+        self.path = path or Config.CIRCUIT_BREAKER_PATH
+        self.enabled = enabled if enabled is not None else Config.CIRCUIT_BREAKER_ENABLED
+        self.threshold = threshold or Config.CIRCUIT_BREAKER_THRESHOLD
+        self.cooldown = cooldown if cooldown is not None else Config.CIRCUIT_BREAKER_COOLDOWN
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _update(self, domain, apply):
+        """Виконує apply(conn, row, now) в транзакції BEGIN IMMEDIATE"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT state, failures, opened_at, probe_started_at FROM circuit WHERE domain = ?', (domain,)
+            ).fetchone()
+            result = apply(conn, row, time.time())
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    def state(self, domain):
+        if not self.enabled:
+            return CLOSED
+        row = self._connection().execute('SELECT state FROM circuit WHERE domain = ?', (domain,)).fetchone()
+        return row[0] if row else CLOSED
+
+    def check(self, domain):
+        """Пропускає задачу до домену або кидає CircuitOpen; повертає True для пробної задачі"""
+        if self.state(domain) == CLOSED:
+            return False
+
+        def apply(conn, row, now):
+            if row is None or row[0] == CLOSED:
+                return False
+            state, failures, opened_at, probe_started_at = row
+            if state == OPEN and now - opened_at < self.cooldown:
+                retry_at = opened_at + self.cooldown
+                raise CircuitOpen(
+                    f'Витяги з {domain} призупинено після {failures} збоїв поспіль, '
+                    f'пробна задача о {datetime.fromtimestamp(retry_at):%H:%M:%S}', retry_at
+                )
+            if state == HALF_OPEN and probe_started_at is not None and now - probe_started_at < self.cooldown:
+                raise CircuitOpen(
+                    f'Витяги з {domain} призупинено: триває пробна задача', probe_started_at + self.cooldown
+                )
+            # Пауза минула або пробна задача зависла - ця задача стає пробною
+            conn.execute(
+                'UPDATE circuit SET state = ?, probe_started_at = ? WHERE domain = ?', (HALF_OPEN, now, domain)
+            )
+            return True
+
+        probe = self._update(domain, apply)
+        if probe:
+            logger.info(f"Circuit breaker {domain}: пробна задача")
+        return probe
+
+    def record_success(self, domain):
+        if not self.enabled:
+            return
+        if self.state(domain) != CLOSED:
+            logger.info(f"Circuit breaker {domain}: пробна задача успішна, витяги відновлено")
+        self._connection().execute(
+            'UPDATE circuit SET state = ?, failures = 0, opened_at = NULL, probe_started_at = NULL, '
+            'last_error = NULL WHERE domain = ? AND (state != ? OR failures != 0)', (CLOSED, domain, CLOSED)
+        )
+
+    def record_failure(self, domain, reason):
+        """Рахує збій домену; повертає новий стан"""
+        if not self.enabled:
+            return CLOSED
+
+        def apply(conn, row, now):
+            state, failures = (row[0], row[1]) if row else (CLOSED, 0)
+            failures += 1
+            if state == HALF_OPEN or failures >= self.threshold:
+                conn.execute(
+                    'INSERT INTO circuit (domain, state, failures, opened_at, probe_started_at, trips, last_error) '
+                    'VALUES (?, ?, ?, ?, NULL, 1, ?) ON CONFLICT(domain) DO UPDATE SET state = excluded.state, '
+                    'failures = excluded.failures, opened_at = excluded.opened_at, probe_started_at = NULL, '
+                    'trips = trips + 1, last_error = excluded.last_error',
+                    (domain, OPEN, failures, now, reason)
+                )
+                return OPEN
+            conn.execute(
+                'INSERT INTO circuit (domain, state, failures, last_error) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(domain) DO UPDATE SET failures = excluded.failures, last_error = excluded.last_error',
+                (domain, CLOSED, failures, reason)
+            )
+            return CLOSED
+
+        state = self._update(domain, apply)
+        if state == OPEN:
+            logger.warning(f"Circuit breaker {domain}: витяги призупинено на {self.cooldown} с ({reason})")
+        return state
+
+    def release(self, domain):
+        """Пробна задача завершилась без висновку (не пов'язана з розміткою помилка) - наступна стане пробною"""
+        if not self.enabled:
+            return
+        self._connection().execute(
+            'UPDATE circuit SET probe_started_at = NULL WHERE domain = ? AND state = ?', (domain, HALF_OPEN)
+        )
+
+    def reset(self, domain=None):
+        if domain is None:
+            self._connection().execute('DELETE FROM circuit')
+        else:
+            self._connection().execute('DELETE FROM circuit WHERE domain = ?', (domain,))
+
+    def stats(self) -> dict:
+        """Стан платформ, які мали збої"""
+        if not self.enabled:
+            return {'enabled': False, 'domains': {}}
+        domains = {}
+        for domain, state, failures, opened_at, trips, last_error in self._connection().execute(
+            'SELECT domain, state, failures, opened_at, trips, last_error FROM circuit ORDER BY domain'
+        ):
+            domains[domain] = {
+                'state': state,
+                'failures': failures,
+                'trips': trips,
+                'opened_at': datetime.fromtimestamp(opened_at).isoformat() if opened_at else None,
+                'probe_at': datetime.fromtimestamp(opened_at + self.cooldown).isoformat()
+                if state == OPEN and opened_at else None,
+                'last_error': last_error
+            }
+        return {'enabled': True, 'threshold': self.threshold, 'cooldown': self.cooldown, 'domains': domains}
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,245 @@
+import base64
+import binascii
+import csv
+import io
+import json
+import logging
+import zlib
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models.extraction import Extraction, Review
+
+logger = logging.getLogger(__name__)
+
+# Колонки експорту в тому ж порядку, що й Review.to_dict()
+EXPORT_COLUMNS = (
+    'id', 'author', 'text', 'rating', 'date', 'advantages', 'disadvantages',
+    'platform_review_id', 'created_at', 'product_title'
+)
+
+# Колонки експорту всієї історії: дані витягу, відгук і курсор для продовження
+BULK_EXPORT_COLUMNS = (
+    'extraction_id', 'url', 'platform', 'status', 'extraction_created_at', 'product_title',
+    'review_id', 'author', 'text', 'rating', 'date', 'advantages', 'disadvantages',
+    'platform_review_id', 'created_at', 'cursor'
+)
+
+EXPORT_FORMATS = {
+    'json': ('application/json', 'json'),
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'columnar': ('application/x-ndjson', 'columnar.ndjson')
+}
+
+BULK_EXPORT_FORMATS = ('csv', 'ndjson', 'columnar')
+
+_REVIEW_FIELDS = (
+    Review.id, Review.author, Review.text, Review.rating, Review.date, Review.advantages,
+    Review.disadvantages, Review.platform_review_id, Review.created_at
+)
+
+_EXTRACTION_FIELDS = (
+    Extraction.id, Extraction.url, Extraction.platform, Extraction.status,
+    Extraction.created_at, Extraction.title
+)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _serialize_row(row, product_title):
+    """Перетворює рядок запиту на словник у форматі Review.to_dict()"""
+    review = dict(row._mapping)
+    review['created_at'] = _isoformat(review['created_at'])
+    review['product_title'] = product_title
+    return review
+
+
+def _review_rows(extraction_id, after_id, chunk_size):
+    """Читає відгуки витягу порціями за ключем (extraction_id, id) замість OFFSET"""
+    while True:
+        rows = db.session.execute(
+            select(*_REVIEW_FIELDS)
+            .where(Review.extraction_id == extraction_id, Review.id > after_id)
+            .order_by(Review.id)
+            .limit(chunk_size)
+        ).all()
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        after_id = rows[-1].id
+
+
+def iter_extraction_reviews(extraction_id, chunk_size=None):
+    """Віддає відгуки витягу, не завантажуючи їх у пам'ять одразу.
+
+    Назва товару береться одним запитом на весь експорт, а не лінивим
+    завантаженням витягу для кожного відгуку.
+    """
+    chunk_size = chunk_size or current_app.config['EXPORT_CHUNK_SIZE']
+    product_title = db.session.query(Extraction.title).filter_by(id=extraction_id).scalar()
+    for row in _review_rows(extraction_id, 0, chunk_size):
+        yield _serialize_row(row, product_title)
+
+
+def encode_cursor(extraction_id, review_id):
+    """Кодує позицію експорту (extraction_id, review_id) у непрозорий токен"""
+    return base64.urlsafe_b64encode(f'{extraction_id}:{review_id}'.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Розбирає токен курсора; ValueError, якщо токен пошкоджений"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        extraction_id, review_id = raw.split(':')
+        return int(extraction_id), int(review_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('Невалідний курсор експорту')
+
+
+def iter_user_reviews(user_id, filters=(), cursor=None, chunk_size=None):
+    """Віддає відгуки всіх витягів користувача, що підпадають під фільтри.
+
+    Витяги перебираються за зростанням id, відгуки в кожному - за id, тому
+    пара (extraction_id, review_id) останнього отриманого рядка однозначно
+    задає місце, з якого можна продовжити завантаження.
+    """
+    chunk_size = chunk_size or current_app.config['EXPORT_CHUNK_SIZE']
+    last_extraction_id, last_review_id = cursor or (0, 0)
+
+    while True:
+        extractions = db.session.execute(
+            select(*_EXTRACTION_FIELDS)
+            .where(Extraction.user_id == user_id, Extraction.id >= last_extraction_id, *filters)
+            .order_by(Extraction.id)
+            .limit(chunk_size)
+        ).all()
+
+        for extraction in extractions:
+            after_id = last_review_id if extraction.id == last_extraction_id else 0
+            extraction_data = {
+                'extraction_id': extraction.id,
+                'url': extraction.url,
+                'platform': extraction.platform,
+                'status': extraction.status,
+                'extraction_created_at': _isoformat(extraction.created_at),
+                'product_title': extraction.title
+            }
+            for row in _review_rows(extraction.id, after_id, chunk_size):
+                review = dict(extraction_data, **row._mapping)
+                review['review_id'] = row.id
+                review['created_at'] = _isoformat(row.created_at)
+                review['cursor'] = encode_cursor(extraction.id, row.id)
+                yield {column: review[column] for column in BULK_EXPORT_COLUMNS}
+
+        if len(extractions) < chunk_size:
+            return
+        last_extraction_id, last_review_id = extractions[-1].id + 1, 0
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def stream_json(rows, columns=None):
+    """Віддає JSON-масив по одному елементу"""
+    yield '['
+    first = True
+    for row in rows:
+        yield _dumps(row) if first else ',' + _dumps(row)
+        first = False
+    yield ']'
+
+
+def stream_ndjson(rows, columns=None):
+    """Віддає по одному JSON-об'єкту на рядок"""
+    for row in rows:
+        yield _dumps(row) + '\n'
+
+
+def stream_csv(rows, columns=EXPORT_COLUMNS, batch_size=500):
+    """Віддає CSV з заголовком, записуючи рядки невеликими пачками"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def stream_columnar(rows, columns=EXPORT_COLUMNS, chunk_size=None):
+    """Віддає NDJSON, де кожен рядок - стовпчикова порція: {колонка: [значення]}.
+
+    Кожна порція містить курсор останнього рядка, якщо він є серед колонок.
+    """
+    chunk_size = chunk_size or current_app.config['EXPORT_CHUNK_SIZE']
+    def flush(batch):
+        chunk = {
+            'rows': len(batch),
+            'columns': {column: [row.get(column) for row in batch] for column in columns}
+        }
+        if 'cursor' in columns:
+            chunk['next_cursor'] = batch[-1]['cursor']
+        return _dumps(chunk) + '\n'
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield flush(batch)
+            batch = []
+    if batch:
+        yield flush(batch)
+
+
+STREAM_WRITERS = {
+    'json': stream_json,
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+    'columnar': stream_columnar
+}
+
+
+def gzip_stream(chunks, level=6):
+    """Стискає потік текстових частин у gzip без буферизації всього файлу"""
+    # wbits=31 - zlib пише заголовок і контрольну суму формату gzip
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode_stream(chunks):
+    for chunk in chunks:
+        yield chunk.encode('utf-8')
+
+
+def export_stream(rows, format, compress=False, columns=EXPORT_COLUMNS):
+    """Повертає генератор байтів експорту у вказаному форматі"""
+    chunks = STREAM_WRITERS[format](rows, columns)
+    if compress:
+        return gzip_stream(chunks)
+    return encode_stream(chunks)
+
+
+def export_headers(format, filename, compress=False):
+    """Повертає mimetype і заголовки відповіді для файлу експорту"""
+    mimetype, extension = EXPORT_FORMATS[format]
+    filename = f'{filename}.{extension}'
+    if compress:
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    return mimetype, {'Content-Disposition': f'attachment; filename={filename}'}
@@ -0,0 +1,296 @@
+import json
+import logging
+import re
+import threading
+from urllib.parse import urlparse
+
+from flask import current_app
+
+from app import db
+from app.services.parse_engines import engine_for
+from app.services.rozetka_parser import RozetkaReviewParser
+
+logger = logging.getLogger(__name__)
+
+# Правила рейтингу, які переважають конфігурацію для відомих платформ
+RATING_OVERRIDES = {
+    'rozetka.com.ua': {
+        'selector': "[data-testid='stars-rating']",
+        'type': 'style',
+        'attribute': 'style',
+        'pattern': r'width:\s*calc\((\d+)%\s*-\s*2px\)'
+    },
+    'prom.ua': {
+        'selector': "[data-qaid='count_stars']"
+    }
+}
+
+# Селектори полів, які використовуються на платформі незалежно від конфігурації
+FIXED_FIELD_SELECTORS = {
+    'prom.ua': {
+        'advantages': "[data-qaid='pros']",
+        'disadvantages': "[data-qaid='cons']"
+    }
+}
+
+# Платформи з власним парсером відгуків: той самий парсер використовує живий витяг,
+# тож пагінація і повторний парсинг знімків дають ті самі відгуки
+PLATFORM_PARSERS = {
+    'rozetka.com.ua': RozetkaReviewParser
+}
+
+RATING_ATTRIBUTE = 'data-qaid-raiting'
+
+CONVERTERS = {
+    'divide_by_20': lambda value: int(value) // 20
+}
+
+
+def normalize_domain(url):
+    """Повертає домен URL без префікса www."""
+    domain = urlparse(url).netloc
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
+
+
+def platform_parser_for(domain):
+    """Клас власного парсера платформи для домену або його піддомену (bt.rozetka.com.ua)"""
+    for platform_domain, parser in PLATFORM_PARSERS.items():
+        if domain == platform_domain or domain.endswith(f'.{platform_domain}'):
+            return parser
+    return None
+
+
+class FieldRule:
+    """Скомпільоване правило для одного поля відгуку"""
+
+    def __init__(self, name, selector, converter):
+        self.name = name
+        self.selector = selector
+        self.converter = converter
+
+    def extract(self, item, locate):
+        elem = locate(self.selector, item)
+        if elem is None:
+            return None
+        return self.converter(elem)
+
+
+def _text_converter(engine):
+    return lambda elem: engine.text(elem).strip()
+
+
+def _rating_converter(selector_config, engine):
+    """Будує конвертер рейтингу: з ширини у style або з атрибута data-qaid-raiting"""
+    is_style = (isinstance(selector_config, dict) and selector_config.get('type') == 'style'
+                and selector_config.get('attribute') == 'style' and 'pattern' in selector_config)
+    if is_style:
+        pattern = re.compile(selector_config['pattern'])
+
+        def convert(elem):
+            m = pattern.search(engine.get(elem, 'style') or '')
+            return int(m.group(1)) // 20 if m else None
+        return convert
+
+    divide = CONVERTERS['divide_by_20']
+
+    def convert(elem):
+        value = engine.get(elem, RATING_ATTRIBUTE)
+        if value is not None:
+            return divide(value)
+        return None
+    return convert
+
+
+class ExtractionPlan:
+    """Конфігурація платформи, перетворена на скомпільовані селектори та конвертери.
+
+    Будується один раз на домен і потім застосовується до кожної сторінки
+    без повторного розбору JSON конфігурації. Рушій парсингу (BeautifulSoup
+    або lxml) обирається ключем parser конфігурації.
+    """
+
+    def __init__(self, domain, config, engine=None):
+        self.domain = domain
+        self.config = config
+        self.engine = engine or engine_for(config)
+        platform_parser = platform_parser_for(domain)
+        self.platform_parser = platform_parser(self.engine) if platform_parser else None
+        compile_selector = self.engine.compile
+        selectors = config['selectors']
+
+        try:
+            title_selector = selectors['product']['title']['selector']
+        except Exception:
+            title_selector = selectors.get('product_title')
+        if isinstance(title_selector, list):
+            self.title_selectors = [compile_selector(s) for s in title_selector]
+        elif title_selector:
+            self.title_selectors = [compile_selector(title_selector)]
+        else:
+            self.title_selectors = []
+        self.title_selector_text = title_selector
+
+        try:
+            container_selector = selectors['reviews']['container']
+            item_selector = selectors['reviews']['item']
+            fields_config = selectors['reviews']['fields']
+        except Exception:
+            container_selector = selectors.get('reviews_container')
+            item_selector = selectors.get('review_item')
+            fields_config = selectors.get('review_fields')
+        self.container_selector_text = container_selector
+        self.item_selector_text = item_selector
+        self.items_in_container = compile_selector(f"{container_selector} {item_selector}")
+        self.items = compile_selector(item_selector)
+        self.fields = [self._compile_field(name, cfg) for name, cfg in fields_config.items()]
+
+    def _compile_field(self, field_name, selector_config):
+        if isinstance(selector_config, dict):
+            selector = selector_config.get('selector')
+        else:
+            selector = selector_config
+
+        compile_selector = self.engine.compile
+        if field_name == 'rating':
+            if self.domain in RATING_OVERRIDES:
+                selector_config = RATING_OVERRIDES[self.domain]
+                selector = selector_config['selector']
+            return FieldRule(field_name, compile_selector(selector), _rating_converter(selector_config, self.engine))
+        selector = FIXED_FIELD_SELECTORS.get(self.domain, {}).get(field_name, selector)
+        return FieldRule(field_name, compile_selector(selector), _text_converter(self.engine))
+
+    def find_title(self, document):
+        if self.platform_parser is not None:
+            return self.platform_parser.find_title(document)
+        for selector in self.title_selectors:
+            title_elem = selector.select_one(document)
+            if title_elem is not None:
+                return self.engine.text(title_elem).strip()
+        return None
+
+    def find_review_items(self, document):
+        review_items = self.items_in_container.select(document)
+        if review_items:
+            return review_items
+        # Якщо контейнера немає, але є елементи відгуків - використовуємо їх
+        return self.items.select(document)
+
+    def extract_review(self, item, locate):
+        review = {
+            'platform': self.domain,
+            'advantages': None,
+            'disadvantages': None
+        }
+        for rule in self.fields:
+            review[rule.name] = rule.extract(item, locate)
+        return review
+
+    def extract(self, html_content):
+        """Застосовує план до HTML сторінки та повертає результат витягу"""
+        document = self.engine.parse(html_content)
+
+        product_title = self.find_title(document)
+        if product_title:
+            current_app.logger.info(f"Знайдено назву товару: {product_title}")
+        else:
+            current_app.logger.warning(f"Не знайдено елемент з селектором '{self.title_selector_text}' для назви товару")
+
+        return {
+            'product_title': product_title,
+            'reviews': self.extract_reviews(document),
+            'platform': self.domain
+        }
+
+    def extract_reviews(self, document):
+        """Витягує відгуки з розібраного документа (сторінки без назви товару теж)"""
+        if self.platform_parser is not None:
+            reviews = self.platform_parser.extract_reviews(document)
+            current_app.logger.info(f"Знайдено відгуків: {len(reviews)}")
+            return reviews
+        review_items = self.find_review_items(document)
+        current_app.logger.info(f"Знайдено відгуків: {len(review_items)}")
+        if not review_items:
+            current_app.logger.warning(
+                f"Не знайдено відгуків за селектором '{self.container_selector_text} {self.item_selector_text}'"
+            )
+
+        locate = self.engine.field_locator(document, review_items)
+        reviews = []
+        for item in review_items:
+            try:
+                review = self.extract_review(item, locate)
+                if review.get('author') or review.get('title'):
+                    reviews.append(review)
+            except Exception as e:
+                current_app.logger.error(f"Помилка при обробці відгуку: {str(e)}")
+                continue
+        return reviews
+
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def _platform_version(domain):
+    """Повертає (id, updated_at) платформи з бази без завантаження конфігурації"""
+    from app.models.platform import Platform
+    return db.session.query(Platform.id, Platform.updated_at) \
+        .filter(Platform.domain.like(f"%{domain}%")).first()
+
+
+def _load_config(domain, url, platform_id):
+    """Завантажує конфігурацію з бази, а якщо її немає - з файлу екстрактора"""
+    config = None
+    if platform_id is not None:
+        from app.models.platform import Platform
+        platform_config = Platform.query.get(platform_id)
+        if platform_config and platform_config.config:
+            try:
+                config = json.loads(platform_config.config)
+            except json.JSONDecodeError:
+                current_app.logger.error("Помилка декодування JSON конфігурації з бази даних")
+
+    if not config:
+        from app.extractors.factory import ExtractorFactory
+        from app.services.extractor import ReviewExtractor
+        platform = ReviewExtractor().detect_platform(url)
+        extractor = ExtractorFactory.create_extractor(platform)
+        if not extractor:
+            raise Exception(f"Не знайдено екстрактор для платформи {platform}")
+        config = extractor.config
+    return config
+
+
+def get_extraction_plan(url):
+    """Повертає скомпільований план для домену URL, перебудовуючи його лише після змін платформи"""
+    domain = normalize_domain(url)
+    row = _platform_version(domain)
+    version = (row.id, row.updated_at) if row else None
+
+    with _plans_lock:
+        cached = _plans.get(domain)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    current_app.logger.info(f"Компілюємо план витягу для домену: {domain}")
+    config = _load_config(domain, url, row.id if row else None)
+    current_app.logger.info(f"Використовуємо конфігурацію: {json.dumps(config, ensure_ascii=False, default=str)}")
+    plan = ExtractionPlan(domain, config)
+    current_app.logger.info(f"Рушій парсингу для {domain}: {plan.engine.name}")
+
+    with _plans_lock:
+        _plans[domain] = (version, plan)
+    return plan
+
+
+def invalidate_plans(domain=None):
+    """Скидає кеш планів для домену або повністю"""
+    with _plans_lock:
+        if domain is None:
+            _plans.clear()
+            return
+        for key in list(_plans):
+            if key in domain or domain in key:
+                del _plans[key]
@@ -1,9 +1,15 @@
-from urllib.parse import urlparse
 from datetime import datetime
-import re
-from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 from .ai_helper import AIHelper
+from .browser_pool import browser_pool
+from .scroll_loader import scroll_until_loaded
+from .rozetka_parser import RozetkaReviewParser, TITLE_SELECTORS as ROZETKA_TITLE_SELECTORS
+from .extraction_plan import get_extraction_plan
+from .resource_blocking import blocker_for
+from .review_store import is_known
+from .rate_limit import wait_for_slot
+from .retry_policy import browser_retry_delay
+from config import Config
 import json
 import requests
 import yaml
@@ -137,175 +143,9 @@ class ReviewExtractor:
     def extract_reviews(self, html_content, url):
         """Витягує відгуки з HTML контенту"""
         try:
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc
-            if domain.startswith('www.'):
-                domain = domain[4:]
-                
-            current_app.logger.info(f"Шукаємо конфігурацію для домену: {domain}")
-            
-            # Спочатку шукаємо в базі даних
-            from app.models.platform import Platform
-            platform_config = Platform.query.filter(Platform.domain.like(f"%{domain}%")).first()
-            
-            if platform_config and platform_config.config:
-                try:
-                    config = json.loads(platform_config.config)
-                except json.JSONDecodeError:
-                    current_app.logger.error("Помилка декодування JSON конфігурації з бази даних")
-                    config = None
-            else:
-                config = None
-                
-            if not config:
-                # Якщо в базі немає або помилка, використовуємо конфігурацію з файлу
-                from app.extractors.factory import ExtractorFactory
-                platform = self.detect_platform(url)
-                extractor = ExtractorFactory.create_extractor(platform)
-                if not extractor:
-                    raise Exception(f"Не знайдено екстрактор для платформи {platform}")
-                config = extractor.config
-            
-            current_app.logger.info(f"Використовуємо конфігурацію: {json.dumps(config, ensure_ascii=False)}")
-            
-            parser = config.get('parser', 'lxml')
-            if isinstance(parser, dict):
-                # config: {"type": "html", "config": {"parser": "lxml"}}
-                parser = parser.get('config', {}).get('parser', 'lxml')
-            soup = BeautifulSoup(html_content, parser)
-            
-            # Знаходимо назву товару
-            product_title = None
-            try:
-                title_selector = config['selectors']['product']['title']['selector']
-            except Exception:
-                title_selector = config['selectors'].get('product_title')
-            title_elem = soup.select_one(title_selector)
-            if title_elem:
-                product_title = title_elem.text.strip()
-                current_app.logger.info(f"Знайдено назву товару: {product_title}")
-            else:
-                current_app.logger.warning(f"Не знайдено елемент з селектором '{title_selector}' для назви товару")
-            
-            # Знаходимо всі відгуки
-            reviews = []
-            try:
-                container_selector = config['selectors']['reviews']['container']
-                item_selector = config['selectors']['reviews']['item']
-                fields_config = config['selectors']['reviews']['fields']
-            except Exception:
-                container_selector = config['selectors'].get('reviews_container')
-                item_selector = config['selectors'].get('review_item')
-                fields_config = config['selectors'].get('review_fields')
-            # Логуємо HTML контейнера відгуків
-            reviews_container = soup.select_one(container_selector)
-            if reviews_container:
-                current_app.logger.info(f"Знайдено контейнер відгуків. HTML: {reviews_container.prettify()[:500]}...")
-            else:
-                current_app.logger.warning(f"Не знайдено контейнер відгуків з селектором '{container_selector}'")
-            review_items = soup.select(f"{container_selector} {item_selector}")
-            current_app.logger.info(f"Знайдено відгуків: {len(review_items)}")
-            if len(review_items) == 0:
-                current_app.logger.warning(f"Не знайдено відгуків за селектором '{container_selector} {item_selector}'")
-                # Перевіряємо наявність елементів окремо
-                all_containers = soup.select(container_selector)
-                current_app.logger.info(f"Кількість знайдених контейнерів: {len(all_containers)}")
-                all_items = soup.select(item_selector)
-                current_app.logger.info(f"Кількість знайдених елементів відгуків: {len(all_items)}")
-                # Якщо контейнерів немає, але є елементи — використовуємо їх
-                if len(all_items) > 0:
-                    review_items = all_items
-                    current_app.logger.info(f"Використовуємо всі знайдені елементи відгуків на сторінці: {len(review_items)}")
-            for item in review_items:
-                try:
-                    review = {
-                        'platform': domain,
-                        'advantages': None,
-                        'disadvantages': None
-                    }
-                    # Витягуємо всі поля згідно конфігурації
-                    for field_name, selector_config in fields_config.items():
-                        if isinstance(selector_config, dict):
-                            selector = selector_config.get('selector')
-                        else:
-                            selector = selector_config
-                        # --- Виправлення селекторів для рейтингу Rozetka та Prom ---
-                        if field_name == 'rating':
-                            if domain == 'rozetka.com.ua':
-                                elem = item.select_one("[data-testid='stars-rating']")
-                                if elem and elem.has_attr('style'):
-                                    style = elem['style']
-                                    m = re.search(r'width:\s*calc\((\d+)%\s*-\s*2px\)', style)
-                                    if m:
-                                        width = int(m.group(1))
-                                        review[field_name] = width // 20
-                                        current_app.logger.debug(f"Знайдено рейтинг через style: {review[field_name]}")
-                                    else:
-                                        review[field_name] = None
-                                else:
-                                    review[field_name] = None
-                            elif domain == 'prom.ua':
-                                elem = item.select_one("[data-qaid='count_stars']")
-                                if elem and 'data-qaid-raiting' in elem.attrs:
-                                    review[field_name] = int(elem['data-qaid-raiting']) // 20
-                                else:
-                                    review[field_name] = None
-                            else:
-                                elem = item.select_one(selector)
-                                if elem:
-                                    if isinstance(selector_config, dict) and selector_config.get('type') == 'style' and selector_config.get('attribute') == 'style' and 'pattern' in selector_config:
-                                        style = elem.get('style', '')
-                                        m = re.search(selector_config['pattern'], style)
-                                        if m:
-                                            width = int(m.group(1))
-                                            review[field_name] = width // 20
-                                        else:
-                                            review[field_name] = None
-                                    elif 'data-qaid-raiting' in elem.attrs:
-                                        review[field_name] = int(elem['data-qaid-raiting']) // 20
-                                    else:
-                                        review[field_name] = None
-                                else:
-                                    review[field_name] = None
-                        elif field_name == 'advantages':
-                            elem = item.select_one("[data-qaid='pros']")
-                        elif field_name == 'disadvantages':
-                            elem = item.select_one("[data-qaid='cons']")
-                        else:
-                            elem = item.select_one(selector)
-                        # --- кінець виправлення ---
-                        if elem:
-                            if field_name == 'rating':
-                                # --- Парсимо рейтинг з width у style ---
-                                if isinstance(selector_config, dict) and selector_config.get('type') == 'style' and selector_config.get('attribute') == 'style' and 'pattern' in selector_config:
-                                    style = elem.get('style', '')
-                                    m = re.search(selector_config['pattern'], style)
-                                    if m:
-                                        width = int(m.group(1))
-                                        review[field_name] = width // 20
-                                    else:
-                                        review[field_name] = None
-                                elif 'data-qaid-raiting' in elem.attrs:
-                                    review[field_name] = int(elem['data-qaid-raiting']) // 20
-                                else:
-                                    review[field_name] = None
-                            else:
-                                review[field_name] = elem.text.strip()
-                            current_app.logger.debug(f"Для поля '{field_name}' знайдено значення: {review[field_name]}")
-                        else:
-                            current_app.logger.warning(f"Не знайдено елемент з селектором '{selector}' для поля '{field_name}'")
-                            review[field_name] = None
-                    if review.get('author') or review.get('title'):
-                        reviews.append(review)
-                        current_app.logger.debug(f"Оброблено відгук: {json.dumps(review, ensure_ascii=False)}")
-                except Exception as e:
-                    current_app.logger.error(f"Помилка при обробці відгуку: {str(e)}")
-                    continue
-            return {
-                'product_title': product_title,
-                'reviews': reviews,
-                'platform': domain
-            }
+            # План з скомпільованими селекторами кешується для кожного домену
+            plan = get_extraction_plan(url)
+            return plan.extract(html_content)
         except Exception as e:
             current_app.logger.error(f"Помилка при витягуванні відгуків: {str(e)}")
             raise
@@ -382,10 +222,8 @@ def extract_google_reviews(page, max_reviews):
         # Чекаємо на завантаження відгуків
         page.wait_for_selector('.review-full-text', timeout=60000)
         
-        # Прокручуємо сторінку, щоб завантажити більше відгуків
-        for _ in range(3):
-            page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-            page.wait_for_timeout(1000)
+        # Прокручуємо сторінку, поки підвантажуються нові відгуки
+        scroll_until_loaded(page, '.review-item', max_items=max_reviews, max_scrolls=3)
         
         # Витягуємо відгуки
         review_elements = page.query_selector_all('.review-item')
@@ -511,10 +349,8 @@ def extract_rozetka_reviews(page, max_reviews):
         # Чекаємо на завантаження відгуків
         page.wait_for_selector('.comment', timeout=60000)
         
-        # Прокручуємо сторінку для завантаження більше відгуків
-        for _ in range(3):
-            page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-            page.wait_for_timeout(1000)
+        # Прокручуємо сторінку, поки підвантажуються нові відгуки
+        scroll_until_loaded(page, '.comment', max_items=max_reviews, max_scrolls=3)
         
         # Витягуємо відгуки
         review_elements = page.query_selector_all('.comment')
@@ -579,188 +415,135 @@ def parse_rozetka_date(date_str):
         current_app.logger.error(f"Error parsing Rozetka date '{date_str}': {str(e)}")
         return None
 
-def extract_page_content(url):
-    """Отримує HTML-код сторінки через Playwright (як у тесті)"""
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+def review_item_selector(url):
+    """Селектор елемента відгуку, на появу якого чекає браузер"""
+    # Різні селектори для різних платформ
+    if 'prom.ua' in url:
+        return '[data-qaid="opinion_item"]'
+    return '.product-comments__list-item'  # для rozetka
+
+def stop_at_known(known, parse_reviews):
+    """Умова зупинки скролу: на сторінці з'явився вже збережений відгук.
+
+    parse_reviews(html) розбирає відгуки так само, як їх збереже витяг.
+    Без known скрол не зупиняється.
+    """
+    if not known:
+        return None
+
+    def stop(page):
+        return any(is_known(review, known) for review in parse_reviews(page.content()))
+    return stop
+
+def extract_page_content(url, max_reviews=None, known=None):
+    """Отримує HTML-код сторінки через браузер з пулу Playwright.
+
+    З known (ключі збережених відгуків) скрол зупиняється, щойно
+    підвантажились уже відомі відгуки.
+    """
     import time
     import logging
     
-    max_attempts = 3
-    for attempt in range(max_attempts):
+    item_selector = review_item_selector(url)
+    stop_when = None
+    if known:
+        plan = get_extraction_plan(url)
+        stop_when = stop_at_known(known, lambda html: plan.extract_reviews(plan.engine.parse(html)))
+    
+    max_attempts = Config.BROWSER_MAX_ATTEMPTS
+    for attempt in range(1, max_attempts + 1):
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context()
-                page = context.new_page()
+            wait_for_slot(url)
+            with browser_pool.new_page() as page:
+                blocker = blocker_for(url)
+                blocker.attach(page)
                 page.goto(url)
-                
-                # Різні селектори для різних платформ
-                if 'prom.ua' in url:
-                    page.wait_for_selector('[data-qaid="opinion_item"]', timeout=30000)
-                else:  # для rozetka
-                    page.wait_for_selector('.product-comments__list-item', timeout=30000)
-                
-                previous_height = 0
-                max_scrolls = 10
-                scroll_count = 0
-                while scroll_count < max_scrolls:
-                    page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                    time.sleep(2)
-                    current_height = page.evaluate('document.body.scrollHeight')
-                    if current_height == previous_height:
-                        break
-                    previous_height = current_height
-                    scroll_count += 1
+                page.wait_for_selector(item_selector, timeout=30000)
+                scroll_until_loaded(page, item_selector, max_items=max_reviews, stop_when=stop_when)
                 html = page.content()
-                browser.close()
+                blocker.finish(url)
                 return html
-        except PlaywrightTimeoutError:
-            logging.warning(f"PlaywrightTimeoutError для URL: {url}, спроба {attempt+1} з {max_attempts}")
-            if attempt < max_attempts - 1:
-                time.sleep(2)
-                continue
-            else:
-                raise
         except Exception as e:
-            logging.error(f"Playwright error для URL: {url}: {e}")
-            if attempt < max_attempts - 1:
-                time.sleep(2)
-                continue
-            else:
+            # Таймаут селектора чи неправильна адреса не виправляться повтором
+            delay = browser_retry_delay(e, url, attempt, max_attempts)
+            if delay is None:
+                logging.error(f"Playwright error для URL: {url}, спроба {attempt} з {max_attempts}: {e}")
                 raise
+            logging.warning(f"Playwright error для URL: {url}, спроба {attempt} з {max_attempts}, "
+                            f"повтор через {delay:.1f} с: {e}")
+            time.sleep(delay)
     return None
 
-def extract_rozetka_reviews_playwright(url):
+# Живий парсер Rozetka: селектори скомпільовані один раз, сторінки розбирає lxml
+rozetka_parser = RozetkaReviewParser()
+
+def parse_rozetka_title(html):
+    """Назва товару з уже завантаженої сторінки Rozetka"""
+    return rozetka_parser.find_title(rozetka_parser.parse(html))
+
+def parse_rozetka_reviews(html, max_reviews=None):
+    """Розбирає відгуки зі сторінки товару Rozetka, отриманої через Playwright"""
+    return rozetka_parser.extract_reviews(rozetka_parser.parse(html), max_reviews)
+
+def extract_rozetka_reviews_playwright(url, max_reviews=None, known=None):
     """Парсить відгуки Rozetka через Playwright, як у тесті, повертає product_title і reviews"""
-    from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
     import time
-    from bs4 import BeautifulSoup
     import logging
+    stop_when = stop_at_known(known, parse_rozetka_reviews)
     reviews = []
     product_title = None
-    max_attempts = 3
-    for attempt in range(max_attempts):
+    max_attempts = Config.BROWSER_MAX_ATTEMPTS
+    for attempt in range(1, max_attempts + 1):
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                context = browser.new_context()
-                page = context.new_page()
+            wait_for_slot(url)
+            with browser_pool.new_page() as page:
+                blocker = blocker_for(url)
+                blocker.attach(page)
                 page.goto(url)
                 page.wait_for_selector('.product-comments__list-item', timeout=30000)
-                previous_height = 0
-                max_scrolls = 10
-                scroll_count = 0
-                while scroll_count < max_scrolls:
-                    page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                    time.sleep(2)
-                    current_height = page.evaluate('document.body.scrollHeight')
-                    if current_height == previous_height:
-                        break
-                    previous_height = current_height
-                    scroll_count += 1
+                scroll_until_loaded(page, '.product-comments__list-item', max_items=max_reviews, stop_when=stop_when)
+                blocker.finish(url)
                 # --- Пошук тайтлу через кілька селекторів ---
-                title_selectors = [
-                    'h1.product__title',
-                    '.product__heading',
-                    '.product-title',
-                    'h1',
-                    'title'
-                ]
-                for sel in title_selectors:
+                for sel in ROZETKA_TITLE_SELECTORS:
                     title_elem = page.query_selector(sel)
                     if title_elem:
                         product_title = title_elem.inner_text().strip()
                         if product_title:
                             break
-                html = page.content()
-                soup = BeautifulSoup(html, 'html.parser')
-                review_items = soup.select('.product-comments__list-item')
-                for review in review_items:
-                    data = {
-                        'rating': None,
-                        'author': None,
-                        'date': None,
-                        'text': None,
-                        'advantages': None,
-                        'disadvantages': None,
-                        'likes': 0,
-                        'dislikes': 0,
-                        'bought': False,
-                        'comment_photos': [],
-                    }
-                    rating_element = review.select_one('[data-testid="stars-rating"]')
-                    if rating_element and 'style' in rating_element.attrs:
-                        style = rating_element['style']
-                        pattern = r'width:\s*calc\((\d+)%\s*-\s*2px\)'
-                        m = re.search(pattern, style)
-                        if m:
-                            width = int(m.group(1))
-                            data['rating'] = width // 20
-                    author_element = review.select_one('[data-testid="replay-header-author"]')
-                    if author_element:
-                        data['author'] = author_element.text.strip()
-                    date_element = review.select_one('[data-testid="replay-header-date"]')
-                    if date_element:
-                        data['date'] = date_element.text.strip()
-                    text_element = review.select_one('.comment__body-wrapper p')
-                    if text_element:
-                        data['text'] = text_element.text.strip()
-                    advantages_element = review.select_one('.comment__essentials dd')
-                    if advantages_element:
-                        data['advantages'] = advantages_element.text.strip()
-                    disadvantages_element = review.select_one('.comment__essentials dd:nth-of-type(2)')
-                    if disadvantages_element:
-                        data['disadvantages'] = disadvantages_element.text.strip()
-                    likes_element = review.select_one('.vote-buttons-comments__counter')
-                    if likes_element:
-                        try:
-                            data['likes'] = int(likes_element.text.strip())
-                        except ValueError:
-                            pass
-                    dislikes_element = review.select_one('.vote-buttons-comments__vote--dislike .vote-buttons-comments__counter')
-                    if dislikes_element:
-                        try:
-                            data['dislikes'] = int(dislikes_element.text.strip())
-                        except ValueError:
-                            pass
-                    bought_element = review.select_one('[aria-label="uzhe_kupil"]')
-                    data['bought'] = bool(bought_element)
-                    photo_elements = review.select('.comment__photo, .comment__image')
-                    for photo in photo_elements:
-                        if 'src' in photo.attrs:
-                            data['comment_photos'].append(photo['src'])
-                    reviews.append(data)
-                browser.close()
+                reviews = parse_rozetka_reviews(page.content(), max_reviews)
             break  # якщо все ок — виходимо з циклу
-        except PlaywrightTimeoutError:
-            logging.warning(f"PlaywrightTimeoutError для URL: {url}, спроба {attempt+1} з {max_attempts}")
-            if attempt < max_attempts - 1:
-                time.sleep(2)
-                continue
-            else:
-                raise
         except Exception as e:
-            logging.error(f"Playwright error для URL: {url}: {e}")
-            if attempt < max_attempts - 1:
-                time.sleep(2)
-                continue
-            else:
+            # Таймаут селектора чи неправильна адреса не виправляться повтором
+            delay = browser_retry_delay(e, url, attempt, max_attempts)
+            if delay is None:
+                logging.error(f"Playwright error для URL: {url}, спроба {attempt} з {max_attempts}: {e}")
                 raise
+            logging.warning(f"Playwright error для URL: {url}, спроба {attempt} з {max_attempts}, "
+                            f"повтор через {delay:.1f} с: {e}")
+            time.sleep(delay)
     return product_title, reviews
 
 # --- Додаю використання цієї функції у ReviewExtractor ---
 
 old_extract_reviews = ReviewExtractor.extract_reviews
 
-def extract_reviews(self, html_content, url):
+def extract_reviews(self, html_content, url, max_reviews=None, known=None):
     if 'rozetka.com.ua' in url:
-        product_title, reviews = extract_rozetka_reviews_playwright(url)
+        if html_content:
+            # Сторінка вже завантажена (extract_page_content або пакет) - повторно браузер не відкриваємо
+            product_title = parse_rozetka_title(html_content)
+            reviews = parse_rozetka_reviews(html_content, max_reviews)
+        else:
+            product_title, reviews = extract_rozetka_reviews_playwright(url, max_reviews=max_reviews, known=known)
         return {
             'product_title': product_title,
             'reviews': reviews,
             'platform': 'rozetka.com.ua'
         }
     else:
-        return old_extract_reviews(self, html_content, url)
+        result = old_extract_reviews(self, html_content, url)
+        if max_reviews and result:
+            result['reviews'] = result['reviews'][:max_reviews]
+        return result
 
 ReviewExtractor.extract_reviews = extract_reviews 
\ No newline at end of file
@@ -0,0 +1,91 @@
+import logging
+import os
+import random
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Експоненційна затримка з повним джитером для спроби attempt (з 1)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+def build_session(pool_size):
+    """Створює requests.Session з пулом keep-alive з'єднань заданого розміру"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_shared_session = None
+_shared_session_pid = None
+_shared_session_lock = threading.Lock()
+
+
+def get_shared_session():
+    """Повертає спільну для процесу сесію; після fork воркера створюється нова"""
+    global _shared_session, _shared_session_pid
+    with _shared_session_lock:
+        if _shared_session is None or _shared_session_pid != os.getpid():
+            _shared_session = build_session(Config.AI_HTTP_POOL_SIZE)
+            _shared_session_pid = os.getpid()
+        return _shared_session
+
+
+class RequestStats:
+    """Лічильники викликів, повторів і затримок HTTP клієнта"""
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record_attempt(self, retry: bool):
+        with self._lock:
+            self.attempts += 1
+            if retry:
+                self.retries += 1
+
+    def record_call(self, latency: float, failed: bool = False):
+        with self._lock:
+            self.calls += 1
+            if failed:
+                self.failures += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self._latencies.append(latency)
+
+    def snapshot(self) -> dict:
+        """Повертає поточні метрики, включно з p50/p95 за останні виклики"""
+        with self._lock:
+            recent = sorted(self._latencies)
+            return {
+                'calls': self.calls,
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'failures': self.failures,
+                'avg_latency': round(self.total_latency / self.calls, 3) if self.calls else None,
+                'max_latency': round(self.max_latency, 3),
+                'p50_latency': round(recent[len(recent) // 2], 3) if recent else None,
+                'p95_latency': round(recent[int(len(recent) * 0.95)], 3) if recent else None
+            }
+
+    def reset(self):
+        with self._lock:
+            self._latencies.clear()
+            self.calls = self.attempts = self.retries = self.failures = 0
+            self.total_latency = self.max_latency = 0.0
@@ -0,0 +1,115 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from flask import current_app
+
+from app.extractors.factory import ExtractorFactory
+from app.services.extraction_plan import get_extraction_plan
+from app.services.extractor import ReviewExtractor
+from app.services.http_client import get_shared_session
+from app.services.pagination import Paginator
+from app.services.rate_limit import RateLimit, wait_for_slot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'uk-UA,uk;q=0.9,en-US;q=0.8,en;q=0.7'
+}
+
+class HttpReviewFetcher:
+    """Завантажує серверну сторінку списку відгуків без браузера.
+
+    Адреса списку будується з url_patterns.reviews конфігурації платформи,
+    заголовки беруться з headers, наступні сторінки обходить Paginator,
+    завантажуючи їх паралельно через спільну сесію. Сторінки парсяться тим
+    самим скомпільованим планом, що й HTML з браузера.
+    """
+
+    def __init__(self, plan, session=None, workers: int = None, timeout: float = None):
+        config = plan.config
+        self.plan = plan
+        self.engine = plan.engine
+        self.session = session or get_shared_session()
+        self.workers = workers or current_app.config['HTTP_FETCH_WORKERS']
+        self.timeout = timeout or current_app.config['HTTP_FETCH_TIMEOUT']
+        self.headers = config.get('headers') or DEFAULT_HEADERS
+        self.base_url = config.get('base_url') or f'https://{plan.domain}'
+        self.reviews_pattern = (config.get('url_patterns') or {}).get('reviews')
+        # Ліміт береться тут: get_many виконує запити в потоках без контексту застосунку
+        self.rate_limit = RateLimit.from_config(config)
+        self.paginator = Paginator(plan, self.get_many, max_workers=self.workers)
+
+    def reviews_url(self, product_id):
+        if not self.reviews_pattern:
+            raise ValueError(f'Для {self.plan.domain} не задано url_patterns.reviews')
+        return urljoin(self.base_url, self.reviews_pattern.format(product_id=product_id))
+
+    def get(self, url):
+        wait_for_slot(url, self.rate_limit)
+        response = self.session.get(url, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def get_many(self, urls):
+        """Завантажує сторінки паралельно; для невдалих повертає виняток"""
+        def get(url):
+            try:
+                return self.get(url)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(get, urls))
+
+    def fetch(self, url, product_id, max_reviews=None, on_page=None, known=None):
+        """Повертає результат у форматі ExtractionPlan.extract для всіх сторінок відгуків.
+
+        З known (ключі збережених відгуків) повертаються лише нові відгуки.
+        """
+        started = time.monotonic()
+        first_url = self.reviews_url(product_id)
+        first_page = self.get(first_url)
+        first_document = self.engine.parse(first_page)
+        product_title = self.plan.find_title(first_document)
+        reviews = self.plan.extract_reviews(first_document)
+        if not reviews and not product_title:
+            raise ValueError('Сторінка списку відгуків не містить відгуків')
+
+        if on_page:
+            on_page(first_url, first_page)
+        reviews, pages = self.paginator.collect(first_document, first_url, reviews, max_reviews, on_page, known)
+        if not product_title:
+            # Список відгуків може не містити назви товару - беремо її зі сторінки товару
+            product_title = self.plan.find_title(self.engine.parse(self.get(url)))
+
+        current_app.logger.info(
+            f"HTTP режим: {len(reviews)} відгуків з {pages} сторінок за {time.monotonic() - started:.2f} с"
+        )
+        return {
+            'product_title': product_title,
+            'reviews': reviews,
+            'platform': self.plan.domain
+        }
+
+
+def http_mode_enabled(url):
+    """Чи можна витягувати відгуки платформи URL без браузера"""
+    return ReviewExtractor().detect_platform(url) in current_app.config['HTTP_MODE_PLATFORMS']
+
+
+def fetch_reviews_http(url, max_reviews=None, on_page=None, known=None):
+    """Витягує відгуки по HTTP; повертає None, якщо треба скористатися браузером"""
+    platform = ReviewExtractor().detect_platform(url)
+    try:
+        extractor = ExtractorFactory.create_extractor(platform)
+        product_id = extractor.get_product_id_from_url(url) if extractor else None
+        if not product_id:
+            raise ValueError(f'Не вдалося визначити id товару з URL {url}')
+        return HttpReviewFetcher(get_extraction_plan(url)).fetch(url, product_id, max_reviews, on_page, known)
+    except Exception as e:
+        current_app.logger.warning(f"HTTP режим не спрацював для {url}, використовуємо браузер: {str(e)}")
+        return None
@@ -0,0 +1,494 @@
+import logging
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from app import db
+from app.models.extraction import Extraction, ExtractionBatch
+from app.services.browser_fetcher import fetch_html_batch
+from app.services.circuit_breaker import CLOSED, CircuitOpen, circuit_breaker
+from app.services.extraction_plan import normalize_domain
+from app.services.extractor import ReviewExtractor, extract_page_content, review_item_selector
+from app.services.http_reviews import fetch_reviews_http, http_mode_enabled
+from app.services.pagination import paginate_with_browser
+from app.services.retry_policy import classify_url_error
+from app.services.review_store import bulk_insert_reviews, is_known, known_review_keys
+from app.services.snapshots import prune_snapshots, save_snapshots
+from app.services.summaries import warm_summary
+
+logger = logging.getLogger(__name__)
+
+# Статуси, з яких задачу ще можна скасувати
+CANCELLABLE_STATUSES = ('pending', 'processing')
+
+EXTRACTION_MODES = ('full', 'incremental')
+
+
+def latest_product_extraction(user, url):
+    """Останній завершений витяг користувача для URL - запис товару для інкрементальних оновлень"""
+    return Extraction.query.filter_by(user_id=user.id, url=url, status='completed') \
+        .order_by(Extraction.completed_at.desc(), Extraction.id.desc()).first()
+
+
+def enqueue_extraction(user, url, mode='full'):
+    """Створює витяг у статусі pending, який підхопить один з воркерів.
+
+    В інкрементальному режимі новий витяг не створюється: останній
+    завершений витяг URL повертається в чергу, і воркер допише до нього
+    лише нові відгуки. Якщо такого витягу немає, виконується повний.
+    """
+    if mode == 'incremental':
+        extraction = latest_product_extraction(user, url)
+        if extraction is not None:
+            extraction.mode = 'incremental'
+            extraction.status = 'pending'
+            extraction.started_at = None
+            extraction.error_message = None
+            db.session.commit()
+            return extraction
+
+    extraction = Extraction(
+        url=url,
+        status='pending',
+        created_at=datetime.utcnow(),
+        user_id=user.id,
+        platform='unknown'
+    )
+    db.session.add(extraction)
+    db.session.commit()
+    return extraction
+
+
+def enqueue_batch(user, urls, submitted_count, duplicate_count):
+    """Створює пакет і витяг pending для кожного URL одним комітом.
+
+    urls - список пар (URL, платформа) після перевірки та дедуплікації.
+    """
+    now = datetime.utcnow()
+    batch = ExtractionBatch(
+        user_id=user.id,
+        created_at=now,
+        submitted_count=submitted_count,
+        duplicate_count=duplicate_count
+    )
+    db.session.add(batch)
+    db.session.flush()
+    db.session.add_all([
+        Extraction(url=url, status='pending', created_at=now, user_id=user.id, platform=platform, batch_id=batch.id)
+        for url, platform in urls
+    ])
+    db.session.commit()
+    return batch
+
+
+def cancel_extraction(extraction):
+    """Скасовує задачу, якщо вона ще не завершилась.
+
+    Інкрементальне оновлення працює з уже завершеним витягом товару, тож
+    після скасування витяг повертається в completed: ще не взяте
+    оновлення - одразу, а те, що виконується, - воркером на найближчій
+    перевірці скасування.
+    """
+    if extraction.status not in CANCELLABLE_STATUSES:
+        return False
+    if extraction.mode == 'incremental':
+        restored = Extraction.query.filter_by(id=extraction.id, status='pending').update(
+            {'status': 'completed'}, synchronize_session=False
+        )
+        db.session.commit()
+        db.session.refresh(extraction)
+        if restored:
+            return True
+        if extraction.status not in CANCELLABLE_STATUSES:
+            return False
+    extraction.status = 'cancelled'
+    extraction.completed_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def restore_cancelled_refresh(extraction):
+    """Повертає скасоване інкрементальне оновлення в completed з наявними відгуками"""
+    Extraction.query.filter_by(id=extraction.id, status='cancelled').update(
+        {'status': 'completed'}, synchronize_session=False
+    )
+    db.session.commit()
+
+
+def is_cancelled(extraction_id):
+    """Перевіряє статус задачі напряму в базі, оминаючи кеш сесії"""
+    status = db.session.query(Extraction.status).filter_by(id=extraction_id).scalar()
+    return status == 'cancelled'
+
+
+def claim_next_job():
+    """Атомарно забирає найстарішу задачу pending і переводить її в processing"""
+    while True:
+        job_id = db.session.query(Extraction.id).filter_by(status='pending') \
+            .order_by(Extraction.id).limit(1).scalar()
+        if job_id is None:
+            return None
+
+        # Умова по статусу гарантує, що задачу забере лише один воркер
+        now = datetime.utcnow()
+        claimed = Extraction.query.filter_by(id=job_id, status='pending').update(
+            {'status': 'processing', 'started_at': now, 'heartbeat_at': now},
+            synchronize_session=False
+        )
+        db.session.commit()
+        if claimed:
+            return Extraction.query.get(job_id)
+
+
+def claim_batch_jobs(extraction, limit):
+    """Забирає ще до limit задач того ж пакета й платформи, щоб завантажити їх разом"""
+    job_ids = db.session.query(Extraction.id).filter_by(
+        batch_id=extraction.batch_id, platform=extraction.platform, status='pending'
+    ).order_by(Extraction.id).limit(limit).all()
+
+    claimed_ids = []
+    now = datetime.utcnow()
+    for (job_id,) in job_ids:
+        claimed = Extraction.query.filter_by(id=job_id, status='pending').update(
+            {'status': 'processing', 'started_at': now, 'heartbeat_at': now},
+            synchronize_session=False
+        )
+        if claimed:
+            claimed_ids.append(job_id)
+    db.session.commit()
+    if not claimed_ids:
+        return []
+    return Extraction.query.filter(Extraction.id.in_(claimed_ids)).order_by(Extraction.id).all()
+
+
+def requeue_stale_jobs(timeout):
+    """Повертає в чергу задачі, воркер яких завершився посеред обробки.
+
+    Живий воркер оновлює heartbeat_at своїх задач кожні JOB_HEARTBEAT_INTERVAL
+    секунд, тож довгі витяги й задачі пакета, взяті наперед, не вважаються
+    завислими, скільки б вони не тривали.
+    """
+    deadline = datetime.utcnow() - timedelta(seconds=timeout)
+    count = Extraction.query.filter(
+        Extraction.status == 'processing',
+        func.coalesce(Extraction.heartbeat_at, Extraction.started_at) < deadline
+    ).update({'status': 'pending', 'started_at': None, 'heartbeat_at': None}, synchronize_session=False)
+    db.session.commit()
+    if count:
+        logger.warning(f"Повернуто в чергу завислих задач: {count}")
+    return count
+
+
+class JobHeartbeat:
+    """Фоновий потік воркера, який позначає задачі в обробці як живі"""
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+        self._ids = ()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='job-heartbeat', daemon=True)
+        self._thread.start()
+        return self
+
+    def hold(self, extractions):
+        """Задачі, які воркер щойно взяв; попередні більше не позначаються"""
+        with self._lock:
+            self._ids = tuple(extraction.id for extraction in extractions)
+
+    def release(self):
+        with self._lock:
+            self._ids = ()
+
+    def beat(self):
+        with self._lock:
+            ids = self._ids
+        if not ids:
+            return 0
+        count = Extraction.query.filter(Extraction.id.in_(ids), Extraction.status == 'processing').update(
+            {'heartbeat_at': datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        return count
+
+    def _run(self):
+        # Окремий контекст застосунку - окрема сесія бази, незалежна від воркера
+        with self.app.app_context():
+            while not self._stop.wait(self.interval):
+                try:
+                    self.beat()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.warning(f"Не вдалося оновити heartbeat задач: {str(e)}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def _fail(extraction, message):
+    # Невдале оновлення не псує вже зібрані відгуки товару
+    status = 'completed' if extraction.mode == 'incremental' else 'error'
+    # Умова по статусу: задача, скасована під час обробки, лишається скасованою
+    updated = Extraction.query.filter(
+        Extraction.id == extraction.id, Extraction.status != 'cancelled'
+    ).update(
+        {'status': status, 'error_message': message, 'completed_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+    db.session.commit()
+    if not updated and extraction.mode == 'incremental':
+        restore_cancelled_refresh(extraction)
+
+
+def run_extraction_job(extraction, html_content=None):
+    """Виконує витяг: завантажує сторінку, парсить відгуки та зберігає їх.
+
+    Якщо html_content передано, сторінка вже завантажена і лише парситься.
+    В інкрементальному режимі скрол і пагінація зупиняються на вже
+    збережених відгуках, а до витягу дописуються лише нові. Поки circuit
+    breaker платформи відкритий, задача одразу завершується помилкою;
+    таймаут селектора відгуків і порожній парсинг рахуються як збій платформи.
+    """
+    url = extraction.url
+    domain = normalize_domain(url)
+    try:
+        circuit_breaker.check(domain)
+    except CircuitOpen as e:
+        _fail(extraction, str(e))
+        return
+
+    max_reviews = extraction.user.get_max_reviews_per_url()
+    known = known_review_keys(extraction.id) if extraction.mode == 'incremental' else None
+
+    # Завантажені сторінки [(url, html), ...] для сховища знімків
+    pages = []
+
+    def on_page(page_url, html):
+        pages.append((page_url, html))
+
+    # Підсумок для circuit breaker: причина збою платформи або успіх
+    failure = None
+    succeeded = False
+    try:
+        result = None
+        if html_content is None and http_mode_enabled(url):
+            # Серверні сторінки відгуків без браузера; None - повертаємось до Playwright
+            result = fetch_reviews_http(url, max_reviews=max_reviews, on_page=on_page, known=known)
+
+        if result is None:
+            pages.clear()
+            if html_content is None:
+                html_content = extract_page_content(url, max_reviews=max_reviews, known=known)
+            if not html_content:
+                _fail(extraction, 'Не вдалося отримати вміст сторінки')
+                return
+
+            on_page(url, html_content)
+            extractor = ReviewExtractor()
+            result = extractor.extract_reviews(html_content, url, max_reviews=max_reviews, known=known)
+            if isinstance(result, dict) and result.get('reviews'):
+                # Наступні сторінки відгуків, якщо платформа має блок pagination
+                result['reviews'] = paginate_with_browser(
+                    url, html_content, result['reviews'], max_reviews, on_page=on_page, known=known
+                )
+
+        if not result:
+            failure = 'Порожній результат парсингу'
+            _fail(extraction, 'Не вдалося витягти відгуки')
+            return
+
+        if not isinstance(result, dict) or 'reviews' not in result:
+            _fail(extraction, 'Неправильний формат результату витягу')
+            return
+
+        if not result['reviews'] and not result.get('product_title'):
+            # Ні назви, ні відгуків - селектори платформи, найімовірніше, застаріли
+            failure = 'Порожній результат парсингу'
+            current_app.logger.warning(f"Витяг {extraction.id}: сторінка {url} розібрана без результату")
+        else:
+            succeeded = True
+
+        if is_cancelled(extraction.id):
+            current_app.logger.info(f"Витяг {extraction.id} скасовано, результати не зберігаються")
+            if extraction.mode == 'incremental':
+                restore_cancelled_refresh(extraction)
+            return
+
+        if known is not None:
+            result['reviews'] = [review for review in result['reviews'] if not is_known(review, known)]
+
+        # Зберігаємо результати одним пакетним запитом
+        bulk_insert_reviews(extraction.id, result['reviews'])
+        save_snapshots(extraction.id, pages)
+
+        # Умова по статусу в тій самій транзакції, що й відгуки: скасування,
+        # яке встигло між перевіркою вище і цим записом, не перезаписується
+        completed = Extraction.query.filter(
+            Extraction.id == extraction.id, Extraction.status != 'cancelled'
+        ).update({
+            'status': 'completed',
+            'title': result.get('product_title') or (extraction.title if known is not None else ''),
+            'platform': result.get('platform', 'unknown'),
+            'completed_at': datetime.utcnow()
+        }, synchronize_session=False)
+        if not completed:
+            db.session.rollback()
+            current_app.logger.info(f"Витяг {extraction.id} скасовано під час збереження, результати відкинуто")
+            if extraction.mode == 'incremental':
+                restore_cancelled_refresh(extraction)
+            return
+        db.session.commit()
+        current_app.logger.info(
+            f"Витяг {extraction.id} завершено, "
+            + (f"нових відгуків: {len(result['reviews'])}" if known is not None else f"відгуків: {len(result['reviews'])}")
+        )
+
+        if current_app.config['SUMMARY_WARMUP'] and result['reviews']:
+            warm_summary(extraction)
+
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error processing extraction {extraction.id}: {str(e)}")
+        verdict = classify_url_error(e, url)
+        if verdict.breaker:
+            failure = verdict.solution or type(e).__name__
+        _fail(extraction, f'Помилка обробки: {str(e)}' + (f' ({verdict.solution})' if verdict.solution else ''))
+    finally:
+        if failure:
+            circuit_breaker.record_failure(domain, failure)
+        elif succeeded:
+            circuit_breaker.record_success(domain)
+        else:
+            # Скасування чи помилка, не пов'язана з розміткою, нічого не каже про платформу
+            circuit_breaker.release(domain)
+
+
+def run_batch_jobs(extractions):
+    """Завантажує сторінки задач пакета паралельно, а потім парсить кожну"""
+    if http_mode_enabled(extractions[0].url):
+        # Платформа з HTTP режимом: браузер запуститься лише для задач, де HTTP не спрацював
+        for extraction in extractions:
+            run_extraction_job(extraction)
+        return
+
+    domain = normalize_domain(extractions[0].url)
+    if circuit_breaker.state(domain) != CLOSED:
+        # Платформа призупинена: задачі завершаться одразу, а пробна завантажить сторінку сама
+        for extraction in extractions:
+            run_extraction_job(extraction)
+        return
+
+    max_reviews = extractions[0].user.get_max_reviews_per_url()
+    item_selector = review_item_selector(extractions[0].url)
+    started = time.monotonic()
+    try:
+        pages = fetch_html_batch(
+            [extraction.url for extraction in extractions],
+            wait_selector=item_selector,
+            scroll_selector=item_selector,
+            max_items=max_reviews
+        )
+    except Exception as e:
+        current_app.logger.error(f"Не вдалося запустити паралельне завантаження: {str(e)}")
+        pages = [e] * len(extractions)
+    current_app.logger.info(
+        f"Пакет {extractions[0].batch_id}: завантажено {len(extractions)} сторінок за {time.monotonic() - started:.1f} с"
+    )
+
+    for extraction, page in zip(extractions, pages):
+        if isinstance(page, Exception):
+            verdict = classify_url_error(page, extraction.url)
+            if verdict.breaker:
+                circuit_breaker.record_failure(domain, verdict.solution or type(page).__name__)
+            _fail(extraction, f'Помилка завантаження сторінки: {str(page)}'
+                  + (f' ({verdict.solution})' if verdict.solution else ''))
+            continue
+        run_extraction_job(extraction, html_content=page)
+
+
+def worker_loop(app, poll_interval=None, max_jobs=None):
+    """Нескінченно забирає задачі з черги та виконує їх"""
+    with app.app_context():
+        poll_interval = poll_interval or current_app.config['JOB_POLL_INTERVAL']
+        requeue_interval = current_app.config['JOB_REQUEUE_INTERVAL']
+        prune_snapshots()
+        heartbeat = JobHeartbeat(app, current_app.config['JOB_HEARTBEAT_INTERVAL']).start()
+        try:
+            _process_jobs(heartbeat, poll_interval, requeue_interval, max_jobs)
+        finally:
+            heartbeat.stop()
+
+
+def _process_jobs(heartbeat, poll_interval, requeue_interval, max_jobs):
+    """Цикл воркера: задачі, які він обробляє, позначаються heartbeat"""
+    processed = 0
+    requeued_at = None
+    while max_jobs is None or processed < max_jobs:
+        # Задачі воркера, що впав посеред обробки, повертаються в чергу без перезапуску інших
+        if requeued_at is None or time.monotonic() - requeued_at >= requeue_interval:
+            requeue_stale_jobs(current_app.config['JOB_STALE_TIMEOUT'])
+            requeued_at = time.monotonic()
+        extraction = claim_next_job()
+        if extraction is None:
+            db.session.remove()
+            time.sleep(poll_interval)
+            continue
+        current_app.logger.info(f"Воркер взяв витяг {extraction.id}: {extraction.url}")
+        if extraction.batch_id:
+            # Задачі пакета беруться групою, сторінки групи завантажуються паралельно
+            jobs = [extraction] + claim_batch_jobs(extraction, current_app.config['BATCH_FETCH_SIZE'] - 1)
+        else:
+            jobs = [extraction]
+        heartbeat.hold(jobs)
+        try:
+            if extraction.batch_id:
+                run_batch_jobs(jobs)
+            else:
+                run_extraction_job(extraction)
+        finally:
+            heartbeat.release()
+        db.session.remove()
+        processed += len(jobs)
+
+
+def _worker_process_main():
+    from app import create_app
+    worker_loop(create_app())
+
+
+def _start_worker(number):
+    process = multiprocessing.Process(target=_worker_process_main, name=f'extraction-worker-{number}')
+    process.start()
+    return process
+
+
+def run_workers(concurrency=None):
+    """Запускає пул локальних процесів-воркерів і перезапускає ті, що завершились"""
+    from config import Config
+    concurrency = concurrency or Config.EXTRACTION_WORKERS
+    processes = [_start_worker(i + 1) for i in range(concurrency)]
+    logger.info(f"Запущено воркерів: {concurrency}")
+
+    try:
+        while True:
+            time.sleep(Config.WORKER_CHECK_INTERVAL)
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    process.join()
+                    logger.warning(f"Воркер {process.name} завершився з кодом {process.exitcode}, перезапускаємо")
+                    processes[i] = _start_worker(i + 1)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
@@ -0,0 +1,197 @@
+import logging
+import math
+import re
+from urllib.parse import urljoin
+
+from flask import current_app
+
+from app.services.browser_fetcher import shared_fetcher
+from app.services.extraction_plan import get_extraction_plan
+from app.services.extractor import review_item_selector
+from app.services.review_store import is_known, review_data_key
+
+logger = logging.getLogger(__name__)
+
+
+def merge_reviews(reviews, new_reviews, seen_ids):
+    """Додає відгуки сторінки, пропускаючи вже знайдені.
+
+    seen_ids - ключі review_key знайдених відгуків. Відгуки з
+    platform_review_id не повторюються ніде; відгуки без нього (Rozetka)
+    зіставляються за автором, датою й текстом лише з попередніми
+    сторінками, щоб однакові відгуки однієї сторінки не злипались.
+    """
+    page_keys = set()
+    for review in new_reviews:
+        key = review_data_key(review)
+        if key in seen_ids:
+            continue
+        if key[0] == 'id':
+            seen_ids.add(key)
+        else:
+            page_keys.add(key)
+        reviews.append(review)
+    seen_ids.update(page_keys)
+
+
+def drop_known(reviews, known):
+    """Повертає (відгуки, яких немає серед known, чи траплявся хоч один відомий)"""
+    if not known:
+        return reviews, False
+    new_reviews = [review for review in reviews if not is_known(review, known)]
+    return new_reviews, len(new_reviews) < len(reviews)
+
+
+class Paginator:
+    """Обходить сторінки відгуків за блоком selectors.pagination конфігурації платформи.
+
+    Кількість сторінок визначається з посилань пагінації першої сторінки
+    (параметр page_param у href), адреси решти сторінок будуються з шаблону
+    такого посилання і завантажуються паралельно вікнами по max_workers.
+    Якщо номерів не видно, сторінки обходяться послідовно за next_page.
+    В інкрементальному режимі обхід зупиняється на першій сторінці з уже
+    збереженими відгуками: сторінки впорядковані від нових відгуків до старих.
+
+    fetch_pages(urls) завантажує список адрес і повертає для кожної HTML або
+    виняток - так паджинатор однаково працює з HTTP сесією і з браузером.
+    """
+
+    def __init__(self, plan, fetch_pages, max_workers: int = None, max_pages: int = None):
+        self.plan = plan
+        self.engine = plan.engine
+        self.fetch_pages = fetch_pages
+        self.max_workers = max_workers or current_app.config['PAGINATION_WORKERS']
+        self.max_pages = max_pages or current_app.config['PAGINATION_MAX_PAGES']
+
+        pagination = (plan.config.get('selectors') or {}).get('pagination') or {}
+        self.enabled = bool(pagination)
+        self.page_param = pagination.get('page_param', 'page')
+        self.next_page = self.engine.compile(pagination['next_page']) if pagination.get('next_page') else None
+        self.page_links = self.engine.compile(f'a[href*="{self.page_param}="]')
+        # Номер сторінки в запиті (?page=2) або в шляху (/page=2/)
+        self.page_number = re.compile(rf'(?<=[?&/;]){re.escape(self.page_param)}=(\d+)')
+
+    def discover(self, document, page_url):
+        """Повертає (шаблон адреси сторінки, номер останньої видимої сторінки, адресу наступної)"""
+        template = None
+        last_page = None
+        for link in self.page_links.select(document):
+            href = self.engine.get(link, 'href') or ''
+            match = self.page_number.search(href)
+            if match:
+                template = urljoin(page_url, href)
+                last_page = max(last_page or 0, int(match.group(1)))
+
+        next_url = None
+        if self.next_page is not None:
+            link = self.next_page.select_one(document)
+            href = self.engine.get(link, 'href') if link is not None else None
+            if href:
+                next_url = urljoin(page_url, href)
+        return template, last_page, next_url
+
+    def page_url(self, template, number):
+        return self.page_number.sub(f'{self.page_param}={number}', template, count=1)
+
+    def _fetch(self, urls, reviews, seen_ids, on_page, known):
+        """Завантажує сторінки й додає їх нові відгуки.
+
+        Повертає (останню успішну (документ, адреса), чи траплялися відомі відгуки).
+        """
+        last = None
+        reached_known = False
+        for url, html in zip(urls, self.fetch_pages(urls)):
+            if isinstance(html, Exception):
+                current_app.logger.warning(f"Сторінку відгуків {url} не завантажено: {str(html)}")
+                continue
+            if on_page:
+                on_page(url, html)
+            document = self.engine.parse(html)
+            page_reviews, page_known = drop_known(self.plan.extract_reviews(document), known)
+            merge_reviews(reviews, page_reviews, seen_ids)
+            reached_known = reached_known or page_known
+            last = (document, url)
+        return last, reached_known
+
+    def collect(self, first_document, first_url, first_reviews, max_reviews=None, on_page=None, known=None):
+        """Збирає відгуки з усіх сторінок, починаючи з уже розібраної першої.
+
+        Зупиняється, щойно набрано max_reviews відгуків або, якщо передано
+        known (ключі review_key збережених відгуків), на сторінці з уже
+        відомими відгуками. on_page(url, html) викликається для кожної
+        завантаженої сторінки. Повертає (нові відгуки без повторів з
+        попередніх сторінок, кількість оброблених сторінок).
+        """
+        reviews = []
+        seen_ids = set()
+        new_reviews, reached_known = drop_known(first_reviews, known)
+        merge_reviews(reviews, new_reviews, seen_ids)
+        per_page = len(first_reviews)
+        pages = 1
+        if not self.enabled or not per_page or reached_known:
+            return reviews, pages
+
+        def capped():
+            return bool(max_reviews) and len(reviews) >= max_reviews
+
+        page, document, url = 1, first_document, first_url
+        while not capped() and not reached_known and pages < self.max_pages:
+            template, last_page, next_url = self.discover(document, url)
+            if template and last_page and last_page > page:
+                numbers = list(range(page + 1, min(last_page, page + self.max_pages - pages) + 1))
+                last = None
+                while numbers and not capped() and not reached_known:
+                    # Вікно не більше пулу і не більше сторінок, ніж потрібно до ліміту
+                    needed = math.ceil((max_reviews - len(reviews)) / per_page) if max_reviews else len(numbers)
+                    window, numbers = numbers[:min(self.max_workers, needed)], numbers[min(self.max_workers, needed):]
+                    fetched, reached_known = self._fetch(
+                        [self.page_url(template, number) for number in window], reviews, seen_ids, on_page, known
+                    )
+                    last = fetched or last
+                    pages += len(window)
+                    page = window[-1]
+                if last is None:
+                    break
+                document, url = last
+            elif next_url:
+                last, reached_known = self._fetch([next_url], reviews, seen_ids, on_page, known)
+                pages += 1
+                page += 1
+                if last is None:
+                    break
+                document, url = last
+            else:
+                break
+
+        if max_reviews:
+            reviews = reviews[:max_reviews]
+        current_app.logger.info(
+            f"Пагінація: {len(reviews)} відгуків з {pages} сторінок"
+            + (', зупинено на вже збережених відгуках' if reached_known else '')
+        )
+        return reviews, pages
+
+
+def paginate_with_browser(url, html_content, reviews, max_reviews=None, on_page=None, known=None):
+    """Дозбирає відгуки з наступних сторінок, завантажуючи їх паралельно в браузері.
+
+    Усі раунди пагінації товару завантажуються в одному контексті
+    довгоживучого браузера процесу. reviews - усі відгуки першої сторінки;
+    з known повертаються лише нові.
+    """
+    if max_reviews and len(reviews) >= max_reviews:
+        return drop_known(reviews, known)[0]
+    plan = get_extraction_plan(url)
+    item_selector = review_item_selector(url)
+
+    with shared_fetcher.session() as session:
+        def fetch_pages(urls):
+            try:
+                return session.fetch_many(urls, wait_selector=item_selector)
+            except Exception as e:
+                return [e] * len(urls)
+
+        reviews, _ = Paginator(plan, fetch_pages).collect(
+            plan.engine.parse(html_content), url, reviews, max_reviews, on_page, known
+        )
+    return reviews
@@ -0,0 +1,162 @@
+import logging
+
+import soupsieve as sv
+from bs4 import BeautifulSoup
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# Значення parser.type, яке вмикає швидкий рушій на lxml замість BeautifulSoup
+LXML_ENGINE_TYPE = 'lxml'
+
+# BeautifulSoup не включає текст цих тегів у .text батьківського елемента
+_SKIPPED_TEXT_TAGS = ('script', 'style', 'template')
+
+_TEXT_XPATH = etree.XPath(
+    "descendant::text()[not(parent::script) and not(parent::style) and not(ancestor::template)]",
+    smart_strings=False
+)
+
+
+def parser_name(config):
+    """Визначає парсер з ключа parser конфігурації (рядок або словник)"""
+    parser = config.get('parser', 'lxml')
+    if isinstance(parser, dict):
+        # config: {"type": "html", "config": {"parser": "lxml"}}
+        parser = parser.get('config', {}).get('parser', 'lxml')
+    return parser
+
+
+def parser_type(config):
+    """Повертає parser.type конфігурації, якщо parser задано словником"""
+    parser = config.get('parser')
+    if isinstance(parser, dict):
+        return parser.get('type')
+    return None
+
+
+class _InvalidSelector:
+    """Заглушка для селектора, який не вдалося скомпілювати"""
+
+    def __init__(self, selector, error):
+        self.pattern = selector
+        self.error = error
+
+    def _raise(self, *args):
+        raise ValueError(f"Невалідний селектор '{self.pattern}': {self.error}")
+
+    select_one = select = matches_by_item = _raise
+
+
+class SoupEngine:
+    """Рушій на BeautifulSoup: селектори компілюються через soupsieve"""
+
+    name = 'beautifulsoup'
+
+    def __init__(self, parser='lxml'):
+        self.parser = parser
+
+    def parse(self, html_content):
+        return BeautifulSoup(html_content, self.parser)
+
+    def compile(self, selector):
+        try:
+            return sv.compile(selector)
+        except Exception as e:
+            return _InvalidSelector(selector, e)
+
+    def text(self, elem):
+        return elem.text
+
+    def get(self, elem, attribute):
+        return elem.get(attribute)
+
+    def field_locator(self, document, review_items):
+        """Шукає поле відгуку окремим select_one всередині кожного відгуку"""
+        return lambda selector, item: selector.select_one(item)
+
+
+class _XPathSelector:
+    """CSS селектор, один раз перекладений у скомпільований XPath"""
+
+    def __init__(self, selector, expression):
+        self.pattern = selector
+        self._all = etree.XPath(expression)
+        self._first = etree.XPath(f"({expression})[1]")
+
+    def select(self, root):
+        return self._all(root)
+
+    def select_one(self, root):
+        found = self._first(root)
+        return found[0] if found else None
+
+    def matches_by_item(self, root, review_items):
+        """Розподіляє збіги по сторінці між відгуками, яким вони належать.
+
+        Як і soupsieve, селектор перевіряється відносно всього документа,
+        а до відгуку потрапляє перший за порядком документа збіг серед його
+        нащадків. Один прохід XPath на сторінку замінює окремий запит на
+        кожен відгук.
+        """
+        items = set(review_items)
+        first_match = {}
+        for elem in self._all(root):
+            for ancestor in elem.iterancestors():
+                if ancestor in items and ancestor not in first_match:
+                    first_match[ancestor] = elem
+        return first_match
+
+
+class LxmlEngine:
+    """Рушій на lxml: CSS селектори перекладаються у XPath через cssselect один раз"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        # cssselect потрібен лише цьому рушію
+        from cssselect import HTMLTranslator
+        self._translator = HTMLTranslator()
+
+    def parse(self, html_content):
+        try:
+            root = etree.HTML(html_content)
+        except ValueError:
+            # Рядок з XML-декларацією кодування lxml приймає лише як байти
+            root = etree.HTML(html_content.encode('utf-8'), etree.HTMLParser(encoding='utf-8'))
+        if root is None:
+            root = etree.HTML('<html></html>')
+        return root
+
+    def compile(self, selector):
+        try:
+            expression = self._translator.css_to_xpath(selector, prefix='descendant-or-self::')
+            return _XPathSelector(selector, expression)
+        except Exception as e:
+            return _InvalidSelector(selector, e)
+
+    def text(self, elem):
+        if elem.tag in _SKIPPED_TEXT_TAGS:
+            return ''.join(elem.itertext())
+        return ''.join(_TEXT_XPATH(elem))
+
+    def get(self, elem, attribute):
+        return elem.get(attribute)
+
+    def field_locator(self, document, review_items):
+        """Шукає поля відгуків одним XPath на сторінку для кожного селектора"""
+        cache = {}
+
+        def locate(selector, item):
+            matches = cache.get(selector)
+            if matches is None:
+                matches = cache[selector] = selector.matches_by_item(document, review_items)
+            return matches.get(item)
+        return locate
+
+
+def engine_for(config):
+    """Повертає рушій парсингу за ключем parser конфігурації платформи"""
+    if parser_type(config) == LXML_ENGINE_TYPE:
+        return LxmlEngine()
+    return SoupEngine(parser_name(config))
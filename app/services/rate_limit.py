@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from config import Config
+from app.services.extraction_plan import get_extraction_plan, normalize_domain
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_bucket (
+    domain TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rate_wait (
+    domain TEXT PRIMARY KEY,
+    acquired INTEGER NOT NULL DEFAULT 0,
+    waited INTEGER NOT NULL DEFAULT 0,
+    total_wait REAL NOT NULL DEFAULT 0,
+    max_wait REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class RateLimitExceeded(Exception):
+    """Черга до домену довша, ніж дозволено чекати"""
+
+
+class RateLimit:
+    """Ліміт запитів до домену: rate запитів за секунду в середньому і до burst поспіль.
+
+    Береться з ключа rate_limit конфігурації платформи, а відсутні
+    значення - з налаштувань за замовчуванням. rate 0 вимикає ліміт.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+
+    @classmethod
+    def from_config(cls, config=None):
+        limit = (config or {}).get('rate_limit') or {}
+        return cls(
+            float(limit.get('rate', Config.RATE_LIMIT_DEFAULT_RATE)),
+            int(limit.get('burst', Config.RATE_LIMIT_DEFAULT_BURST))
+        )
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+
+class DomainRateLimiter:
+    """Token bucket для кожного домену в спільному файлі SQLite.
+
+    Стан відра зберігається в базі, тож ліміт діє одночасно для всіх
+    потоків і процесів-воркерів. Кожен виклик у транзакції BEGIN IMMEDIATE
+    забирає токен наперед (баланс може стати від'ємним) і отримує час, який
+    треба зачекати, - запити до домену виконуються рівномірно в порядку
+    черги. Час очікування в черзі накопичується по доменах для адмінки.
+    """
+
+    def __init__(self, path: str = None, enabled: bool = None, max_wait: float = None):
+        self.path = path or Config.RATE_LIMIT_PATH
+        self.enabled = enabled if enabled is not None else Config.RATE_LIMIT_ENABLED
+        self.max_wait = max_wait if max_wait is not None else Config.RATE_LIMIT_MAX_WAIT
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def reserve(self, domain, limit):
+        """Забирає токен домену і повертає, скільки секунд чекати до запиту"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_bucket WHERE domain = ?', (domain,)).fetchone()
+            tokens = limit.burst if row is None else min(limit.burst, row[0] + (now - row[1]) * limit.rate)
+            tokens -= 1
+            wait = max(0.0, -tokens / limit.rate)
+            if wait > self.max_wait:
+                raise RateLimitExceeded(f'Черга до {domain} перевищує {self.max_wait} с (потрібно {wait:.1f} с)')
+            conn.execute(
+                'INSERT OR REPLACE INTO rate_bucket (domain, tokens, updated_at) VALUES (?, ?, ?)',
+                (domain, tokens, now)
+            )
+            conn.execute('INSERT OR IGNORE INTO rate_wait (domain) VALUES (?)', (domain,))
+            conn.execute(
+                'UPDATE rate_wait SET acquired = acquired + 1, waited = waited + ?, '
+                'total_wait = total_wait + ?, max_wait = MAX(max_wait, ?) WHERE domain = ?',
+                (1 if wait > 0 else 0, wait, wait, domain)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def acquire(self, domain, limit):
+        """Чекає на свою чергу до домену; повертає час очікування"""
+        if not self.enabled or not limit.enabled:
+            return 0.0
+        wait = self.reserve(domain, limit)
+        if wait:
+            logger.debug(f"Ліміт запитів до {domain}: чекаємо {wait:.2f} с")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, domain, limit):
+        """Те саме, що acquire, без блокування циклу подій під час очікування"""
+        if not self.enabled or not limit.enabled:
+            return 0.0
+        wait = self.reserve(domain, limit)
+        if wait:
+            logger.debug(f"Ліміт запитів до {domain}: чекаємо {wait:.2f} с")
+            await asyncio.sleep(wait)
+        return wait
+
+    def reset_stats(self):
+        self._connection().execute('DELETE FROM rate_wait')
+
+    def stats(self) -> dict:
+        """Час очікування в черзі по доменах за всі процеси"""
+        if not self.enabled:
+            return {'enabled': False, 'domains': {}}
+        domains = {}
+        for domain, acquired, waited, total_wait, max_wait in self._connection().execute(
+            'SELECT domain, acquired, waited, total_wait, max_wait FROM rate_wait ORDER BY domain'
+        ):
+            domains[domain] = {
+                'requests': acquired,
+                'waited': waited,
+                'avg_wait': round(total_wait / acquired, 3) if acquired else None,
+                'max_wait': round(max_wait, 3),
+                'total_wait': round(total_wait, 3)
+            }
+        return {'enabled': True, 'max_wait': self.max_wait, 'domains': domains}
+
+
+rate_limiter = DomainRateLimiter()
+
+
+def limit_for(url):
+    """Ліміт запитів платформи URL"""
+    try:
+        config = get_extraction_plan(url).config
+    except Exception as e:
+        logger.debug(f"Немає конфігурації платформи для {url}, ліміт за замовчуванням: {str(e)}")
+        config = None
+    return RateLimit.from_config(config)
+
+
+def wait_for_slot(url, limit=None):
+    """Чекає на дозвіл ліміту перед запитом до домену URL"""
+    if not rate_limiter.enabled:
+        return 0.0
+    return rate_limiter.acquire(normalize_domain(url), limit or limit_for(url))
+
+
+async def wait_for_slot_async(url, limit=None):
+    if not rate_limiter.enabled:
+        return 0.0
+    return await rate_limiter.acquire_async(normalize_domain(url), limit or limit_for(url))
@@ -0,0 +1,281 @@
+import logging
+import multiprocessing
+import os
+import time
+
+from flask import current_app
+from sqlalchemy import insert, update
+
+from app import db
+from app.models.extraction import Extraction, PageSnapshot, Review
+from app.services.extraction_plan import ExtractionPlan, get_extraction_plan, normalize_domain
+from app.services.extractor import parse_rozetka_reviews
+from app.services.pagination import merge_reviews
+from app.services.review_store import (REVIEW_COLUMNS, SQLITE_MAX_VARIABLES, bump_review_revision, dedupe_rows,
+                                      review_key, review_mapping)
+from app.services.snapshots import SnapshotStore, snapshot_store
+
+logger = logging.getLogger(__name__)
+
+# Поля відгуку, зміна яких оновлює наявний рядок
+REVIEW_FIELDS = ('author', 'text', 'rating', 'date', 'advantages', 'disadvantages')
+
+# Платформи, які живий витяг розбирає власним парсером, а не планом з конфігурації
+LIVE_PARSERS = {
+    'rozetka.com.ua': parse_rozetka_reviews
+}
+
+# Стан процесу пулу: застосунок для логера, конфігурації платформ і сховище знімків
+_worker_state = {}
+
+
+def diff_reviews(existing, new_rows):
+    """Порівнює наявні рядки review з новими і повертає (вставки, оновлення, id для видалення).
+
+    existing - словники з id та полями REVIEW_FIELDS; оновлення містять id
+    і лише змінені поля. Відгуки без id платформи не оновлюються: змінений
+    вміст означає інший ключ, тобто видалення старого рядка і вставку нового.
+    """
+    by_key = {}
+    for row in existing:
+        by_key.setdefault(review_key(row), []).append(row)
+
+    inserts = []
+    updates = []
+    for row in new_rows:
+        matches = by_key.get(review_key(row))
+        if not matches:
+            inserts.append(row)
+            continue
+        # Однакові за ключем відгуки зіставляються в порядку на сторінках
+        old = matches.pop(0)
+        changed = {field: row[field] for field in REVIEW_FIELDS if old[field] != row[field]}
+        if changed:
+            updates.append({'id': old['id'], **changed})
+
+    deletes = [row['id'] for matches in by_key.values() for row in matches]
+    return inserts, updates, deletes
+
+
+def apply_review_diff(inserts, updates, deletes):
+    """Застосовує різницю пачками; коміт за викликачем"""
+    insert_chunk = SQLITE_MAX_VARIABLES // len(REVIEW_COLUMNS)
+    for start in range(0, len(inserts), insert_chunk):
+        db.session.execute(insert(Review), inserts[start:start + insert_chunk])
+    if updates:
+        # ORM UPDATE за первинним ключем: один executemany на набір змінених полів
+        db.session.execute(update(Review), updates)
+    for start in range(0, len(deletes), SQLITE_MAX_VARIABLES):
+        Review.query.filter(Review.id.in_(deletes[start:start + SQLITE_MAX_VARIABLES])) \
+            .delete(synchronize_session=False)
+
+
+def parse_pages(plan, store, pages):
+    """Парсить знімки сторінок витягу планом; повертає (назва товару, відгуки)"""
+    title = None
+    reviews = []
+    seen_ids = set()
+    for _, sha256 in pages:
+        document = plan.engine.parse(store.get(sha256))
+        if title is None:
+            title = plan.find_title(document)
+        merge_reviews(reviews, plan.extract_reviews(document), seen_ids)
+    return title, reviews
+
+
+def parity_fixtures(domain, directory=None):
+    """Повертає (назва, html) збережених сторінок домену: файли <домен>--<назва>.html"""
+    directory = directory or current_app.config['PARSER_FIXTURES_DIR']
+    if not os.path.isdir(directory):
+        return []
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith(f'{domain}--') and name.endswith('.html'):
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                pages.append((name, f.read()))
+    return pages
+
+
+def parity_error(domain, plan, directory=None):
+    """Порівнює відгуки плану з живим парсером платформи на збережених сторінках.
+
+    Повертає опис розбіжності або None. Для платформ без власного живого
+    парсера план і є живим парсером, тож перевіряти нічого.
+    """
+    live_parser = LIVE_PARSERS.get(domain)
+    if live_parser is None:
+        return None
+    pages = parity_fixtures(domain, directory)
+    if not pages:
+        return f'немає збережених сторінок {domain} для перевірки парсера'
+    for name, html in pages:
+        live = live_parser(html)
+        planned = plan.extract_reviews(plan.engine.parse(html))
+        if planned != live:
+            mismatch = next(
+                (index for index, (a, b) in enumerate(zip(planned, live)) if a != b), min(len(planned), len(live))
+            )
+            return (f'план і живий парсер розходяться на {name}: відгуків {len(planned)} і {len(live)}, '
+                    f'перша розбіжність у відгуку {mismatch + 1}')
+    return None
+
+
+def _init_worker(configs, store_root):
+    from app import create_app
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    _worker_state['app'] = app
+    _worker_state['configs'] = configs
+    _worker_state['plans'] = {}
+    _worker_state['store'] = SnapshotStore(store_root)
+
+
+def _parse_task(task):
+    """Виконується в процесі пулу: читання, розпакування й парсинг знімків одного витягу"""
+    extraction_id, domain, pages = task
+    plans = _worker_state['plans']
+    if domain not in plans:
+        plans[domain] = ExtractionPlan(domain, _worker_state['configs'][domain])
+    with _worker_state['app'].app_context():
+        try:
+            title, reviews = parse_pages(plans[domain], _worker_state['store'], pages)
+            return extraction_id, title, reviews, None
+        except Exception as e:
+            return extraction_id, None, None, str(e)
+
+
+class ReparsePipeline:
+    """Повторно парсить збережені знімки витягів поточною конфігурацією платформ.
+
+    Знімки читаються й парсяться в пулі процесів (парсинг HTML впирається
+    в CPU), а головний процес порівнює нові відгуки з рядками review і
+    застосовує лише вставки, оновлення та видалення. Кожен витяг
+    комітиться окремо.
+    """
+
+    def __init__(self, workers: int = None, store=None, dry_run: bool = False):
+        self.workers = workers or current_app.config['REPARSE_WORKERS']
+        self.store = store or snapshot_store
+        self.dry_run = dry_run
+
+    def select(self, platform=None, extraction_ids=None):
+        """Id завершених витягів зі знімками: домену платформи або з переліку"""
+        query = db.session.query(Extraction.id, Extraction.url).filter(
+            Extraction.status == 'completed',
+            Extraction.id.in_(db.session.query(PageSnapshot.extraction_id))
+        )
+        if extraction_ids is not None:
+            query = query.filter(Extraction.id.in_(extraction_ids))
+        if platform:
+            query = query.filter(Extraction.url.like(f'%{platform}%'))
+        return query.order_by(Extraction.id).all()
+
+    def _tasks(self, extractions):
+        pages = {}
+        for extraction_id, url, sha256 in db.session.query(
+            PageSnapshot.extraction_id, PageSnapshot.url, PageSnapshot.sha256
+        ).filter(PageSnapshot.extraction_id.in_([extraction_id for extraction_id, _ in extractions])) \
+                .order_by(PageSnapshot.extraction_id, PageSnapshot.page_number):
+            pages.setdefault(extraction_id, []).append((url, sha256))
+        return [(extraction_id, normalize_domain(url), pages[extraction_id]) for extraction_id, url in extractions]
+
+    def _parse_all(self, tasks, configs):
+        """Повертає результати парсингу в міру готовності"""
+        if self.workers <= 1:
+            plans = {domain: ExtractionPlan(domain, config) for domain, config in configs.items()}
+            for extraction_id, domain, pages in tasks:
+                try:
+                    title, reviews = parse_pages(plans[domain], self.store, pages)
+                    yield extraction_id, title, reviews, None
+                except Exception as e:
+                    yield extraction_id, None, None, str(e)
+            return
+        with multiprocessing.Pool(self.workers, initializer=_init_worker, initargs=(configs, self.store.root)) as pool:
+            yield from pool.imap_unordered(_parse_task, tasks)
+
+    def _apply(self, extraction, title, reviews):
+        """Порівнює й зберігає відгуки витягу; повертає (вставки, оновлення, видалення)"""
+        max_reviews = extraction.user.get_max_reviews_per_url()
+        if max_reviews:
+            reviews = reviews[:max_reviews]
+        new_rows = dedupe_rows([review_mapping(extraction.id, review) for review in reviews])
+        existing = [
+            row._asdict() for row in db.session.query(
+                Review.id, Review.platform_review_id, *(getattr(Review, field) for field in REVIEW_FIELDS)
+            ).filter_by(extraction_id=extraction.id).order_by(Review.id)
+        ]
+        inserts, updates, deletes = diff_reviews(existing, new_rows)
+        if self.dry_run:
+            return len(inserts), len(updates), len(deletes)
+
+        apply_review_diff(inserts, updates, deletes)
+        if inserts or updates or deletes:
+            bump_review_revision(extraction.id)
+        if title and title != extraction.title:
+            extraction.title = title
+        db.session.commit()
+        return len(inserts), len(updates), len(deletes)
+
+    def run(self, platform=None, extraction_ids=None):
+        """Повертає звіт: кількість витягів і сторінок, змін відгуків і швидкість у сторінках за секунду"""
+        started = time.monotonic()
+        extractions = self.select(platform, extraction_ids)
+        report = {
+            'extractions': len(extractions), 'pages': 0, 'inserted': 0, 'updated': 0, 'deleted': 0,
+            'unchanged': 0, 'skipped': 0, 'failed': 0, 'parity_errors': {}, 'dry_run': self.dry_run
+        }
+        if extractions:
+            tasks = self._tasks(extractions)
+            # Плани компілюються в головному процесі, щоб пул отримав актуальні конфігурації з бази
+            urls = {normalize_domain(url): url for _, url in extractions}
+            configs = {domain: get_extraction_plan(url).config for domain, url in urls.items()}
+            page_counts = {extraction_id: len(pages) for extraction_id, _, pages in tasks}
+
+            # План, що розходиться з живим витягом, перезаписав би збережені відгуки іншими
+            for domain, config in configs.items():
+                error = parity_error(domain, ExtractionPlan(domain, config))
+                if error:
+                    report['parity_errors'][domain] = error
+                    logger.error(f"Повторний парсинг {domain} заблоковано: {error}")
+            allowed = [task for task in tasks if task[1] not in report['parity_errors']]
+            report['failed'] += len(tasks) - len(allowed)
+            tasks = allowed
+
+            for extraction_id, title, reviews, error in self._parse_all(tasks, configs):
+                report['pages'] += page_counts[extraction_id]
+                if error:
+                    report['failed'] += 1
+                    logger.warning(f"Не вдалося повторно розібрати витяг {extraction_id}: {error}")
+                    continue
+                extraction = Extraction.query.get(extraction_id)
+                if not reviews and extraction.reviews.count():
+                    # Порожній результат при наявних відгуках - найімовірніше, зламаний селектор
+                    report['skipped'] += 1
+                    logger.warning(f"Витяг {extraction_id}: нова конфігурація не знайшла відгуків, пропускаємо")
+                    continue
+                try:
+                    inserted, updated, deleted = self._apply(extraction, title, reviews)
+                except Exception as e:
+                    db.session.rollback()
+                    report['failed'] += 1
+                    logger.error(f"Не вдалося зберегти відгуки витягу {extraction_id}: {str(e)}")
+                    continue
+                report['inserted'] += inserted
+                report['updated'] += updated
+                report['deleted'] += deleted
+                if not (inserted or updated or deleted):
+                    report['unchanged'] += 1
+
+        elapsed = time.monotonic() - started
+        report['elapsed'] = round(elapsed, 3)
+        report['pages_per_second'] = round(report['pages'] / elapsed, 1) if elapsed else None
+        logger.info(
+            f"Повторний парсинг: {report['extractions']} витягів, {report['pages']} сторінок за {elapsed:.2f} с "
+            f"({report['pages_per_second']} стор/с), +{report['inserted']} ~{report['updated']} -{report['deleted']}"
+        )
+        return report
+
+
+def reparse_extractions(platform=None, extraction_ids=None, workers=None, dry_run=False):
+    """Повторно парсить знімки витягів платформи (домену) або витягів з переліку"""
+    return ReparsePipeline(workers=workers, dry_run=dry_run).run(platform, extraction_ids)
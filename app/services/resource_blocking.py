@@ -0,0 +1,191 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from config import Config
+from app.services.extraction_plan import get_extraction_plan
+
+logger = logging.getLogger(__name__)
+
+# Аналітика й реклама, які не впливають на DOM з відгуками
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    r'google-analytics\.com',
+    r'googletagmanager\.com',
+    r'doubleclick\.net',
+    r'googlesyndication\.com',
+    r'connect\.facebook\.net',
+    r'mc\.yandex\.',
+    r'hotjar\.com',
+    r'criteo\.(com|net)',
+    r'tiktok\.com/i18n/pixel',
+    r'bat\.bing\.com'
+]
+
+# Середній розмір заблокованих ресурсів для оцінки зекономленого трафіку, байти
+AVERAGE_RESOURCE_BYTES = {
+    'image': 40_000,
+    'media': 500_000,
+    'font': 30_000,
+    'stylesheet': 20_000,
+    'script': 50_000
+}
+DEFAULT_RESOURCE_BYTES = 10_000
+
+
+class BlockingPolicy:
+    """Які запити сторінки не завантажувати: за типом ресурсу Playwright або за URL.
+
+    Береться з конфігурації платформи (blocked_resource_types,
+    blocked_url_patterns - регулярні вирази), а якщо там ключів немає -
+    із налаштувань за замовчуванням.
+    """
+
+    def __init__(self, resource_types, url_patterns):
+        self.resource_types = frozenset(resource_types)
+        self.url_patterns = [re.compile(pattern) for pattern in url_patterns]
+
+    @classmethod
+    def from_config(cls, config=None):
+        config = config or {}
+        return cls(
+            config.get('blocked_resource_types', Config.BROWSER_BLOCKED_RESOURCE_TYPES),
+            config.get('blocked_url_patterns', DEFAULT_BLOCKED_URL_PATTERNS)
+        )
+
+    @property
+    def blocks_anything(self):
+        return bool(self.resource_types or self.url_patterns)
+
+    def should_block(self, resource_type, url):
+        if resource_type in self.resource_types:
+            return True
+        return any(pattern.search(url) for pattern in self.url_patterns)
+
+
+class ResourceStats:
+    """Сумарні метрики блокування ресурсів процесу для адмінки"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def record(self, page_stats):
+        with self._lock:
+            self.pages += 1
+            self.blocked_requests += sum(page_stats.blocked.values())
+            self.bytes_saved += page_stats.bytes_saved
+            self.bytes_loaded += page_stats.bytes_loaded
+            self.total_load_time += page_stats.load_time or 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'pages': self.pages,
+                'blocked_requests': self.blocked_requests,
+                'bytes_saved_estimate': self.bytes_saved,
+                'bytes_loaded': self.bytes_loaded,
+                'avg_load_time': round(self.total_load_time / self.pages, 3) if self.pages else None
+            }
+
+    def reset(self):
+        self.pages = 0
+        self.blocked_requests = 0
+        self.bytes_saved = 0
+        self.bytes_loaded = 0
+        self.total_load_time = 0.0
+
+
+resource_stats = ResourceStats()
+
+
+class PageResourceBlocker:
+    """Підключає політику блокування до сторінки через page.route і рахує трафік.
+
+    Розмір заблокованого ресурсу невідомий, тому зекономлений трафік
+    оцінюється за середнім розміром ресурсу його типу; завантажений трафік
+    рахується за заголовком Content-Length відповідей.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.blocked = Counter()
+        self.bytes_saved = 0
+        self.bytes_loaded = 0
+        self.load_time = None
+        self._started = None
+
+    def _check(self, request):
+        if not self.policy.should_block(request.resource_type, request.url):
+            return False
+        self.blocked[request.resource_type] += 1
+        self.bytes_saved += AVERAGE_RESOURCE_BYTES.get(request.resource_type, DEFAULT_RESOURCE_BYTES)
+        return True
+
+    def _on_response(self, response):
+        length = response.headers.get('content-length')
+        if length and length.isdigit():
+            self.bytes_loaded += int(length)
+
+    def attach(self, page):
+        """Підключає блокування до сторінки sync API"""
+        def handle(route):
+            if self._check(route.request):
+                route.abort()
+            else:
+                route.continue_()
+
+        if self.policy.blocks_anything:
+            page.route('**/*', handle)
+        page.on('response', self._on_response)
+        self._started = time.monotonic()
+
+    async def attach_async(self, page):
+        """Підключає блокування до сторінки async API"""
+        async def handle(route):
+            if self._check(route.request):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        if self.policy.blocks_anything:
+            await page.route('**/*', handle)
+        page.on('response', self._on_response)
+        self._started = time.monotonic()
+
+    def finish(self, url):
+        """Фіксує час завантаження, логує метрики сторінки і додає їх до сумарних"""
+        self.load_time = round(time.monotonic() - self._started, 3) if self._started else None
+        resource_stats.record(self)
+        logger.info(
+            f"Сторінку {url} завантажено за {self.load_time} с: заблоковано {sum(self.blocked.values())} запитів "
+            f"({dict(self.blocked)}), зекономлено ~{self.bytes_saved // 1024} КБ, "
+            f"завантажено {self.bytes_loaded // 1024} КБ"
+        )
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            'load_time': self.load_time,
+            'blocked_requests': dict(self.blocked),
+            'bytes_saved_estimate': self.bytes_saved,
+            'bytes_loaded': self.bytes_loaded
+        }
+
+
+def policy_for(url):
+    """Політика блокування платформи URL"""
+    if not Config.BROWSER_BLOCK_RESOURCES:
+        return BlockingPolicy([], [])
+    try:
+        config = get_extraction_plan(url).config
+    except Exception as e:
+        logger.debug(f"Немає конфігурації платформи для {url}, блокування за замовчуванням: {str(e)}")
+        config = None
+    return BlockingPolicy.from_config(config)
+
+
+def blocker_for(url):
+    """Блокувальник з політикою платформи URL для однієї сторінки"""
+    return PageResourceBlocker(policy_for(url))
@@ -0,0 +1,96 @@
+import logging
+import re
+
+from config import Config
+from app.services.extraction_plan import get_extraction_plan
+from app.services.http_client import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Шаблони за замовчуванням; error_patterns конфігурації платформи перевіряються першими.
+# retryable - чи є сенс повторювати, breaker - чи означає помилка, що зламалась розмітка платформи
+DEFAULT_ERROR_PATTERNS = [
+    {
+        'pattern': r'wait_for_selector|waiting for (locator|selector)',
+        'retryable': False,
+        'breaker': True,
+        'solution': 'Елементи відгуків не з\'явились на сторінці - перевірте селектори платформи'
+    },
+    {
+        'pattern': r'net::ERR_(NAME_NOT_RESOLVED|INVALID_URL)|Cannot navigate to invalid URL|Invalid URL',
+        'retryable': False,
+        'solution': 'Перевірте адресу сторінки'
+    },
+    {
+        'pattern': r'net::ERR_|Timeout \d+ms exceeded|Connection (reset|refused|aborted)|timed out|'
+                   r'Target (page, context or browser )?(has been )?closed|Browser has been closed',
+        'retryable': True
+    }
+]
+
+# HTTP статуси 4xx, після яких повтор може вдатися
+RETRYABLE_CLIENT_STATUSES = (408, 425, 429)
+
+
+class ErrorVerdict:
+    """Рішення щодо помилки: чи повторювати і чи рахувати її для circuit breaker"""
+
+    def __init__(self, retryable: bool, breaker: bool = False, solution: str = None):
+        self.retryable = retryable
+        self.breaker = breaker
+        self.solution = solution
+
+
+def _status_code(error):
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def classify_error(error, config=None):
+    """Класифікує виняток як тимчасовий або фатальний.
+
+    Спочатку перевіряються error_patterns конфігурації платформи
+    (pattern, retryable, breaker, solution), потім HTTP статус відповіді,
+    потім шаблони за замовчуванням. Невідомі помилки вважаються тимчасовими.
+    """
+    message = f'{type(error).__name__}: {error}'
+    platform_patterns = (config or {}).get('error_patterns') or []
+    for pattern in platform_patterns:
+        if re.search(pattern['pattern'], message):
+            return ErrorVerdict(pattern.get('retryable', True), pattern.get('breaker', False), pattern.get('solution'))
+
+    status = _status_code(error)
+    if status is not None:
+        retryable = status >= 500 or status in RETRYABLE_CLIENT_STATUSES
+        return ErrorVerdict(retryable, solution=None if retryable else f'Сервер відповів статусом {status}')
+
+    for pattern in DEFAULT_ERROR_PATTERNS:
+        if re.search(pattern['pattern'], message):
+            return ErrorVerdict(pattern['retryable'], pattern.get('breaker', False), pattern.get('solution'))
+    return ErrorVerdict(True)
+
+
+def classify_url_error(error, url):
+    """classify_error з конфігурацією платформи URL"""
+    try:
+        config = get_extraction_plan(url).config
+    except Exception as e:
+        logger.debug(f"Немає конфігурації платформи для {url}, класифікація за замовчуванням: {str(e)}")
+        config = None
+    return classify_error(error, config)
+
+
+def retry_delay(verdict, attempt, max_attempts=None):
+    """Затримка перед наступною спробою завантаження в браузері (attempt з 1).
+
+    None - помилка фатальна або спроби вичерпано, виняток слід прокинути далі.
+    """
+    max_attempts = max_attempts or Config.BROWSER_MAX_ATTEMPTS
+    if attempt >= max_attempts or not verdict.retryable:
+        return None
+    return backoff_delay(attempt, Config.BROWSER_RETRY_BASE_DELAY, Config.BROWSER_RETRY_MAX_DELAY)
+
+
+def browser_retry_delay(error, url, attempt, max_attempts=None):
+    """retry_delay для помилки, класифікованої конфігурацією платформи URL"""
+    return retry_delay(classify_url_error(error, url), attempt, max_attempts)
@@ -0,0 +1,96 @@
+import logging
+
+from sqlalchemy import insert
+
+from app import db
+from app.models.extraction import Extraction, Review
+
+logger = logging.getLogger(__name__)
+
+# Старі збірки SQLite обмежують запит 999 параметрами
+SQLITE_MAX_VARIABLES = 999
+
+REVIEW_COLUMNS = (
+    'extraction_id', 'author', 'text', 'rating', 'date',
+    'advantages', 'disadvantages', 'platform_review_id', 'created_at'
+)
+
+
+def review_mapping(extraction_id, review_data):
+    """Перетворює словник відгуку з екстрактора на рядок таблиці review"""
+    return {
+        'extraction_id': extraction_id,
+        'author': review_data.get('author'),
+        'text': review_data.get('text') or review_data.get('title'),  # Використовуємо title якщо text відсутній
+        'rating': review_data.get('rating'),
+        'date': review_data.get('date'),
+        'advantages': review_data.get('advantages'),
+        'disadvantages': review_data.get('disadvantages'),
+        # Порожній id не повинен конфліктувати з унікальним індексом
+        'platform_review_id': review_data.get('platform_review_id') or None
+    }
+
+
+def review_key(row):
+    """Ключ зіставлення відгуку: id платформи, а без нього - автор, дата й текст"""
+    if row['platform_review_id'] is not None:
+        return 'id', row['platform_review_id']
+    return 'content', row['author'], row['date'], row['text']
+
+
+def known_review_keys(extraction_id):
+    """Ключі відгуків, уже збережених у витягу"""
+    return {
+        review_key(row._asdict()) for row in db.session.query(
+            Review.platform_review_id, Review.author, Review.date, Review.text
+        ).filter_by(extraction_id=extraction_id)
+    }
+
+
+def review_data_key(review_data):
+    """review_key для словника відгуку з екстрактора"""
+    return review_key(review_mapping(None, review_data))
+
+
+def is_known(review_data, known):
+    """Чи є словник відгуку з екстрактора серед ключів known"""
+    return review_data_key(review_data) in known
+
+
+def dedupe_rows(rows):
+    """Прибирає повтори одного відгуку платформи в межах пачки"""
+    seen = set()
+    unique_rows = []
+    for row in rows:
+        review_id = row['platform_review_id']
+        if review_id is not None:
+            if review_id in seen:
+                continue
+            seen.add(review_id)
+        unique_rows.append(row)
+    return unique_rows
+
+
+def bump_review_revision(extraction_id):
+    """Позначає, що відгуки витягу змінились; коміт за викликачем"""
+    Extraction.query.filter_by(id=extraction_id).update(
+        {'review_revision': Extraction.review_revision + 1}, synchronize_session=False
+    )
+
+
+def bulk_insert_reviews(extraction_id, reviews, chunk_size=None):
+    """Зберігає відгуки пачками через executemany замість ORM-об'єкта на кожен рядок.
+
+    Розмір пачки за замовчуванням підібраний так, щоб не перевищити ліміт
+    параметрів SQLite. Коміт залишається за викликачем.
+    """
+    chunk_size = chunk_size or SQLITE_MAX_VARIABLES // len(REVIEW_COLUMNS)
+    rows = dedupe_rows([review_mapping(extraction_id, review_data) for review_data in reviews])
+
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(insert(Review), rows[start:start + chunk_size])
+    if rows:
+        bump_review_revision(extraction_id)
+
+    logger.debug(f"Збережено відгуків для витягу {extraction_id}: {len(rows)}")
+    return len(rows)
@@ -0,0 +1,114 @@
+import re
+
+from app.services.parse_engines import LxmlEngine
+
+# Селектори назви товару Rozetka в порядку пріоритету
+TITLE_SELECTORS = [
+    'h1.product__title',
+    '.product__heading',
+    '.product-title',
+    'h1',
+    'title'
+]
+
+ITEM_SELECTOR = '.product-comments__list-item'
+
+# Поле відгуку -> селектор текстового елемента
+TEXT_FIELDS = {
+    'author': '[data-testid="replay-header-author"]',
+    'date': '[data-testid="replay-header-date"]',
+    'text': '.comment__body-wrapper p',
+    'advantages': '.comment__essentials dd',
+    'disadvantages': '.comment__essentials dd:nth-of-type(2)'
+}
+
+# Поле відгуку -> селектор лічильника голосів
+COUNTER_FIELDS = {
+    'likes': '.vote-buttons-comments__counter',
+    'dislikes': '.vote-buttons-comments__vote--dislike .vote-buttons-comments__counter'
+}
+
+RATING_SELECTOR = '[data-testid="stars-rating"]'
+RATING_PATTERN = re.compile(r'width:\s*calc\((\d+)%\s*-\s*2px\)')
+BOUGHT_SELECTOR = '[aria-label="uzhe_kupil"]'
+PHOTO_SELECTOR = '.comment__photo, .comment__image'
+
+
+class RozetkaReviewParser:
+    """Розбір сторінки відгуків Rozetka зі скомпільованими селекторами.
+
+    Працює з будь-яким рушієм parse_engines (за замовчуванням lxml) і
+    повертає ті самі словники, що й парсер з тесту Rozetka: рейтинг з
+    ширини calc(N% - 2px), лічильники голосів, позначку покупки і фото.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or LxmlEngine()
+        compile_selector = self.engine.compile
+        self.titles = [compile_selector(selector) for selector in TITLE_SELECTORS]
+        self.items = compile_selector(ITEM_SELECTOR)
+        self.text_fields = {name: compile_selector(selector) for name, selector in TEXT_FIELDS.items()}
+        self.counter_fields = {name: compile_selector(selector) for name, selector in COUNTER_FIELDS.items()}
+        self.rating = compile_selector(RATING_SELECTOR)
+        self.bought = compile_selector(BOUGHT_SELECTOR)
+        self.photos = compile_selector(PHOTO_SELECTOR)
+
+    def parse(self, html):
+        return self.engine.parse(html)
+
+    def find_title(self, document):
+        for selector in self.titles:
+            title_elem = selector.select_one(document)
+            if title_elem is not None:
+                title = self.engine.text(title_elem).strip()
+                if title:
+                    return title
+        return None
+
+    def _rating(self, elem):
+        match = RATING_PATTERN.search(self.engine.get(elem, 'style') or '')
+        return int(match.group(1)) // 20 if match else None
+
+    def _counter(self, elem):
+        try:
+            return int(self.engine.text(elem).strip())
+        except ValueError:
+            return 0
+
+    def extract_review(self, item, locate):
+        engine = self.engine
+        data = {
+            'rating': None,
+            'author': None,
+            'date': None,
+            'text': None,
+            'advantages': None,
+            'disadvantages': None,
+            'likes': 0,
+            'dislikes': 0,
+            'bought': False,
+            'comment_photos': [],
+        }
+        rating_elem = locate(self.rating, item)
+        if rating_elem is not None:
+            data['rating'] = self._rating(rating_elem)
+        for name, selector in self.text_fields.items():
+            elem = locate(selector, item)
+            if elem is not None:
+                data[name] = engine.text(elem).strip()
+        for name, selector in self.counter_fields.items():
+            elem = locate(selector, item)
+            if elem is not None:
+                data[name] = self._counter(elem)
+        data['bought'] = locate(self.bought, item) is not None
+        data['comment_photos'] = [
+            engine.get(photo, 'src') for photo in self.photos.select(item) if engine.get(photo, 'src') is not None
+        ]
+        return data
+
+    def extract_reviews(self, document, max_reviews=None):
+        review_items = self.items.select(document)
+        if max_reviews:
+            review_items = review_items[:max_reviews]
+        locate = self.engine.field_locator(document, review_items)
+        return [self.extract_review(item, locate) for item in review_items]
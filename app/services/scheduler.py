@@ -0,0 +1,164 @@
+import heapq
+import logging
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models.extraction import TrackedProduct
+from app.services.extraction_plan import normalize_domain
+from app.services.jobs import CANCELLABLE_STATUSES, enqueue_extraction
+
+logger = logging.getLogger(__name__)
+
+
+def jittered(interval, jitter):
+    """Інтервал з випадковим відхиленням ±jitter, щоб оновлення не збігались у часі"""
+    return interval * random.uniform(1 - jitter, 1 + jitter)
+
+
+def track_product(user, url, platform, refresh_interval):
+    """Додає товар до відстежуваних або оновлює інтервал уже доданого; коміт за викликачем.
+
+    Перше оновлення призначається у випадковий момент першого інтервалу:
+    товари, додані одним скриптом, не оновлюються всі разом.
+    """
+    product = TrackedProduct.query.filter_by(user_id=user.id, url=url).first()
+    now = datetime.utcnow()
+    if product is None:
+        product = TrackedProduct(user_id=user.id, url=url, platform=platform)
+        db.session.add(product)
+    elif product.active and product.refresh_interval == refresh_interval:
+        return product
+    product.refresh_interval = refresh_interval
+    product.active = True
+    product.next_due_at = now + timedelta(seconds=random.uniform(0, refresh_interval))
+    return product
+
+
+class RefreshScheduler:
+    """Локальний планувальник інкрементальних оновлень відстежуваних товарів.
+
+    Черга з пріоритетом (heapq) упорядкована за next_due_at, тож кожен
+    крок дивиться лише на товари, час яких настав. На кожен домен
+    ставиться не більше domain_budget витягів за хвилину: товар, для
+    домену якого бюджет вичерпано, отримує наступний вільний слот домену,
+    тож накопичені товари розходяться рівномірно, а не ставляться в чергу
+    пачкою. Наступне оновлення призначається через інтервал товару з
+    розкидом jitter.
+    """
+
+    def __init__(self, domain_budget: int = None, jitter: float = None, reload_interval: int = None,
+                 max_sleep: float = None):
+        self.domain_budget = domain_budget or current_app.config['SCHEDULER_DOMAIN_BUDGET']
+        self.jitter = jitter if jitter is not None else current_app.config['SCHEDULER_JITTER']
+        self.reload_interval = reload_interval or current_app.config['SCHEDULER_RELOAD_INTERVAL']
+        self.max_sleep = max_sleep or current_app.config['SCHEDULER_MAX_SLEEP']
+        self._heap = []
+        self._domains = {}
+        self._next_slot = {}
+        self._reserved = {}
+        self._loaded_at = None
+        self._stats = Counter()
+
+    def reload(self, now=None):
+        """Перебудовує чергу з бази, підхоплюючи додані, змінені й вимкнені товари"""
+        self._heap = []
+        self._domains = {}
+        reserved = {}
+        for product_id, url, next_due_at in db.session.query(
+            TrackedProduct.id, TrackedProduct.url, TrackedProduct.next_due_at
+        ).filter_by(active=True):
+            # Відкладений товар зберігає вже зарезервований слот домену
+            if product_id in self._reserved:
+                next_due_at = reserved[product_id] = self._reserved[product_id]
+            self._heap.append((next_due_at, product_id))
+            self._domains[product_id] = normalize_domain(url)
+        self._reserved = reserved
+        heapq.heapify(self._heap)
+        self._loaded_at = now or datetime.utcnow()
+        logger.info(f"Планувальник: відстежуваних товарів {len(self._heap)}")
+
+    def _take_slot(self, domain, now):
+        """Займає слот домену: None - можна ставити зараз, інакше час зарезервованого слоту"""
+        spacing = timedelta(seconds=60 / self.domain_budget)
+        slot = self._next_slot.get(domain)
+        if slot is None or slot <= now:
+            self._next_slot[domain] = now + spacing
+            return None
+        self._next_slot[domain] = slot + spacing
+        return slot
+
+    def _refresh(self, product, now):
+        """Ставить інкрементальний витяг товару в чергу і призначає наступне оновлення"""
+        extraction = product.last_extraction
+        if extraction is not None and extraction.status in CANCELLABLE_STATUSES:
+            # Попереднє оновлення ще в черзі - друге не додаємо
+            self._stats['skipped_busy'] += 1
+        else:
+            extraction = enqueue_extraction(product.user, product.url, mode='incremental')
+            product.last_extraction_id = extraction.id
+            product.last_enqueued_at = now
+            self._stats['enqueued'] += 1
+        product.next_due_at = now + timedelta(seconds=jittered(product.refresh_interval, self.jitter))
+        db.session.commit()
+
+    def tick(self, now=None):
+        """Ставить у чергу всі товари, час яких настав і для домену яких є бюджет"""
+        now = now or datetime.utcnow()
+        enqueued = 0
+        while self._heap and self._heap[0][0] <= now:
+            due_at, product_id = heapq.heappop(self._heap)
+            if self._reserved.pop(product_id, None) is None:
+                slot = self._take_slot(self._domains[product_id], now)
+                if slot is not None:
+                    self._reserved[product_id] = slot
+                    heapq.heappush(self._heap, (slot, product_id))
+                    self._stats['deferred'] += 1
+                    continue
+
+            product = db.session.get(TrackedProduct, product_id)
+            if product is None or not product.active:
+                continue
+            self._refresh(product, now)
+            enqueued += 1
+            heapq.heappush(self._heap, (product.next_due_at, product_id))
+        return enqueued
+
+    def seconds_until_next(self, now=None):
+        """Скільки можна спати до наступного товару або перечитування бази"""
+        now = now or datetime.utcnow()
+        wake_at = self._loaded_at + timedelta(seconds=self.reload_interval)
+        if self._heap:
+            wake_at = min(wake_at, self._heap[0][0])
+        return min(max((wake_at - now).total_seconds(), 0), self.max_sleep)
+
+    def run(self, max_ticks=None):
+        """Нескінченний цикл планувальника"""
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            now = datetime.utcnow()
+            if self._loaded_at is None or now - self._loaded_at >= timedelta(seconds=self.reload_interval):
+                self.reload(now)
+            if self.tick(now):
+                logger.info(f"Планувальник: {dict(self._stats)}")
+            db.session.remove()
+            ticks += 1
+            time.sleep(max(self.seconds_until_next(), 0.1))
+
+    def stats(self) -> dict:
+        return {
+            'tracked': len(self._heap),
+            'domain_budget': self.domain_budget,
+            'next_due_at': self._heap[0][0].isoformat() if self._heap else None,
+            **self._stats
+        }
+
+
+def scheduler_loop(app, max_ticks=None):
+    """Запускає планувальник оновлень у контексті застосунку"""
+    with app.app_context():
+        RefreshScheduler().run(max_ticks)
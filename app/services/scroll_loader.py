@@ -0,0 +1,127 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Скільки чекати на появу нових елементів після одного скролу (мс)
+GROWTH_TIMEOUT = 4000
+
+COUNT_ITEMS_JS = "(selector) => document.querySelectorAll(selector).length"
+
+# Один крок: скрол донизу, потім очікування, поки MutationObserver не побачить
+# більше елементів, ніж було, або до таймауту. XHR з відгуками закінчується
+# вставкою елементів, тож окреме очікування networkidle нічого не додає
+SCROLL_STEP_JS = """
+([selector, previous, timeout]) => new Promise(resolve => {
+    window.scrollTo(0, document.body.scrollHeight);
+    const count = () => document.querySelectorAll(selector).length;
+    const initial = count();
+    if (initial > previous) {
+        resolve(initial);
+        return;
+    }
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        const current = count();
+        if (current > previous) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(current);
+        }
+    });
+    timer = setTimeout(() => {
+        observer.disconnect();
+        resolve(count());
+    }, timeout);
+    observer.observe(document.body, {childList: true, subtree: true});
+})
+"""
+
+
+def count_items(page, item_selector):
+    """Рахує кількість елементів відгуків на сторінці"""
+    return page.evaluate(COUNT_ITEMS_JS, item_selector)
+
+
+def _new_stats(items):
+    return {
+        'scrolls': 0,
+        'items': items,
+        'scroll_times': [],
+        'stop_reason': 'max_scrolls'
+    }
+
+
+def _should_stop(stats, max_items, max_scrolls):
+    """Перевірка перед кроком; причину зупинки записує в stats"""
+    if stats['scrolls'] >= max_scrolls:
+        return True
+    if max_items and stats['items'] >= max_items:
+        stats['stop_reason'] = 'max_items'
+        return True
+    return False
+
+
+def _step_args(item_selector, stats, growth_timeout):
+    return [item_selector, stats['items'], growth_timeout]
+
+
+def _record_step(stats, current, step_started):
+    """Записує результат кроку; повертає False, якщо кількість елементів перестала рости"""
+    previous = stats['items']
+    stats['scrolls'] += 1
+    stats['scroll_times'].append(round(time.monotonic() - step_started, 3))
+    stats['items'] = current
+    if current <= previous:
+        stats['stop_reason'] = 'plateau'
+        return False
+    return True
+
+
+def scroll_until_loaded(page, item_selector, max_items=None, max_scrolls=10,
+                        growth_timeout=GROWTH_TIMEOUT, stop_when=None):
+    """Скролить сторінку, поки кількість відгуків росте.
+
+    Замість фіксованої паузи після кожного скролу чекає на появу нових
+    елементів item_selector (через MutationObserver), не довше growth_timeout
+    мс на крок. Зупиняється, щойно кількість елементів перестає рости,
+    досягає max_items або stop_when(page) повертає True (інкрементальний
+    витяг дійшов до вже збережених відгуків). Повертає статистику скролу
+    з часом кожного кроку.
+    """
+    started = time.monotonic()
+    stats = _new_stats(count_items(page, item_selector))
+    while not _should_stop(stats, max_items, max_scrolls):
+        if stop_when and stop_when(page):
+            stats['stop_reason'] = 'seen'
+            break
+        step_started = time.monotonic()
+        current = page.evaluate(SCROLL_STEP_JS, _step_args(item_selector, stats, growth_timeout))
+        if not _record_step(stats, current, step_started):
+            break
+
+    _finish_stats(stats, started)
+    return stats
+
+
+async def scroll_until_loaded_async(page, item_selector, max_items=None, max_scrolls=10,
+                                    growth_timeout=GROWTH_TIMEOUT):
+    """Те саме, що scroll_until_loaded, для сторінок async API Playwright"""
+    started = time.monotonic()
+    stats = _new_stats(await page.evaluate(COUNT_ITEMS_JS, item_selector))
+    while not _should_stop(stats, max_items, max_scrolls):
+        step_started = time.monotonic()
+        current = await page.evaluate(SCROLL_STEP_JS, _step_args(item_selector, stats, growth_timeout))
+        if not _record_step(stats, current, step_started):
+            break
+
+    _finish_stats(stats, started)
+    return stats
+
+
+def _finish_stats(stats, started):
+    stats['elapsed'] = round(time.monotonic() - started, 3)
+    logger.info(
+        f"Скрол завершено ({stats['stop_reason']}): елементів {stats['items']}, "
+        f"скролів {stats['scrolls']}, час {stats['elapsed']} с, кроки {stats['scroll_times']}"
+    )
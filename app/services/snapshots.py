@@ -0,0 +1,231 @@
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from config import Config
+from app import db
+from app.models.extraction import PageSnapshot
+
+try:
+    import zstandard
+except ImportError:  # zstd необов'язковий, без нього знімки стискаються gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CODEC_EXTENSIONS = {'zstd': '.html.zst', 'gzip': '.html.gz'}
+
+# Файл, який щойно записали або використали повторно, не видаляється: рядок знімка на нього
+# може бути ще не закомічений
+DELETE_GRACE_SECONDS = 60
+
+
+class SnapshotStore:
+    """Сховище HTML на файловій системі з адресацією за sha256 вмісту.
+
+    Однакові сторінки зберігаються одним файлом, скільки б витягів на них
+    не посилалось. Файли стискаються zstd, якщо встановлено zstandard,
+    інакше gzip; кодек визначається розширенням, тож сховище читає обидва.
+    Запис атомарний: тимчасовий файл перейменовується після запису.
+    """
+
+    def __init__(self, root: str = None, codec: str = None, level: int = None):
+        self.root = root or Config.SNAPSHOT_DIR
+        codec = codec or Config.SNAPSHOT_CODEC
+        if codec == 'zstd' and zstandard is None:
+            codec = 'gzip'
+        self.codec = codec
+        self.level = level or Config.SNAPSHOT_COMPRESSION_LEVEL
+
+    def _path(self, sha256, codec):
+        return os.path.join(self.root, sha256[:2], sha256 + CODEC_EXTENSIONS[codec])
+
+    def find(self, sha256):
+        """Повертає (шлях, кодек) наявного файлу знімка або (None, None)"""
+        for codec in CODEC_EXTENSIONS:
+            path = self._path(sha256, codec)
+            if os.path.exists(path):
+                return path, codec
+        return None, None
+
+    def _compress(self, data):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return gzip.compress(data, compresslevel=min(self.level, 9))
+
+    def put(self, html):
+        """Зберігає HTML і повертає (sha256, розмір, розмір у сховищі)"""
+        data = html.encode('utf-8')
+        sha256 = hashlib.sha256(data).hexdigest()
+        path, _ = self.find(sha256)
+        if path is not None:
+            # Оновлений час зміни захищає файл від паралельного очищення
+            os.utime(path)
+            return sha256, len(data), os.path.getsize(path)
+
+        path = self._path(sha256, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = self._compress(data)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256, len(data), len(compressed)
+
+    def get(self, sha256):
+        """Повертає HTML знімка; FileNotFoundError, якщо файлу немає"""
+        path, codec = self.find(sha256)
+        if path is None:
+            raise FileNotFoundError(f'Знімок {sha256} відсутній у сховищі')
+        with open(path, 'rb') as f:
+            data = f.read()
+        if codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError('Для читання знімка zstd потрібен пакет zstandard')
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        return data.decode('utf-8')
+
+    def delete(self, sha256, grace=0):
+        """Видаляє файл знімка, якщо його не змінювали останні grace секунд"""
+        path, _ = self.find(sha256)
+        if path is None or time.time() - os.path.getmtime(path) < grace:
+            return False
+        os.remove(path)
+        return True
+
+
+snapshot_store = SnapshotStore()
+
+
+def save_snapshots(extraction_id, pages, store=None):
+    """Зберігає сторінки витягу [(url, html), ...] у порядку обходу; коміт за викликачем.
+
+    Сторінки інкрементальних оновлень нумеруються після вже збережених.
+    """
+    if not Config.SNAPSHOTS_ENABLED:
+        return []
+    store = store or snapshot_store
+    snapshots = []
+    last_page = db.session.query(func.max(PageSnapshot.page_number)).filter_by(extraction_id=extraction_id).scalar() or 0
+    for page_number, (url, html) in enumerate(pages, start=last_page + 1):
+        try:
+            sha256, size, stored_size = store.put(html)
+        except OSError as e:
+            logger.warning(f"Не вдалося зберегти знімок сторінки {url}: {str(e)}")
+            continue
+        snapshots.append(PageSnapshot(
+            extraction_id=extraction_id,
+            page_number=page_number,
+            url=url,
+            sha256=sha256,
+            size=size,
+            stored_size=stored_size
+        ))
+    db.session.add_all(snapshots)
+    return snapshots
+
+
+def load_snapshots(extraction_id, store=None):
+    """Повертає [(url, html), ...] збережених сторінок витягу в порядку обходу"""
+    store = store or snapshot_store
+    snapshots = PageSnapshot.query.filter_by(extraction_id=extraction_id).order_by(PageSnapshot.page_number).all()
+    return [(snapshot.url, store.get(snapshot.sha256)) for snapshot in snapshots]
+
+
+def delete_unreferenced_files(sha256s, store=None):
+    """Видаляє файли, на які більше не посилається жоден знімок.
+
+    Викликається після коміту видалення рядків: якщо транзакцію відкочено
+    або інший витяг тим часом зберіг ту саму сторінку, файл лишається.
+    """
+    store = store or snapshot_store
+    candidates = list(set(sha256s))
+    referenced = set()
+    for start in range(0, len(candidates), 500):
+        referenced.update(
+            sha256 for (sha256,) in db.session.query(PageSnapshot.sha256)
+            .filter(PageSnapshot.sha256.in_(candidates[start:start + 500])).distinct()
+        )
+    removed = 0
+    for sha256 in set(candidates) - referenced:
+        try:
+            removed += store.delete(sha256, grace=DELETE_GRACE_SECONDS)
+        except OSError as e:
+            logger.warning(f"Не вдалося видалити файл знімка {sha256}: {str(e)}")
+    return removed
+
+
+def delete_snapshots(extraction_id):
+    """Видаляє рядки знімків витягу; коміт за викликачем.
+
+    Повертає sha256 їх файлів: після коміту їх треба передати в
+    delete_unreferenced_files.
+    """
+    sha256s = [sha256 for (sha256,) in db.session.query(PageSnapshot.sha256).filter_by(extraction_id=extraction_id)]
+    PageSnapshot.query.filter_by(extraction_id=extraction_id).delete()
+    return sha256s
+
+
+def prune_snapshots(retention_days=None, max_bytes=None, store=None):
+    """Застосовує обмеження зберігання: вік знімків і загальний обсяг сховища.
+
+    Спочатку видаляються знімки, старші за retention_days, потім найстаріші,
+    поки сумарний розмір файлів перевищує max_bytes.
+    """
+    store = store or snapshot_store
+    retention_days = retention_days if retention_days is not None else Config.SNAPSHOT_RETENTION_DAYS
+    max_bytes = max_bytes if max_bytes is not None else Config.SNAPSHOT_MAX_BYTES
+
+    deadline = datetime.utcnow() - timedelta(days=retention_days)
+    sha256s = [sha256 for (sha256,) in db.session.query(PageSnapshot.sha256).filter(PageSnapshot.created_at < deadline)]
+    expired = PageSnapshot.query.filter(PageSnapshot.created_at < deadline).delete(synchronize_session=False)
+    db.session.flush()
+
+    # Файл спільний для однакових сторінок, тому обсяг рахується за унікальними sha256
+    references = {}
+    sizes = {}
+    for sha256, count, stored_size in db.session.query(
+        PageSnapshot.sha256, func.count(PageSnapshot.id), func.max(PageSnapshot.stored_size)
+    ).group_by(PageSnapshot.sha256):
+        references[sha256] = count
+        sizes[sha256] = stored_size
+    total = sum(sizes.values())
+
+    evicted_ids = []
+    if total > max_bytes:
+        rows = db.session.query(PageSnapshot.id, PageSnapshot.sha256) \
+            .order_by(PageSnapshot.created_at, PageSnapshot.id).all()
+        for snapshot_id, sha256 in rows:
+            if total <= max_bytes:
+                break
+            evicted_ids.append(snapshot_id)
+            sha256s.append(sha256)
+            references[sha256] -= 1
+            # Обсяг зменшується, лише коли видалено останнє посилання на файл
+            if references[sha256] == 0:
+                total -= sizes[sha256]
+        for start in range(0, len(evicted_ids), 500):
+            PageSnapshot.query.filter(PageSnapshot.id.in_(evicted_ids[start:start + 500])) \
+                .delete(synchronize_session=False)
+        db.session.flush()
+    evicted = len(evicted_ids)
+
+    db.session.commit()
+    removed_files = delete_unreferenced_files(sha256s, store)
+    logger.info(
+        f"Очищення знімків: застарілих {expired}, витіснено за обсягом {evicted}, видалено файлів {removed_files}"
+    )
+    return {'expired': expired, 'evicted': evicted, 'removed_files': removed_files}
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.extraction import Extraction, ExtractionSummary, Review
+from app.services.summarizer import MapReduceSummarizer
+
+logger = logging.getLogger(__name__)
+
+
+def review_fingerprint(extraction_id, title=None):
+    """Відбиток набору відгуків: назва товару, кількість і найбільший id відгуків та review_revision витягу.
+
+    Рахується одним агрегатом по індексу extraction_id без читання
+    вмісту відгуків. Вставка нових відгуків змінює кількість і id, а
+    зміни наявних (повторний парсинг) - лічильник review_revision.
+    """
+    review_count, max_id = db.session.execute(
+        select(func.count(Review.id), func.max(Review.id)).where(Review.extraction_id == extraction_id)
+    ).one()
+    revision = db.session.execute(
+        select(Extraction.review_revision).where(Extraction.id == extraction_id)
+    ).scalar()
+    payload = json.dumps([title, review_count, max_id, revision])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def rating_aggregates(extraction_id):
+    """Повертає (кількість відгуків, середній рейтинг, гістограму рейтингів) з SQL"""
+    review_count, average_rating = db.session.execute(
+        select(func.count(Review.id), func.avg(Review.rating)).where(Review.extraction_id == extraction_id)
+    ).one()
+    bucket = func.cast(func.round(Review.rating), db.Integer)
+    histogram = {
+        str(stars): count
+        for stars, count in db.session.execute(
+            select(bucket, func.count(Review.id))
+            .where(Review.extraction_id == extraction_id, Review.rating.isnot(None))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+    }
+    return review_count, average_rating, histogram
+
+
+def generate_summary(extraction, bypass_cache=False, progress_callback=None):
+    """Генерує підсумок відгуків витягу через ШІ, частинами для великих витягів"""
+    reviews = db.session.execute(
+        select(Review.author, Review.rating, Review.text)
+        .where(Review.extraction_id == extraction.id)
+        .order_by(Review.id)
+    ).all()
+    return MapReduceSummarizer().summarize(
+        extraction.title, reviews, bypass_cache=bypass_cache, progress_callback=progress_callback
+    )
+
+
+def get_summary(extraction, refresh=False, progress_callback=None):
+    """Повертає збережений підсумок, перегенеровуючи його лише після зміни відгуків.
+
+    progress_callback(done, total) викликається після кожної обробленої частини.
+    Повертає None, якщо у витягу немає відгуків.
+    """
+    fingerprint = review_fingerprint(extraction.id, extraction.title)
+    summary = ExtractionSummary.query.filter_by(extraction_id=extraction.id).first()
+    if summary and summary.fingerprint == fingerprint and not refresh:
+        return summary.to_dict()
+
+    review_count, average_rating, histogram = rating_aggregates(extraction.id)
+    if not review_count:
+        return None
+
+    result = generate_summary(extraction, bypass_cache=refresh, progress_callback=progress_callback)
+    if summary is None:
+        summary = ExtractionSummary(extraction_id=extraction.id)
+        db.session.add(summary)
+    summary.fingerprint = fingerprint
+    summary.review_count = review_count
+    summary.average_rating = average_rating
+    summary.rating_histogram = json.dumps(histogram)
+    summary.result = json.dumps(result, ensure_ascii=False)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Паралельний перший перегляд уже зберіг підсумок цього витягу - віддаємо його
+        db.session.rollback()
+        summary = ExtractionSummary.query.filter_by(extraction_id=extraction.id).first()
+        if summary is None:
+            raise
+        return summary.to_dict()
+    current_app.logger.info(f"Згенеровано підсумок витягу {extraction.id} ({review_count} відгуків)")
+    return summary.to_dict()
+
+
+def warm_summary(extraction):
+    """Попередньо генерує підсумок після завершення витягу; помилки лише логуються"""
+    try:
+        get_summary(extraction)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f"Не вдалося попередньо згенерувати підсумок витягу {extraction.id}: {str(e)}")
+
+
+def delete_summary(extraction_id):
+    """Видаляє збережений підсумок витягу"""
+    ExtractionSummary.query.filter_by(extraction_id=extraction_id).delete()
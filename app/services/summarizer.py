@@ -0,0 +1,198 @@
+import json
+import logging
+import re
+from collections import Counter
+
+from flask import current_app
+
+from app.services.ai_helper import AIHelper
+
+logger = logging.getLogger(__name__)
+
+REVIEW_SEPARATOR = '\n\n'
+
+# Скільки переваг і недоліків повертається в підсумку
+MAX_POINTS = 5
+
+MAP_PROMPT = """Проаналізуй частину {batch} з {total} відгуків про товар "{title}" та надай:
+1. Короткий підсумок цієї частини у 2-3 реченнях
+2. Список основних переваг (максимум 5)
+3. Список основних недоліків (максимум 5)
+
+Відгуки:
+{reviews}
+
+Поверни результат у форматі JSON:
+{{
+    "summary": "підсумок частини",
+    "pros": ["перевага 1", "перевага 2", ...],
+    "cons": ["недолік 1", "недолік 2", ...]
+}}"""
+
+REDUCE_PROMPT = """Нижче підсумки окремих частин відгуків про товар "{title}".
+Об'єднай їх у загальний підсумок у 2-3 реченнях.
+
+Підсумки частин:
+{summaries}
+
+Найчастіші переваги: {pros}
+Найчастіші недоліки: {cons}
+
+Поверни результат у форматі JSON:
+{{
+    "summary": "загальний підсумок"
+}}"""
+
+
+def format_review(review):
+    return (
+        f"Відгук від {review.author}:\n"
+        f"Рейтинг: {review.rating}\n"
+        f"Текст: {review.text}"
+    )
+
+
+def build_summary_prompt(title, reviews):
+    """Будує промпт для підсумку відгуків"""
+    reviews_text = REVIEW_SEPARATOR.join(format_review(review) for review in reviews)
+
+    return f"""Проаналізуй наступні відгуки про товар "{title}" та надай:
+1. Загальний підсумок у 2-3 реченнях
+2. Список основних переваг (максимум 5)
+3. Список основних недоліків (максимум 5)
+
+Відгуки:
+{reviews_text}
+
+Поверни результат у форматі JSON:
+{{
+    "summary": "загальний підсумок",
+    "pros": ["перевага 1", "перевага 2", ...],
+    "cons": ["недолік 1", "недолік 2", ...]
+}}"""
+
+
+def parse_summary_response(response):
+    """Розбирає JSON з відповіді ШІ; ValueError, якщо JSON не знайдено"""
+    try:
+        return json.loads(response)
+    except json.JSONDecodeError:
+        # Якщо відповідь не в JSON форматі, шукаємо JSON в тексті
+        json_start = response.find('{')
+        json_end = response.rfind('}') + 1
+        if json_start >= 0 and json_end > json_start:
+            return json.loads(response[json_start:json_end])
+        raise ValueError('Неправильний формат відповіді від ШІ')
+
+
+def _normalize_point(point):
+    """Ключ для підрахунку однакових переваг і недоліків, записаних по-різному"""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', '', point.lower())).strip()
+
+
+def merge_points(partials, key, limit=MAX_POINTS):
+    """Об'єднує переваги або недоліки з частин, упорядковуючи їх за частотою.
+
+    Повертає список (текст, кількість); текстом пункту стає перше його формулювання.
+    """
+    counts = Counter()
+    first_seen = {}
+    for partial in partials:
+        for point in partial.get(key) or []:
+            if not isinstance(point, str) or not point.strip():
+                continue
+            normalized = _normalize_point(point)
+            if normalized not in first_seen:
+                first_seen[normalized] = (len(first_seen), point.strip())
+            counts[normalized] += 1
+    ranked = sorted(counts, key=lambda k: (-counts[k], first_seen[k][0]))
+    return [(first_seen[k][1], counts[k]) for k in ranked[:limit]]
+
+
+class MapReduceSummarizer:
+    """Підсумовує великі набори відгуків частинами.
+
+    Відгуки діляться на частини в межах бюджету токенів (AIHelper._split_text),
+    частини підсумовуються паралельно асинхронним клієнтом ШІ, а часткові
+    переваги й недоліки зводяться за частотою. Результат має ту саму форму,
+    що й підсумок одним запитом: summary, pros, cons.
+    """
+
+    def __init__(self, ai_helper=None, batch_tokens=None, max_workers=None):
+        self.ai_helper = ai_helper or AIHelper()
+        self.batch_tokens = batch_tokens or current_app.config['SUMMARY_BATCH_TOKENS']
+        self.max_workers = max_workers or current_app.config['SUMMARY_WORKERS']
+
+    def split_batches(self, reviews):
+        text = REVIEW_SEPARATOR.join(format_review(review) for review in reviews)
+        return self.ai_helper._split_text(text, max_tokens=self.batch_tokens, separator=REVIEW_SEPARATOR)
+
+    def _ask(self, prompt, bypass_cache):
+        response = self.ai_helper._make_request_with_retry(prompt, bypass_cache=bypass_cache)
+        return parse_summary_response(response)
+
+    def _map(self, title, batches, bypass_cache, progress_callback):
+        """Підсумовує частини паралельно; частини з помилкою пропускаються"""
+        total = len(batches)
+        prompts = [
+            MAP_PROMPT.format(batch=index + 1, total=total, title=title, reviews=batch)
+            for index, batch in enumerate(batches)
+        ]
+
+        def report(done, total):
+            current_app.logger.info(f"Підсумок: оброблено частин {done}/{total}")
+            if progress_callback:
+                progress_callback(done, total)
+
+        responses = self.ai_helper.request_many(
+            prompts, bypass_cache=bypass_cache, progress_callback=report, max_concurrency=self.max_workers
+        )
+
+        partials = []
+        for index, response in enumerate(responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                partials.append(parse_summary_response(response))
+            except Exception as e:
+                current_app.logger.warning(f"Частина {index + 1}/{total} підсумку не оброблена: {str(e)}")
+        return [partial for partial in partials if isinstance(partial, dict)]
+
+    def _reduce(self, title, partials, pros, cons, bypass_cache):
+        if len(partials) == 1:
+            return partials[0].get('summary', '')
+        summaries = '\n'.join(f"- {partial.get('summary', '')}" for partial in partials)
+        prompt = REDUCE_PROMPT.format(
+            title=title,
+            summaries=summaries,
+            pros=', '.join(f'{point} ({count})' for point, count in pros),
+            cons=', '.join(f'{point} ({count})' for point, count in cons)
+        )
+        try:
+            return self._ask(prompt, bypass_cache).get('summary', '')
+        except Exception as e:
+            current_app.logger.warning(f"Не вдалося об'єднати підсумки частин: {str(e)}")
+            return ' '.join(partial.get('summary', '') for partial in partials)
+
+    def summarize(self, title, reviews, bypass_cache=False, progress_callback=None):
+        """Повертає {'summary', 'pros', 'cons'} для відгуків будь-якої кількості"""
+        batches = self.split_batches(reviews)
+        if len(batches) <= 1:
+            # Невеликий набір - один запит з тим самим промптом, що й раніше
+            result = self._ask(build_summary_prompt(title, reviews), bypass_cache)
+            if progress_callback:
+                progress_callback(1, 1)
+            return result
+
+        current_app.logger.info(f"Підсумок {len(reviews)} відгуків розбито на {len(batches)} частин")
+        partials = self._map(title, batches, bypass_cache, progress_callback)
+        if not partials:
+            raise ValueError('Не вдалося отримати підсумок жодної частини відгуків')
+
+        pros = merge_points(partials, 'pros')
+        cons = merge_points(partials, 'cons')
+        return {
+            'summary': self._reduce(title, partials, pros, cons, bypass_cache),
+            'pros': [point for point, _ in pros],
+            'cons': [point for point, _ in cons]
+        }
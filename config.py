@@ -21,4 +21,94 @@ class Config:
     MAX_PREMIUM_REVIEWS_PER_URL = 500
     
     # Supported platforms
-    SUPPORTED_PLATFORMS = ['prom', 'rozetka'] 
\ No newline at end of file
+    SUPPORTED_PLATFORMS = ['prom', 'rozetka']
+    
+    # Browser pool settings (per thread)
+    BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 2))
+    BROWSER_MAX_PAGES_PER_BROWSER = int(os.environ.get('BROWSER_MAX_PAGES_PER_BROWSER', 50)) 
+    # Паралельне завантаження сторінок: всього одночасно і на один домен
+    BROWSER_FETCH_CONCURRENCY = int(os.environ.get('BROWSER_FETCH_CONCURRENCY', 8))
+    BROWSER_DOMAIN_CONCURRENCY = int(os.environ.get('BROWSER_DOMAIN_CONCURRENCY', 2))
+    # Не завантажувати в браузері ресурси, не потрібні для DOM (платформа може перевизначити)
+    BROWSER_BLOCK_RESOURCES = os.environ.get('BROWSER_BLOCK_RESOURCES', '1') == '1'
+    BROWSER_BLOCKED_RESOURCE_TYPES = [t for t in os.environ.get('BROWSER_BLOCKED_RESOURCE_TYPES', 'image,media,font').split(',') if t]
+    
+    # Ліміт запитів до домену (платформа може перевизначити ключем rate_limit): запитів за секунду, поспіль
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_PATH = os.environ.get('RATE_LIMIT_PATH') or os.path.join(basedir, 'rate_limit.db')
+    RATE_LIMIT_DEFAULT_RATE = float(os.environ.get('RATE_LIMIT_DEFAULT_RATE', 1.0))
+    RATE_LIMIT_DEFAULT_BURST = int(os.environ.get('RATE_LIMIT_DEFAULT_BURST', 3))
+    RATE_LIMIT_MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', 120))
+    # Circuit breaker платформи: відкривається після стількох збоїв поспіль (таймаут селектора, порожній
+    # парсинг) і через паузу (с) пропускає одну пробну задачу; повтори браузера з експоненційною затримкою (с)
+    CIRCUIT_BREAKER_ENABLED = os.environ.get('CIRCUIT_BREAKER_ENABLED', '1') == '1'
+    CIRCUIT_BREAKER_PATH = os.environ.get('CIRCUIT_BREAKER_PATH') or os.path.join(basedir, 'circuit_breaker.db')
+    CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_THRESHOLD', 5))
+    CIRCUIT_BREAKER_COOLDOWN = int(os.environ.get('CIRCUIT_BREAKER_COOLDOWN', 300))
+    BROWSER_MAX_ATTEMPTS = int(os.environ.get('BROWSER_MAX_ATTEMPTS', 3))
+    BROWSER_RETRY_BASE_DELAY = float(os.environ.get('BROWSER_RETRY_BASE_DELAY', 2.0))
+    BROWSER_RETRY_MAX_DELAY = float(os.environ.get('BROWSER_RETRY_MAX_DELAY', 20.0))
+    
+    # Extraction job queue
+    EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', 2))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    # Задача без heartbeat довше за JOB_STALE_TIMEOUT вважається завислою (с)
+    JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', 900))
+    JOB_HEARTBEAT_INTERVAL = float(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30.0))
+    # Як часто воркер повертає в чергу завислі задачі і як часто супервізор перевіряє воркерів (с)
+    JOB_REQUEUE_INTERVAL = int(os.environ.get('JOB_REQUEUE_INTERVAL', 60))
+    WORKER_CHECK_INTERVAL = float(os.environ.get('WORKER_CHECK_INTERVAL', 5.0))
+    # Пакетні витяги: максимум URL у пакеті та скільки сторінок пакета воркер завантажує разом
+    BATCH_MAX_URLS = int(os.environ.get('BATCH_MAX_URLS', 500))
+    BATCH_FETCH_SIZE = int(os.environ.get('BATCH_FETCH_SIZE', 8))
+    # Відстежувані товари: інтервал оновлення за замовчуванням і мінімальний (с)
+    TRACKING_DEFAULT_INTERVAL = int(os.environ.get('TRACKING_DEFAULT_INTERVAL', 24 * 3600))
+    TRACKING_MIN_INTERVAL = int(os.environ.get('TRACKING_MIN_INTERVAL', 3600))
+    # Планувальник оновлень: оновлень на домен за хвилину, розкид інтервалу (частка), перечитування списку (с)
+    SCHEDULER_DOMAIN_BUDGET = int(os.environ.get('SCHEDULER_DOMAIN_BUDGET', 30))
+    SCHEDULER_JITTER = float(os.environ.get('SCHEDULER_JITTER', 0.1))
+    SCHEDULER_RELOAD_INTERVAL = int(os.environ.get('SCHEDULER_RELOAD_INTERVAL', 60))
+    SCHEDULER_MAX_SLEEP = float(os.environ.get('SCHEDULER_MAX_SLEEP', 30))
+    
+    # Платформи, відгуки яких витягуються напряму по HTTP, без браузера
+    HTTP_MODE_PLATFORMS = [p for p in os.environ.get('HTTP_MODE_PLATFORMS', 'prom').split(',') if p]
+    HTTP_FETCH_WORKERS = int(os.environ.get('HTTP_FETCH_WORKERS', 4))
+    HTTP_FETCH_TIMEOUT = float(os.environ.get('HTTP_FETCH_TIMEOUT', 15))
+    # Пагінація відгуків: скільки сторінок завантажувати одночасно і максимум сторінок
+    PAGINATION_WORKERS = int(os.environ.get('PAGINATION_WORKERS', 4))
+    PAGINATION_MAX_PAGES = int(os.environ.get('PAGINATION_MAX_PAGES', 50))
+    
+    # AI service client
+    AI_HTTP_POOL_SIZE = int(os.environ.get('AI_HTTP_POOL_SIZE', 10))
+    AI_RETRY_BASE_DELAY = float(os.environ.get('AI_RETRY_BASE_DELAY', 1.0))
+    AI_RETRY_MAX_DELAY = float(os.environ.get('AI_RETRY_MAX_DELAY', 30.0))
+    # Скільки запитів асинхронний клієнт відправляє до ШІ одночасно
+    AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', 4))
+    
+    # AI response cache
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', '1') == '1'
+    AI_CACHE_PATH = os.environ.get('AI_CACHE_PATH') or os.path.join(basedir, 'ai_cache.db')
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL', 7 * 24 * 3600))
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 5000))
+    
+    # Генерувати підсумок відгуків одразу після завершення витягу
+    SUMMARY_WARMUP = os.environ.get('SUMMARY_WARMUP', '0') == '1'
+    # Бюджет токенів однієї частини та кількість паралельних запитів підсумку
+    SUMMARY_BATCH_TOKENS = int(os.environ.get('SUMMARY_BATCH_TOKENS', 3000))
+    SUMMARY_WORKERS = int(os.environ.get('SUMMARY_WORKERS', 4))
+    
+    # Знімки HTML сторінок для повторного парсингу без завантаження
+    SNAPSHOTS_ENABLED = os.environ.get('SNAPSHOTS_ENABLED', '1') == '1'
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR') or os.path.join(basedir, 'snapshots')
+    SNAPSHOT_CODEC = os.environ.get('SNAPSHOT_CODEC', 'zstd')  # zstd (якщо встановлено zstandard) або gzip
+    SNAPSHOT_COMPRESSION_LEVEL = int(os.environ.get('SNAPSHOT_COMPRESSION_LEVEL', 6))
+    SNAPSHOT_RETENTION_DAYS = int(os.environ.get('SNAPSHOT_RETENTION_DAYS', 30))
+    SNAPSHOT_MAX_BYTES = int(os.environ.get('SNAPSHOT_MAX_BYTES', 2 * 1024 ** 3))
+    # Процесів для повторного парсингу збережених знімків
+    REPARSE_WORKERS = int(os.environ.get('REPARSE_WORKERS', os.cpu_count() or 2))
+    # Збережені сторінки, на яких план має збігтися з живим парсером перед записом повторного парсингу
+    PARSER_FIXTURES_DIR = os.environ.get('PARSER_FIXTURES_DIR') or \
+        os.path.join(basedir, 'app', 'scripts', 'fixtures', 'parsing')
+    
+    # Export settings
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
\ No newline at end of file